@@ -229,6 +229,12 @@ def setup_arg_parser():
                           callback=extract_failed_tests,
                           dest="extract_failed")
 
+    misc_group.add_option("--rebuild-index",
+                          help="Force a full refresh of the test suites file index used to find "
+                               "test cases and campaigns by name.",
+                          action="store_true", default=False,
+                          dest="rebuild_index")
+
     misc_group.add_option("-v", "--version",
                           help="Print the current ACS Version.",
                           action="callback", callback=display_acs_version)
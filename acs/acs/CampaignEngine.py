@@ -516,6 +516,7 @@ class CampaignEngine:
             self.__init_reports(self.campaign_report_path,
                                 device_name, campaign_name, campaign_relative_path,
                                 campaign_type, user_email, metacampaign_uuid)
+            self.__test_report.add_equipment_init_info(EquipmentManager().get_init_results())
 
             # Creates Test case Manager object
             self.__test_case_manager = TestCaseManager(self.__test_report,
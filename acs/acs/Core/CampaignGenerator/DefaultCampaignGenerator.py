@@ -25,6 +25,7 @@ import lxml.etree as et
 
 import acs.UtilitiesFWK.Utilities as Utils
 from acs.Core.CampaignConf import CampaignConf
+from acs.Core.CampaignGenerator.TestSuitesIndex import TestSuitesIndex
 from acs.Core.CatalogParser.CatalogParser import CatalogParser
 from acs.Core.PathManager import Paths
 from acs.Core.Report.ACSLogging import LOGGER_FWK
@@ -46,6 +47,19 @@ class DefaultCampaignGenerator(object):
 
         self._ucase_catalogs = self._global_config.usecaseCatalog
         self._files_in_test_suites = None
+        self._test_suites_index = None
+        # Force a full refresh of the test suites index (--rebuild-index)
+        self._rebuild_index = False
+
+    @property
+    def test_suites_index(self):
+        """
+        Index of the test suites files, refreshed at first use
+        """
+        if self._test_suites_index is None:
+            self._test_suites_index = TestSuitesIndex(Paths.TEST_SUITES)
+            self._test_suites_index.refresh(self._rebuild_index)
+        return self._test_suites_index
 
     @property
     def files_in_test_suites(self):
@@ -55,24 +69,14 @@ class DefaultCampaignGenerator(object):
 
     def _parse_test_suites(self):
         """
-        This method will populate execution folder with test suites content to allow TC to be parsed by the generator.
-        If qcl_test_suites is acs_test_suites, all the content will be copied
-        If not, only "some" parts of acs_test_suites will be copied.
-
-        :param qcl_test_suites: path of the test suites to handle
-        :type qcl_test_suites: str
+        Map the name of the test suites files having the generator file extension to their paths
 
-        :return: test suites path once copy is done
-        :rtype: str
+        :return: {name: [paths without extension]}
+        :rtype: dict
         """
-        test_suites = os.path.abspath(os.path.expanduser(Paths.TEST_SUITES))
         existing_files = {}
-        for root, dirs, files in os.walk(test_suites):
-            for f in files:
-                fname, ext = os.path.splitext(f)
-                if ext != self._file_extension:
-                    continue
-                existing_files.setdefault(fname, []).append(os.path.join(root, fname))
+        for fname, paths in self.test_suites_index.get_files(self._file_extension).iteritems():
+            existing_files[fname] = [os.path.splitext(path)[0] for path in paths]
         return existing_files
 
     def _find_obj_in_test_suites(self, name, errors):
@@ -94,6 +98,16 @@ class DefaultCampaignGenerator(object):
                                                campaign_name + self._file_extension)))
 
         if not os.path.isfile(campaign_file_path):
+            # Look for the campaign name in the test suites
+            campaign_base_name = os.path.basename(campaign_name)
+            if campaign_base_name.endswith(self._file_extension):
+                campaign_base_name = campaign_base_name[:-len(self._file_extension)]
+            found_campaigns = self.test_suites_index.find(campaign_base_name, self._file_extension)
+            if found_campaigns:
+                if len(found_campaigns) != 1:
+                    self._logger.warning("Got multiple occurences of {}. Taking the first one".format(campaign_name))
+                return found_campaigns[0]
+
             error_msg = "Campaign file not found : %s !" % (campaign_file_path,)
             raise AcsConfigException(AcsConfigException.FILE_NOT_FOUND, error_msg)
         return campaign_file_path
@@ -109,6 +123,10 @@ class DefaultCampaignGenerator(object):
         :rtype Tuple of TestCaseConf list, CampaignConf list
         """
         campaign_name = os.path.normpath(kwargs["campaign_name"])
+        self._rebuild_index = bool(kwargs.get("rebuild_index"))
+        if self._rebuild_index:
+            self._logger.info("Rebuilding test suites index of %s..." % Paths.TEST_SUITES)
+            self.test_suites_index.get_files(self._file_extension)
 
         campaign_file_path = self._find_campaign_path(campaign_name)
 
@@ -0,0 +1,238 @@
+"""
+Copyright (C) 2018 Intel Corporation
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions
+and limitations under the License.
+
+
+SPDX-License-Identifier: Apache-2.0
+"""
+
+import cPickle
+import hashlib
+import os
+import time
+
+from acs.Core.PathManager import Paths
+from acs.Core.Report.ACSLogging import LOGGER_FWK
+
+
+class TestSuitesIndex(object):
+
+    """
+    Index of the files of a test suites folder, by name and extension.
+
+    The index is saved on disk and refreshed incrementally: only the directories
+    whose modification time changed since the last refresh are listed again,
+    the other ones are just checked with a stat.
+
+    The index file is replaced at once, so that concurrent ACS instances sharing it
+    always read a complete index (the last refresh wins).
+    """
+
+    # Version of the index file format, increase it when the format changes
+    INDEX_VERSION = 1
+
+    DISK_CACHE_PATH = Paths.CACHE_TEST_SUITES_INDEX
+
+    def __init__(self, test_suites_path):
+        """
+        Constructor
+
+        :type test_suites_path: str
+        :param test_suites_path: root folder of the test suites to index
+        """
+        self._root = os.path.abspath(os.path.expanduser(test_suites_path))
+        self._logger = LOGGER_FWK
+
+        # Indexed directories,
+        # {path relative to root: (modification time, sub directories, {extension: [file names]})}
+        self._dirs = None
+        # Indexed files, {extension: {name: [paths]}}, built at first lookup of each extension
+        self._files = {}
+
+    @property
+    def root(self):
+        """
+        Root folder of the indexed test suites
+
+        :rtype: str
+        :return: absolute path of the folder
+        """
+        return self._root
+
+    def refresh(self, rebuild=False):
+        """
+        Load the index from disk and update the directories modified since its last refresh
+
+        :type rebuild: bool
+        :param rebuild: ignore the index saved on disk and list all the directories again
+        """
+        start = time.time()
+        saved_dirs = {} if rebuild else self.__load_disk_cache()
+        refresh_start = time.time()
+
+        self._dirs = {}
+        rescanned = self.__scan("", saved_dirs, refresh_start)
+        self._files = {}
+
+        if rescanned or len(self._dirs) != len(saved_dirs):
+            self.__save_disk_cache()
+
+        self._logger.debug("Test suites index of %s refreshed in %.2f secs (%d directories, %d listed again)"
+                           % (self._root, time.time() - start, len(self._dirs), rescanned))
+
+    def find(self, name, extension):
+        """
+        Find the files of the test suites matching a name and an extension
+
+        :type name: str
+        :param name: file name, without extension
+
+        :type extension: str
+        :param extension: file extension (i.e. ".xml")
+
+        :rtype: list
+        :return: paths of the matching files, in indexing order, empty list if none
+        """
+        return self.get_files(extension).get(name, [])
+
+    def get_files(self, extension):
+        """
+        Get all the files of the test suites having an extension
+
+        :type extension: str
+        :param extension: file extension (i.e. ".xml")
+
+        :rtype: dict
+        :return: {name: [paths]} of the files, paths in indexing order
+        """
+        if self._dirs is None:
+            self.refresh()
+        if extension not in self._files:
+            self._files[extension] = self.__index_files(extension)
+        return self._files[extension]
+
+    def __scan(self, rel_dir, saved_dirs, refresh_start):
+        """
+        Index a directory and its sub directories, top down and in alphabetical order
+
+        :type rel_dir: str
+        :param rel_dir: path of the directory relative to the root
+
+        :type saved_dirs: dict
+        :param saved_dirs: directories of the previous index
+
+        :type refresh_start: float
+        :param refresh_start: time of the start of the refresh
+
+        :rtype: int
+        :return: number of directories listed again
+        """
+        dir_path = os.path.join(self._root, rel_dir)
+        try:
+            mtime = os.stat(dir_path).st_mtime
+        except OSError:
+            return 0
+
+        rescanned = 0
+        saved_dir = saved_dirs.get(rel_dir)
+        if saved_dir is not None and saved_dir[0] == mtime:
+            sub_dirs, files = saved_dir[1], saved_dir[2]
+        else:
+            try:
+                entries = sorted(os.listdir(dir_path))
+            except OSError:
+                return 0
+            rescanned = 1
+            sub_dirs = []
+            files = {}
+            for entry in entries:
+                entry_path = os.path.join(dir_path, entry)
+                if os.path.isdir(entry_path):
+                    # Like os.walk, symbolic links to directories are not followed
+                    if not os.path.islink(entry_path):
+                        sub_dirs.append(entry)
+                else:
+                    name, ext = os.path.splitext(entry)
+                    files.setdefault(ext, []).append(name)
+
+        if mtime >= int(refresh_start) - 1:
+            # The directory may still be modified within the same second,
+            # do not trust its modification time at next refresh
+            mtime = None
+        self._dirs[rel_dir] = (mtime, sub_dirs, files)
+
+        for sub_dir in sub_dirs:
+            rescanned += self.__scan(os.path.join(rel_dir, sub_dir), saved_dirs, refresh_start)
+        return rescanned
+
+    def __index_files(self, extension):
+        """
+        Index by name the files of the indexed directories having an extension
+        """
+        indexed_files = {}
+        pending_dirs = [""]
+        while pending_dirs:
+            rel_dir = pending_dirs.pop()
+            if rel_dir not in self._dirs:
+                continue
+            _, sub_dirs, files = self._dirs[rel_dir]
+            dir_path = os.path.join(self._root, rel_dir, "")
+            for name in files.get(extension, ()):
+                indexed_files.setdefault(name, []).append(dir_path + name + extension)
+            # Keep indexing order: sub directories are processed in alphabetical order
+            pending_dirs.extend(os.path.join(rel_dir, sub_dir) for sub_dir in reversed(sub_dirs))
+        return indexed_files
+
+    def __get_disk_cache_file(self):
+        """
+        Return the path of the disk cache file of the index
+        """
+        return os.path.join(self.DISK_CACHE_PATH, "%s.pickle" % hashlib.md5(self._root).hexdigest())
+
+    def __load_disk_cache(self):
+        """
+        Load the index saved on disk
+
+        :rtype: dict
+        :return: the indexed directories, empty if not available
+        """
+        try:
+            with open(self.__get_disk_cache_file(), "rb") as cache_file:
+                version, root, saved_dirs = cPickle.load(cache_file)
+        except Exception:
+            return {}
+
+        if version != self.INDEX_VERSION or root != self._root:
+            return {}
+        return saved_dirs
+
+    def __save_disk_cache(self):
+        """
+        Save the index on disk
+        """
+        cache_file_path = self.__get_disk_cache_file()
+        temp_file_path = "%s.%d" % (cache_file_path, os.getpid())
+        try:
+            if not os.path.isdir(self.DISK_CACHE_PATH):
+                os.makedirs(self.DISK_CACHE_PATH)
+            with open(temp_file_path, "wb") as cache_file:
+                cPickle.dump((self.INDEX_VERSION, self._root, self._dirs), cache_file, cPickle.HIGHEST_PROTOCOL)
+            # Replace the previous index file at once, so that concurrent ACS never read a partial file
+            os.rename(temp_file_path, cache_file_path)
+        except (IOError, OSError):
+            # The index file is only an optimization
+            try:
+                os.remove(temp_file_path)
+            except OSError:
+                pass
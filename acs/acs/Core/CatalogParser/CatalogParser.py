@@ -17,11 +17,16 @@ and limitations under the License.
 SPDX-License-Identifier: Apache-2.0
 """
 
+import cPickle
+import hashlib
 import os
+import threading
 import yaml
 
 from lxml import etree
+from acs.Core.PathManager import Paths
 from acs.ErrorHandling.AcsConfigException import AcsConfigException
+from acs.UtilitiesFWK.Utilities import str_to_bool_ex
 
 
 class CatalogParser(object):
@@ -52,10 +57,19 @@ class CatalogParser(object):
 
     CATALOG_EXTENTION = ".xml"
 
+    # Parsed catalogs can be saved on disk to speed up the next ACS starts
+    DISK_CACHE_ENABLED = bool(str_to_bool_ex(os.environ.get("ACS_CATALOG_CACHE")))
+    DISK_CACHE_PATH = Paths.CACHE_CATALOGS
+
+    # Parsed catalogs shared by all the parser instances,
+    # {(parser class name, catalog paths): (catalog files signature, pickled dictionary)}
+    __cache = {}
+    __cache_lock = threading.Lock()
+
     def __init__(self, catalog_paths):
         """
-        Validate optional XML schema (xsd) & YAML logic files
-        & load their contents
+        Optional XML schema (xsd) & YAML logic files are validated
+        & loaded when a catalog file is parsed
 
         :type catalog_paths: list
         :param catalog_paths: catalog paths list.
@@ -65,6 +79,14 @@ class CatalogParser(object):
         self._xml_schema = None
         self._yaml_config = None
         self._catalog_paths = catalog_paths
+        self.__validation_loaded = False
+
+    def __load_validation_files(self):
+        """
+        Load optional XML schema (xsd) & YAML logic files, once
+        """
+        if self.__validation_loaded:
+            return
 
         if self.XML_SCHEMA_FILE and os.path.isfile(self.XML_SCHEMA_FILE):
             self._xml_schema = self.__load_xml_schema(self.XML_SCHEMA_FILE)
@@ -72,6 +94,8 @@ class CatalogParser(object):
         if self.YAML_CONFIG_FILE and os.path.isfile(self.YAML_CONFIG_FILE):
             self._yaml_config = self.__load_yaml_config(self.YAML_CONFIG_FILE)
 
+        self.__validation_loaded = True
+
     def __load_xml_schema(self, xml_schema):
         """
         Load xml schema to validate the xml catalog
@@ -137,7 +161,7 @@ class CatalogParser(object):
 
         return catalog_etree
 
-    def _check_xml_logic(self, catalog_file):
+    def _check_xml_logic(self, catalog_file, catalog_etree=None):
         """
         Validate catalog file regarding loaded YAML logic
         regarding to Domains, SubDomains & Features
@@ -146,12 +170,16 @@ class CatalogParser(object):
         :type catalog_file: string
         :param catalog_file: Catalog file to parse
 
+        :type catalog_etree: etree.ElementTree
+        :param catalog_etree: Catalog file already parsed, if any
+
         :rtype: none
         :return: none
         """
 
         # Parse the xml file
-        catalog_etree = etree.parse(catalog_file)
+        if catalog_etree is None:
+            catalog_etree = etree.parse(catalog_file)
 
         if catalog_etree and self._yaml_config:
 
@@ -294,10 +322,11 @@ class CatalogParser(object):
         :return: X to validate the xml catalog file
         """
 
+        self.__load_validation_files()
         catalog_etree = self.__check_xml_schema(catalog_file)
 
         if catalog_etree:
-            self._check_xml_logic(catalog_file)
+            self._check_xml_logic(catalog_file, catalog_etree)
 
         return catalog_etree
 
@@ -321,23 +350,135 @@ class CatalogParser(object):
         If multiple catalogs are in the folder, it will return a concatenated dictionary.
         If a key is already defined in the dictionary, raise an AcsConfigException
 
+        The result is cached until a catalog file, the xml schema or the YAML logic file is modified,
+        each call returns a new copy of the dictionary.
+
         :type catalog_paths: list
         :param catalog_paths: catalog paths list. Catalogs can come from different locations (acs, acs_test_scripts)
 
         :type: dict
         :return: Dictionary containing catalog elements
         """
-        concatenated_dictionary = {}
+        catalog_files = self._list_catalog_files()
+        signature = self.__get_signature(catalog_files)
+        cache_key = (self.__class__.__name__, tuple(self._catalog_paths))
+
+        with CatalogParser.__cache_lock:
+            cached_catalog = CatalogParser.__cache.get(cache_key)
+
+        if cached_catalog is None or cached_catalog[0] != signature:
+            cached_catalog = self.__load_disk_cache(cache_key, signature)
 
+            if cached_catalog is None:
+                concatenated_dictionary = self._parse_catalog_files(catalog_files)
+                cached_catalog = (signature, cPickle.dumps(concatenated_dictionary, cPickle.HIGHEST_PROTOCOL))
+                self.__save_disk_cache(cache_key, cached_catalog)
+
+            with CatalogParser.__cache_lock:
+                CatalogParser.__cache[cache_key] = cached_catalog
+
+        return cPickle.loads(cached_catalog[1])
+
+    def _list_catalog_files(self):
+        """
+        List the catalog files of the catalog folder(s)
+
+        :rtype: list
+        :return: paths of the catalog files
+        """
+        catalog_files = []
         for catalog_path in self._catalog_paths:
             for root, _, catalog_list in os.walk(catalog_path):
                 for catalog_file in catalog_list:
                     if catalog_file.lower().endswith(self.CATALOG_EXTENTION):
-                        temp_dictionary = self.parse_catalog_file(os.path.join(root, catalog_file))
-                        for item_name in temp_dictionary.iterkeys():
-                            if item_name in concatenated_dictionary:
-                                raise AcsConfigException(AcsConfigException.PROHIBITIVE_BEHAVIOR,
-                                                         "item '%s' is defined more than one time !" % item_name)
-                        concatenated_dictionary.update(temp_dictionary)
+                        catalog_files.append(os.path.join(root, catalog_file))
+        return catalog_files
+
+    def _parse_catalog_files(self, catalog_files):
+        """
+        Parse the catalog files and concatenate their dictionaries
+
+        :type catalog_files: list
+        :param catalog_files: paths of the catalog files
+
+        :type: dict
+        :return: Dictionary containing catalog elements
+        """
+        concatenated_dictionary = {}
+
+        for catalog_file in catalog_files:
+            temp_dictionary = self.parse_catalog_file(catalog_file)
+            for item_name in temp_dictionary.iterkeys():
+                if item_name in concatenated_dictionary:
+                    raise AcsConfigException(AcsConfigException.PROHIBITIVE_BEHAVIOR,
+                                             "item '%s' is defined more than one time !" % item_name)
+            concatenated_dictionary.update(temp_dictionary)
 
         return concatenated_dictionary
+
+    def __get_signature(self, catalog_files):
+        """
+        Compute the signature of the catalog files, the xml schema and the YAML logic file,
+        made of their paths, modification times and sizes
+
+        :type catalog_files: list
+        :param catalog_files: paths of the catalog files
+
+        :rtype: tuple
+        :return: signature changing as soon as one of the files is modified
+        """
+        signature = []
+        for file_path in [self.XML_SCHEMA_FILE, self.YAML_CONFIG_FILE] + catalog_files:
+            try:
+                file_stat = os.stat(file_path)
+                signature.append((file_path, file_stat.st_mtime, file_stat.st_size))
+            except OSError:
+                signature.append((file_path, None, None))
+        return tuple(signature)
+
+    def __get_disk_cache_file(self, cache_key):
+        """
+        Return the path of the disk cache file of the catalogs
+        """
+        return os.path.join(self.DISK_CACHE_PATH, "%s_%s.pickle" % (cache_key[0],
+                                                                    hashlib.md5(repr(cache_key[1])).hexdigest()))
+
+    def __load_disk_cache(self, cache_key, signature):
+        """
+        Load the catalogs saved on disk, if disk cache is enabled and catalog files did not change
+
+        :rtype: tuple
+        :return: (signature, pickled dictionary), None if not available
+        """
+        if not self.DISK_CACHE_ENABLED:
+            return None
+
+        try:
+            with open(self.__get_disk_cache_file(cache_key), "rb") as cache_file:
+                cached_catalog = cPickle.load(cache_file)
+        except Exception:
+            return None
+
+        if cached_catalog[0] != signature:
+            return None
+        return cached_catalog
+
+    def __save_disk_cache(self, cache_key, cached_catalog):
+        """
+        Save the parsed catalogs on disk, if disk cache is enabled
+        """
+        if not self.DISK_CACHE_ENABLED:
+            return
+
+        cache_file_path = self.__get_disk_cache_file(cache_key)
+        temp_file_path = "%s.%d" % (cache_file_path, os.getpid())
+        try:
+            if not os.path.isdir(self.DISK_CACHE_PATH):
+                os.makedirs(self.DISK_CACHE_PATH)
+            with open(temp_file_path, "wb") as cache_file:
+                cPickle.dump(cached_catalog, cache_file, cPickle.HIGHEST_PROTOCOL)
+            # Replace the previous cache file at once, so that concurrent ACS never read a partial file
+            os.rename(temp_file_path, cache_file_path)
+        except (IOError, OSError):
+            # The disk cache is only an optimization
+            pass
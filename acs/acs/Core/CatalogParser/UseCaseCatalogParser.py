@@ -119,7 +119,7 @@ class UseCaseCatalogParser(CatalogParser):
                                      "'%s' catalog is invalid ! (SubDomain %s is not valid for item %s; Expected values are %s)"  # NOQA
                                      % (catalog_file, str(item_subdomain), str(item_id), str(possible_subdomains)))
 
-    def _check_xml_logic(self, catalog_file):
+    def _check_xml_logic(self, catalog_file, catalog_etree=None):
         """
         Validate catalog file regarding loaded YAML logic
         regarding to Domains &SubDomains
@@ -128,12 +128,16 @@ class UseCaseCatalogParser(CatalogParser):
         :type catalog_file: string
         :param catalog_file: Catalog file to parse
 
+        :type catalog_etree: etree.ElementTree
+        :param catalog_etree: Catalog file already parsed, if any
+
         :rtype: none
         :return: none
         """
 
         # Parse the xml file
-        catalog_etree = etree.parse(catalog_file)
+        if catalog_etree is None:
+            catalog_etree = etree.parse(catalog_file)
 
         if catalog_etree and self._yaml_config:
 
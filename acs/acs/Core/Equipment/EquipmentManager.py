@@ -19,11 +19,14 @@ SPDX-License-Identifier: Apache-2.0
 
 import inspect
 import os
+import sys
+import threading
 import time
 import weakref
 from xml import sax
 from xml.sax.handler import ContentHandler
 
+from acs.ErrorHandling.AcsBaseException import AcsBaseException
 from acs.ErrorHandling.AcsConfigException import AcsConfigException
 from acs.ErrorHandling.TestEquipmentException import TestEquipmentException
 from acs.Core.Report.ACSLogging import LOGGER_EQT, LOGGER_EQT_STATS
@@ -46,6 +49,14 @@ POWER_SUPPLY_INSTANCE_NAME_DEVICE_PARAM = "PowerSupply"
 USB_HUB_INSTANCE_NAME_DEVICE_PARAM = "USBHub"
 KEYBOARD_EMULATOR_INSTANCE_NAME_DEVICE_PARAM = "KeyboardEmulator"
 
+# Equipments initialized by EquipmentManager.initialize, in initialization order
+INIT_EQUIPMENT_TYPES = [IO_CARD_TYPE, POWER_SUPPLY_TYPE, USB_HUB_TYPE, KEYBOARD_EMULATOR_TYPE]
+# Equipment types to initialize before others, {type: [types initialized before]}
+# i.e.: IO cards wait some seconds after their init to avoid over protect with power supplies
+INIT_TYPE_DEPENDENCIES = {POWER_SUPPLY_TYPE: [IO_CARD_TYPE]}
+# Default max number of equipments initialized at the same time
+DEFAULT_MAX_INIT_THREADS = 4
+
 # Equipment manager common functions #
 
 
@@ -71,6 +82,10 @@ class EquipmentManager(object):
     __global_cfg = None
     __power_supply_required_by_user = False
     __io_card_required_by_user = False
+    __max_init_threads = DEFAULT_MAX_INIT_THREADS
+
+    # Initialization results of the equipments, [(bench name, type, duration, error message)]
+    __init_results = []
 
     # Logger
     __logger = LOGGER_EQT
@@ -95,6 +110,13 @@ class EquipmentManager(object):
             global_config.campaignConfig.get("isControlledPSUsed", "false"))
         cls.__io_card_required_by_user = str_to_bool(
             global_config.campaignConfig.get("isIoCardUsed", "false"))
+        try:
+            cls.__max_init_threads = max(1, int(global_config.campaignConfig.get("maxEquipmentInitThreads",
+                                                                                 DEFAULT_MAX_INIT_THREADS)))
+        except (TypeError, ValueError):
+            msg = "maxEquipmentInitThreads shall be an integer, using %d" % DEFAULT_MAX_INIT_THREADS
+            cls.get_logger().warning(msg)
+            cls.__max_init_threads = DEFAULT_MAX_INIT_THREADS
 
     @classmethod
     def get_global_config(cls):
@@ -837,46 +859,12 @@ class EquipmentManager(object):
         :return: a dictionary containing all available instances of given equipment type
         """
         if equipment_instances_dict is None:
-            equipment_models = {}
             equipment_instances_dict = {}
-            # Retreive a dictionnary of the benchconfig
-            bench_cfg = self.get_global_config().benchConfig.get_dict()
-            # Retreive a dictionnary of the equipments catalog
-            eqt_catalog = self.get_global_config().equipmentCatalog
-            # Search for equipment type given in parameter
-            for eqt_type, eqt_type_dict in eqt_catalog.iteritems():
-                if eqt_type == equipment_type:
-                    # Store all models of equipment type given in param
-                    equipment_models = eqt_type_dict.keys()
-                    break
             # Search for an  equipment of given type in benchconfig
-            for eqt_name, eqt_dict in bench_cfg.iteritems():
+            for eqt_name in self.__get_bench_equipment_names(equipment_type):
                 try:
-                    # Data is encapsulated in a dict (once again....)
-                    model = eqt_dict[EQT_MODEL_KEY]['value']
-                    if model in equipment_models:
-                        # FIXME : beware for now __instantiate_equipment is not generic enough to be used in all cases
-                        # if using __get_equipment_instances you should check if you eq need a specific getter
-                        # a story should be created to rework all EquipmentManager
-                        if equipment_type == POWER_SUPPLY_TYPE:
-                            eqt = self.get_power_supply(eqt_name)
-                            # history: eqt.init() done here
-                            eqt.init()
-                        elif equipment_type == IO_CARD_TYPE:
-                            eqt = self.get_io_card(eqt_name)
-                            # history: eqt.init() already done inside get_io_card
-                        elif equipment_type == IO_ADAPTER_TYPE:
-                            eqt = self.get_io_adapter(eqt_name)
-                        else:
-                            eqt = self.__instantiate_equipment(eqt_name, equipment_type)
-                            if eqt is not None:
-                                eqt.init()
-                        # Store equipment type instances in equipment dictionary
-                        equipment_instances_dict[eqt_name] = eqt
-
-                # If no model found, we are in the phones section of benchconfig
-                # (the benchonfig dict is a raw data parsed...unfortunatelly)
-                # So nothing to parse if key not found
+                    # Store equipment type instances in equipment dictionary
+                    equipment_instances_dict[eqt_name] = self.__create_equipment(eqt_name, equipment_type)
                 except KeyError:
                     pass
             if equipment_instances_dict == {} and equipment_required:
@@ -884,6 +872,69 @@ class EquipmentManager(object):
                 raise AcsConfigException(AcsConfigException.PROHIBITIVE_BEHAVIOR, msg)
         return equipment_instances_dict
 
+    def __get_bench_equipment_names(self, equipment_type):
+        """
+        Gets the names of the equipments of given type configured in bench configuration file
+        :type equipment_type: str
+        :param equipment_type: the type of the equipments
+        :rtype: list
+        :return: the bench configuration names of the equipments
+        """
+        equipment_models = {}
+        equipment_names = []
+        # Retreive a dictionnary of the benchconfig
+        bench_cfg = self.get_global_config().benchConfig.get_dict()
+        # Retreive a dictionnary of the equipments catalog
+        eqt_catalog = self.get_global_config().equipmentCatalog
+        # Search for equipment type given in parameter
+        for eqt_type, eqt_type_dict in eqt_catalog.iteritems():
+            if eqt_type == equipment_type:
+                # Store all models of equipment type given in param
+                equipment_models = eqt_type_dict.keys()
+                break
+        # Search for an  equipment of given type in benchconfig
+        for eqt_name, eqt_dict in bench_cfg.iteritems():
+            try:
+                # Data is encapsulated in a dict (once again....)
+                model = eqt_dict[EQT_MODEL_KEY]['value']
+                if model in equipment_models:
+                    equipment_names.append(eqt_name)
+
+            # If no model found, we are in the phones section of benchconfig
+            # (the benchonfig dict is a raw data parsed...unfortunatelly)
+            # So nothing to parse if key not found
+            except KeyError:
+                pass
+        return sorted(equipment_names)
+
+    def __create_equipment(self, eqt_name, equipment_type):
+        """
+        Creates and initializes an equipment of given type
+        :type eqt_name: str
+        :param eqt_name: the bench configuration name of the equipment
+        :type equipment_type: str
+        :param equipment_type: the type of the equipment
+        :rtype: object
+        :return: the instance of the equipment
+        """
+        # FIXME : beware for now __instantiate_equipment is not generic enough to be used in all cases
+        # if using __get_equipment_instances you should check if you eq need a specific getter
+        # a story should be created to rework all EquipmentManager
+        if equipment_type == POWER_SUPPLY_TYPE:
+            eqt = self.get_power_supply(eqt_name)
+            # history: eqt.init() done here
+            eqt.init()
+        elif equipment_type == IO_CARD_TYPE:
+            eqt = self.get_io_card(eqt_name)
+            # history: eqt.init() already done inside get_io_card
+        elif equipment_type == IO_ADAPTER_TYPE:
+            eqt = self.get_io_adapter(eqt_name)
+        else:
+            eqt = self.__instantiate_equipment(eqt_name, equipment_type)
+            if eqt is not None:
+                eqt.init()
+        return eqt
+
     def get_power_supplies(self):
         """
         Gets a list of all power supplies instances configured in bench
@@ -2141,12 +2192,218 @@ class EquipmentManager(object):
     def initialize(self):
         """
             Initialize equipments used by DeviceModel
+
+            Equipments are initialized concurrently, an equipment being initialized after
+            the equipments it refers to in its bench configuration (i.e. its controller)
+            and after the equipment types it depends on (see INIT_TYPE_DEPENDENCIES).
         """
         # FIXME this func should not be called as getting equipments is done by DeviceController
-        self.get_io_cards()
-        self.get_power_supplies()
-        self.get_usb_hubs()
-        self.get_keyboard_emulators()
+        init_tasks = []
+        task_types = {}
+        for equipment_type in INIT_EQUIPMENT_TYPES:
+            for eqt_name in self.__get_bench_equipment_names(equipment_type):
+                if eqt_name not in task_types:
+                    task_types[eqt_name] = equipment_type
+                    init_tasks.append(eqt_name)
+
+        bench_cfg = self.get_global_config().benchConfig.get_dict()
+        dependencies = {}
+        for eqt_name in init_tasks:
+            # Equipments referred by the bench configuration of the equipment
+            referred_names = self.__get_referred_names(bench_cfg.get(eqt_name))
+            dependencies[eqt_name] = [name for name in init_tasks if name != eqt_name and
+                                      (name in referred_names or
+                                       task_types[name] in INIT_TYPE_DEPENDENCIES.get(task_types[eqt_name], []))]
+
+        scheduler = _EquipmentInitScheduler(self.__max_init_threads, self.get_logger())
+        results = scheduler.run([(eqt_name, dependencies[eqt_name],
+                                  lambda name=eqt_name: self.__init_equipment(name, task_types[name]))
+                                 for eqt_name in init_tasks])
+
+        EquipmentManager.__init_results = []
+        errors = []
+        for eqt_name, duration, exc_info in results:
+            error_msg = None
+            if exc_info is not None:
+                errors.append((eqt_name, exc_info))
+                error_msg = str(exc_info[1])
+            self.__init_results.append((eqt_name, task_types[eqt_name], duration, error_msg))
+            LOGGER_EQT_STATS.info("Init equipment={0};type={1};duration={2:.3f};status={3}".format(
+                eqt_name, task_types[eqt_name], duration, "FAILED" if error_msg else "OK"))
+
+        if errors:
+            self.__raise_init_errors(errors)
+
+        if not [eqt_name for eqt_name in init_tasks if task_types[eqt_name] == IO_CARD_TYPE] \
+                and self.__io_card_required_by_user:
+            # Keep the error of get_io_cards
+            self.get_io_cards()
+
+        if not [eqt_name for eqt_name in init_tasks if task_types[eqt_name] == POWER_SUPPLY_TYPE] \
+                and self.__power_supply_required_by_user:
+            # Keep the error of get_power_supplies
+            self.get_power_supplies()
+
+    def __init_equipment(self, eqt_name, equipment_type):
+        """
+        Creates and initializes an equipment for :meth:`initialize`,
+        ignoring incomplete bench configurations like :meth:`__get_equipment_instances` does
+        :type eqt_name: str
+        :param eqt_name: the bench configuration name of the equipment
+        :type equipment_type: str
+        :param equipment_type: the type of the equipment
+        """
+        try:
+            self.__create_equipment(eqt_name, equipment_type)
+        except KeyError:
+            pass
+
+    def __raise_init_errors(self, errors):
+        """
+        Raise the errors of the equipment initialization, in bench configuration order
+
+        :type errors: list
+        :param errors: (bench name, exception information) of the failed equipments
+        """
+        if len(errors) == 1:
+            raise errors[0][1][0], errors[0][1][1], errors[0][1][2]
+
+        msg = "; ".join("%s: %s" % (eqt_name, exc_info[1]) for eqt_name, exc_info in errors)
+        msg = "%d equipments failed to initialize (%s)" % (len(errors), msg)
+        self.get_logger().error(msg)
+        first_error = errors[0][1][1]
+        if isinstance(first_error, AcsBaseException):
+            raise first_error.__class__(first_error.get_generic_error_message(), msg)
+        raise TestEquipmentException(TestEquipmentException.OPERATION_FAILED, msg)
+
+    @staticmethod
+    def __get_referred_names(bench_dict):
+        """
+        Gets all the values of an equipment bench configuration, to find the equipments it refers to
+
+        :type bench_dict: dict
+        :param bench_dict: the raw bench configuration of the equipment
+
+        :rtype: set
+        :return: the values of the parameters
+        """
+        referred_names = set()
+        if isinstance(bench_dict, dict):
+            for key, value in bench_dict.iteritems():
+                if key == "value" and isinstance(value, basestring):
+                    referred_names.add(value)
+                else:
+                    referred_names |= EquipmentManager.__get_referred_names(value)
+        return referred_names
+
+    def get_init_results(self):
+        """
+        Gets the initialization results of the equipments initialized by :meth:`initialize`
+
+        :rtype: list
+        :return: (bench name, type, duration in seconds, error message or None) of each equipment
+        """
+        return list(self.__init_results)
+
+
+class _EquipmentInitScheduler(object):
+    """
+    Run equipment initializations in threads, respecting their dependencies
+    """
+
+    def __init__(self, max_threads, logger):
+        """
+        Constructor
+
+        :type max_threads: int
+        :param max_threads: max number of initializations running at the same time
+
+        :type logger: logging.Logger
+        :param logger: the logger to use
+        """
+        self.__max_threads = max_threads
+        self.__logger = logger
+        self.__condition = threading.Condition()
+        self.__results = {}
+
+    def __run_task(self, name, task):
+        """
+        Run an initialization and store its result
+        """
+        start = time.time()
+        exc_info = None
+        try:
+            task()
+        except Exception:  # pylint: disable=W0703
+            exc_info = sys.exc_info()
+        duration = time.time() - start
+        with self.__condition:
+            self.__results[name] = (name, duration, exc_info)
+            self.__condition.notify()
+
+    def run(self, tasks):
+        """
+        Run the initializations, an initialization starting once all its dependencies succeeded.
+        An initialization whose dependency failed is not run and fails too.
+
+        :type tasks: list
+        :param tasks: (name, names of the dependencies, callable) of each initialization
+
+        :rtype: list
+        :return: (name, duration, exception information or None) of each initialization, in tasks order
+        """
+        pending = list(tasks)
+        running = 0
+        with self.__condition:
+            while pending or running:
+                started = False
+                for task in list(pending):
+                    name, dependencies, callable_task = task
+                    if not all(dependency in self.__results for dependency in dependencies):
+                        continue
+                    failed = [dependency for dependency in dependencies if self.__results[dependency][2] is not None]
+                    pending.remove(task)
+                    if failed:
+                        self.__results[name] = (name, 0.0, self.__get_error_info(
+                            "Not initialized as %s failed to initialize" % ", ".join(failed)))
+                        started = True
+                    elif running < self.__max_threads:
+                        self.__logger.debug("Initialize %s", name)
+                        thread = threading.Thread(target=self.__run_task, args=(name, callable_task),
+                                                  name="EquipmentInit: %s" % name)
+                        thread.daemon = True
+                        thread.start()
+                        running += 1
+                        started = True
+                    else:
+                        pending.append(task)
+                        break
+
+                if not started:
+                    if not running:
+                        # Remaining tasks depend on each other
+                        for name, _, _ in pending:
+                            self.__results[name] = (name, 0.0, self.__get_error_info(
+                                "Not initialized because of a circular dependency"))
+                        pending = []
+                        continue
+                    finished = len(self.__results)
+                    while len(self.__results) == finished:
+                        # Timeout lets the main thread handle KeyboardInterrupt
+                        self.__condition.wait(1.0)
+                    running -= len(self.__results) - finished
+
+        return [self.__results[name] for name, _, _ in tasks]
+
+    @staticmethod
+    def __get_error_info(msg):
+        """
+        Build the exception information of an initialization which could not run
+        """
+        try:
+            raise AcsConfigException(AcsConfigException.PROHIBITIVE_BEHAVIOR, msg)
+        except AcsConfigException:
+            return sys.exc_info()
 
 
 class _EquipmentConfigManager:
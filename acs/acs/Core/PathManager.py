@@ -145,6 +145,8 @@ class Paths(object):
     CONFIGS = absjoin(TEST_SUITES, Folders.CONFIGS)
 
     CACHE_PUSH_REPORTS = absjoin(Folders.ACS_CACHE, 'UncompleteReportPush')
+    CACHE_CATALOGS = absjoin(Folders.ACS_CACHE, 'Catalogs')
+    CACHE_TEST_SUITES_INDEX = absjoin(Folders.ACS_CACHE, 'TestSuitesIndex')
 
     FWK_USECASE_CATALOG = absjoin(CATALOGS, Folders.USECASE_CATALOG)
     TEST_SCRIPTS_USECASE_CATALOG = absjoin(TEST_SCRIPTS, Folders.CATALOGS, Folders.USECASE_CATALOG)
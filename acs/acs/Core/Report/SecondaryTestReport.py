@@ -19,6 +19,7 @@ SPDX-License-Identifier: Apache-2.0
 
 from lxml import etree
 import os
+import time
 
 import acs.UtilitiesFWK.Utilities as Util
 from XMLUtilities import clean_xml_text
@@ -33,6 +34,12 @@ class SecondaryTestReport(object):
     TEST_REPORT_FILENAME = "extTestResult.xml"
     verdict = Util.Verdict
 
+    # Number of results kept in memory before writing the report file
+    FLUSH_RESULTS_NB = 1
+
+    # Max delay (in sec) before writing pending results in the report file, 0 to disable
+    FLUSH_INTERVAL = 0
+
     def __init__(self, campaign_report_path):
         """
         :param campaign_report_path: Path of the campaign report
@@ -42,10 +49,23 @@ class SecondaryTestReport(object):
         self.__filename = os.path.join(self.__report_path, self.TEST_REPORT_FILENAME)
 
         if os.path.isfile(self.__filename):
-            self.__document = etree.parse(self.__filename).getroot()
+            parser = etree.XMLParser(remove_blank_text=True)
+            self.__document = etree.parse(self.__filename, parser).getroot()
+            self.__clean_node(self.__document)
         else:
             self.__document = etree.Element("Test_Report")
 
+        self.__flush_results_nb = self.FLUSH_RESULTS_NB
+        self.__flush_interval = self.FLUSH_INTERVAL
+        self.__pending_results = 0
+        self.__last_flush_time = time.time()
+
+        # Index of <Test_Result> nodes by (acs_tc_id, acs_tc_order)
+        self.__test_result_nodes = {}
+        for node in self.__document.iterchildren("Test_Result"):
+            if node.get("acs_tc_id") and node.get("acs_tc_order"):
+                self.__test_result_nodes.setdefault((node.get("acs_tc_id"), node.get("acs_tc_order")), node)
+
     def __clean_node(self, currentNode, indent="\t", newl="\n"):
         """
         Clean xml node
@@ -57,11 +77,35 @@ class SecondaryTestReport(object):
                     node.text = node.text.lstrip(flt).strip(flt)
                 self.__clean_node(node, indent, newl)
 
+    def set_flush_policy(self, results_nb=None, interval=None):
+        """
+        Configure when buffered results are written in the report file
+
+        :type results_nb: int
+        :param results_nb: number of results kept in memory before writing the report file,
+            FLUSH_RESULTS_NB of the report class if None
+
+        :type interval: float
+        :param interval: max delay (in sec) before writing pending results, 0 to disable,
+            FLUSH_INTERVAL of the report class if None
+        """
+        # The report is shared by the test cases: reset what the previous one may have set
+        self.__flush_results_nb = max(1, int(self.FLUSH_RESULTS_NB if results_nb is None else results_nb))
+        self.__flush_interval = max(0, float(self.FLUSH_INTERVAL if interval is None else interval))
+
+    def flush(self):
+        """
+        Write pending results in the report file
+        """
+        if self.__pending_results:
+            self.__write_report()
+
     def __write_report(self):
         """
         Write report ti xml file
         """
-        self.__clean_node(self.__document)
+        self.__pending_results = 0
+        self.__last_flush_time = time.time()
         content = etree.tostring(self.__document, pretty_print=True, xml_declaration=True)
         with open(self.__filename, 'w') as report_file:
             report_file.write(content)
@@ -81,10 +125,7 @@ class SecondaryTestReport(object):
         test_result_node = None
 
         if acs_tc_id and acs_tc_order:
-            xpath_query = "//Test_Result[@acs_tc_id=\"%s\" and @acs_tc_order=\"%s\"]" % (acs_tc_id, acs_tc_order)
-            nodes = self.__document.xpath(xpath_query)
-            if nodes:
-                test_result_node = nodes[0]
+            test_result_node = self.__test_result_nodes.get((str(acs_tc_id), str(acs_tc_order)))
 
         if test_result_node is None:
             test_result_node = etree.SubElement(self.__document, "Test_Result")
@@ -95,17 +136,25 @@ class SecondaryTestReport(object):
             if acs_tc_order:
                 test_result_node.set("acs_tc_order", str(acs_tc_order))
 
+            if acs_tc_id and acs_tc_order:
+                self.__test_result_nodes[(str(acs_tc_id), str(acs_tc_order))] = test_result_node
+
         test_node = etree.SubElement(test_result_node, "Test")
         return test_node
 
     def add_result(self, test_id, test_result, test_comment,
-                   acs_tc_id=None, acs_tc_order=None):
+                   acs_tc_id=None, acs_tc_order=None, test_duration=None):
         """
         Add result to the report
+
+        :type test_duration: float
+        :param test_duration: wall time of the test (in sec), not reported if None
         """
         test_node = self.__get_test_node(acs_tc_id, acs_tc_order)
         test_node.append(self.__create_node_value("Test_Id", test_id))
         test_node.append(self.__create_node_value("Test_Result", test_result))
+        if test_duration is not None:
+            test_node.append(self.__create_node_value("Test_Duration", "%.3f" % test_duration))
 
         node_test_comment = etree.SubElement(test_node, "Test_Comment")
 
@@ -118,7 +167,14 @@ class SecondaryTestReport(object):
             for element in test_comment:
                 sub_test_comment = etree.SubElement(node_test_comment, "SubComment")
                 sub_test_comment.text = clean_xml_text(element)
-        self.__write_report()
+
+        # Text is normalized once, when inserted
+        self.__clean_node(test_node)
+
+        self.__pending_results += 1
+        if (self.__pending_results >= self.__flush_results_nb or
+                (self.__flush_interval and time.time() - self.__last_flush_time >= self.__flush_interval)):
+            self.__write_report()
 
     def add_result_from_dict(self, dico, acs_tc_id=None, acs_tc_order=None):
         """
@@ -19,6 +19,7 @@ SPDX-License-Identifier: Apache-2.0
 
 from datetime import datetime
 import getpass
+import glob
 from lxml import etree
 import os
 import os.path
@@ -26,6 +27,7 @@ import platform
 import shutil
 import socket
 import tempfile
+import time
 
 from acs.Core.CampaignMetrics import CampaignMetrics
 from acs.Core.Report.ACSLogging import LOGGER_FWK
@@ -40,6 +42,12 @@ open_inheritance_hack()
 
 class Report:
 
+    # Number of journal records after which the xml report file is fully rewritten
+    JOURNAL_CHECKPOINT_RECORDS = 50
+
+    # Max delay (in sec) between two full rewrites of the xml report file
+    JOURNAL_CHECKPOINT_DELAY = 300
+
     def __init__(self,
                  campaign_report_path,
                  device_name,
@@ -65,6 +73,8 @@ class Report:
         self._metacampaign_uuid = metacampaign_uuid
 
         self.document = etree.Element("TestReport")
+        # Index of <TestCase> nodes by test case order
+        self._testcase_nodes = {}
         self.path = os.path.normpath(campaign_report_path)
         long_file = "{0}.xml".format(Files.acs_output_name)
         self.filename = os.path.join(self.path, long_file)
@@ -72,6 +82,16 @@ class Report:
         # Create the XSL file path and generate it in the same folder as the XML file
         self._base = os.path.dirname(self.filename)
         self._xsl_path = os.path.join(os.path.dirname(os.path.realpath(__file__)), "html/report.xsl")
+        self._xsl_copied = False
+
+        # Journal where updated top level nodes are appended between two report file checkpoints
+        self._journal_path = self.journal_file_path(self.filename)
+        self._journal_records = 0
+        self._last_checkpoint_time = time.time()
+
+        # Merge the journals left by crashed campaigns in the previous campaign report folders,
+        # the report folder of this campaign is a new one
+        self.recover_report_folders(os.path.dirname(self.path), self.path)
 
         # Create and Initialize <CampaignInfo> sub-node
         self._init_campaign_info_node(os.path.splitext(os.path.basename(campaign_name))[0],
@@ -111,27 +131,146 @@ class Report:
         """
         return self.filename
 
+    @staticmethod
+    def journal_file_path(report_file):
+        """
+        Return the path of the journal associated to a xml report file
+
+        :type report_file: str
+        :param report_file: path to the xml report file
+
+        :rtype: str
+        :return: path to the journal file
+        """
+        return "{0}.journal".format(report_file)
+
+    @staticmethod
+    def recover_report_file(report_file):
+        """
+        Merge the journal records of a xml report file which was not properly closed
+        (i.e. ACS crash) into the report file, then remove the journal.
+
+        :type report_file: str
+        :param report_file: path to the xml report file
+
+        :rtype: int
+        :return: number of records merged in the report file
+        """
+        journal_path = Report.journal_file_path(report_file)
+        if not os.path.isfile(journal_path):
+            return 0
+
+        tree = etree.parse(report_file, etree.XMLParser(remove_blank_text=True))
+        document = tree.getroot()
+        records = 0
+        with open(journal_path, 'r') as f_journal:
+            for line in f_journal:
+                if not line.endswith("\n"):
+                    # Last record was not completely written
+                    break
+                node = etree.fromstring(line)
+                if node.tag == "TestCase":
+                    old_nodes = document.xpath("TestCase[@id=$tc_id and @order=$tc_order]",
+                                               tc_id=node.get("id"), tc_order=node.get("order"))
+                else:
+                    old_nodes = document.findall(node.tag)
+                if old_nodes:
+                    document.replace(old_nodes[0], node)
+                else:
+                    document.append(node)
+                records += 1
+
+        # Replace the report file atomically, as update_report_file does
+        fd, temp_report_file = tempfile.mkstemp(prefix="TestReport_", suffix=".tmp",
+                                                dir=os.path.dirname(os.path.abspath(report_file)))
+        with os.fdopen(fd, 'w') as f_report:
+            tree.write(f_report, pretty_print=True, xml_declaration=True, encoding="utf-8")
+        shutil.move(temp_report_file, report_file)
+        os.remove(journal_path)
+        return records
+
+    @staticmethod
+    def recover_report_folders(reports_folder, current_report_folder=None):
+        """
+        Merge the journals of the xml report files which were not properly closed
+        in the campaign report folders of a reports folder (i.e. _Reports).
+        A report which cannot be recovered is left as is.
+
+        :type reports_folder: str
+        :param reports_folder: path to the folder of the campaign report folders
+
+        :type current_report_folder: str
+        :param current_report_folder: report folder of the running campaign, not recovered
+        """
+        for journal_path in glob.glob(os.path.join(reports_folder, "*", "*.journal")):
+            if current_report_folder is not None and \
+                    os.path.normpath(os.path.dirname(journal_path)) == os.path.normpath(current_report_folder):
+                continue
+            report_file = journal_path[:-len(".journal")]
+            try:
+                records = Report.recover_report_file(report_file)
+                LOGGER_FWK.info("Test report '%s' recovered (%d journal records merged)" % (report_file, records))
+            except Exception as recover_exception:  # pylint: disable=W0703
+                LOGGER_FWK.warning("Fail to recover test report '%s' ! (%s)" % (report_file, str(recover_exception)))
+
     def update_report_file(self):
         """
-        Update the xml report file
+        Update the xml report file.
+        This is a checkpoint: the whole document is written and the journal is reset.
         """
         try:
-
-            temp_test_report_file = os.path.join(tempfile.gettempdir(), "Temporary_TestReport.xml")
+            # Use a temporary file in the report folder, specific to the campaign,
+            # so that the report file is atomically replaced
+            fd, temp_test_report_file = tempfile.mkstemp(prefix="TestReport_", suffix=".tmp", dir=self.path)
             processing_instruction = etree.ProcessingInstruction(
                 "xml-stylesheet", "type=\"text/xsl\" href=\"report.xsl\"")
-            with open(temp_test_report_file, 'w') as f_test_report:
+            with os.fdopen(fd, 'w') as f_test_report:
                 f_test_report.write(etree.tostring(processing_instruction, pretty_print=True, xml_declaration=True))
                 f_test_report.write(etree.tostring(self.document, pretty_print=True))
+                f_test_report.flush()
+                os.fsync(f_test_report.fileno())
 
             # Copy the temporary file into the test report
             shutil.move(temp_test_report_file, self.filename)
-            # copy the XSL file in the same folder ad the XML file
-            shutil.copy(self._xsl_path, self._base)
+
+            # Report file is up to date, journal records are not needed anymore
+            if os.path.isfile(self._journal_path):
+                os.remove(self._journal_path)
+            self._journal_records = 0
+            self._last_checkpoint_time = time.time()
+
+            if not self._xsl_copied:
+                # copy the XSL file in the same folder ad the XML file
+                shutil.copy(self._xsl_path, self._base)
+                self._xsl_copied = True
 
         except Exception as report_exception:
             LOGGER_FWK.warning("Fail to update test report '%s' ! (%s)" % (str(self.filename), str(report_exception)))
 
+    def _journal_node(self, node):
+        """
+        Append an updated top level node to the report journal.
+        The xml report file is rewritten only when a checkpoint is reached.
+
+        :type node: Element
+        :param node: top level node (i.e. TestCase, Statistics) which has been updated
+        """
+        if (self._journal_records + 1 >= self.JOURNAL_CHECKPOINT_RECORDS or
+                time.time() - self._last_checkpoint_time >= self.JOURNAL_CHECKPOINT_DELAY):
+            self.update_report_file()
+            return
+
+        try:
+            # One record per line, so that an incomplete record can be detected
+            record = etree.tostring(node, with_tail=False).replace("\n", "&#10;")
+            with open(self._journal_path, 'a') as f_journal:
+                f_journal.write(record + "\n")
+            self._journal_records += 1
+        except Exception as journal_exception:
+            LOGGER_FWK.warning("Fail to update test report journal '%s' ! (%s)"
+                               % (str(self._journal_path), str(journal_exception)))
+            self.update_report_file()
+
     def build_deviceinfo_file(self, input_list):
         """
         Creates a file containing all devices info with format
@@ -584,11 +723,54 @@ class Report:
             tc_rel_path = os.path.dirname(tc.get_name())
             tc_node = self._create_testcase_node(tc_name, tc_rel_path, tc_order, tc.get_params().get_description())
             self.document.append(tc_node)
+            self._testcase_nodes[str(tc_order)] = tc_node
             tc_order += 1
 
         # Update test report file
         self.update_report_file()
 
+    def _get_testcase_node(self, tc_order, tc_name=None):
+        """
+        Retrieve a <TestCase> node from its order
+
+        :type tc_order: str
+        :param tc_order: order of the testcase
+
+        :type tc_name: str
+        :param tc_name: name of the testcase, if set the node must match this name too
+
+        :rtype: Element
+        :return: the <TestCase> node, None if not found
+        """
+        node = self._testcase_nodes.get(tc_order)
+        if node is not None and tc_name is not None and node.get("id") != tc_name:
+            node = None
+        return node
+
+    def add_equipment_init_info(self, init_results):
+        """
+        Add the initialization results of the bench equipments into test report file.
+
+        :type init_results: list
+        :param init_results: (bench name, type, duration in seconds, error message or None) of each equipment
+        """
+        if not init_results:
+            return
+
+        # Create the <EquipmentInit> element
+        equipment_init = etree.SubElement(self.bench_info, "EquipmentInit")
+        for eqt_name, eqt_type, duration, error_msg in init_results:
+            equipment = etree.SubElement(equipment_init, "Equipment")
+            equipment.set("name", clean_xml_text(eqt_name))
+            equipment.set("type", clean_xml_text(eqt_type))
+            equipment.set("duration", "%.3f" % duration)
+            equipment.set("status", "FAILED" if error_msg else "OK")
+            if error_msg:
+                equipment.text = clean_xml_text(error_msg)
+
+        # Update test report file
+        self.update_report_file()
+
     def add_comment(self, tc_order, comment):
         """
         Add a comment to a testcase into test report file.
@@ -601,11 +783,8 @@ class Report:
         :param comment: the comment to add to given testcase
         """
 
-        tc_order = str(tc_order)
-        # get all TestCase nodes and loop on them
-        node_list = self.document.xpath("//TestCase[@order='%s']" % tc_order)
-        if node_list:
-            node = node_list[0]
+        node = self._get_testcase_node(str(tc_order))
+        if node is not None:
             # wanted node is found
             # get node comment, or create one if no comment node exists
             node_comment = node.find("Comment")
@@ -625,8 +804,8 @@ class Report:
                 # previous subcomments exist, add a new one with new comment
                 etree.SubElement(node_comment, "SubComment").text = clean_xml_text(comment)
 
-        # Update test report file
-        self.update_report_file()
+            # Update test report file
+            self._journal_node(node)
 
     def add_result(self, tc_conf, tc_order, start_time, end_time, verdict, execution_nb, execution_results):
         """
@@ -660,11 +839,7 @@ class Report:
         tc_params = tc_conf.get_params()
         (max_attemt, acceptance_criteria) = tc_params.get_acceptance_criteria()
 
-        old_node = None
-
-        node_list = self.document.xpath("//TestCase[@id='%s' and @order='%s']" % (tc_name, tc_order))
-        if node_list:
-            old_node = node_list[0]
+        old_node = self._get_testcase_node(tc_order, tc_name)
 
         # Create the main <TestCase> element
         node = self._create_testcase_node(
@@ -686,9 +861,10 @@ class Report:
             self.document.replace(old_node, node)
         else:
             self.document.append(node)
+        self._testcase_nodes[tc_order] = node
 
         # Update test report file
-        self.update_report_file()
+        self._journal_node(node)
 
     def update_flash_info_node(self, flash_properties):
         """
@@ -758,7 +934,7 @@ class Report:
         self.statistics = new_statistics
 
         # Update test report file
-        self.update_report_file()
+        self._journal_node(new_statistics)
 
     def write_metacampaign_result_id(self, metacampaign_result_id):
         """
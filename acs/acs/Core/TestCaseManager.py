@@ -18,7 +18,6 @@ SPDX-License-Identifier: Apache-2.0
 """
 
 
-import fnmatch
 import os
 import inspect
 from datetime import datetime
@@ -33,6 +32,7 @@ from acs.ErrorHandling.AcsConfigException import AcsConfigException
 from acs.ErrorHandling.AcsToolException import AcsToolException
 from acs.ErrorHandling.DeviceException import DeviceException
 from acs.UtilitiesFWK.Utilities import Global, AcsConstants, DeviceState, format_exception_info, Verdict
+from acs.UtilitiesFWK.LogScanner import LogScanner
 import acs.UtilitiesFWK.Utilities as Util
 
 
@@ -49,6 +49,9 @@ class TestCaseManager(object):
     Class implementing the TC manager
     """
 
+    # Line logged in ACS log file on unexpected reboot, reported in the debug report
+    UNEXPECTED_REBOOT_LOG = "***** UNEXPECTED DEVICE REBOOT! *****"
+
     def __init__(self, test_report, live_reporting_interface=None):
         self._dut_model_name = "Empty"
         self._tc_verdict = "Empty"
@@ -69,6 +72,7 @@ class TestCaseManager(object):
         # Flag set to True when a CTRL+C (Keyboard Interruption is detected)
         self._user_interruption_request = False
         self.__debug_report = None
+        self.__log_scanner = None
         self.max_attempt = 1
         self.acceptance_nb = 0
         self.execution_nb = 0
@@ -346,33 +350,19 @@ class TestCaseManager(object):
 
         return verdict, self._error.Msg
 
-    def __get_log_files(self, pattern='*.log'):
-        """
-
-        :return:
-        :rtype:
-        """
-        fileslist = []
-        for root, dirnames, filenames in os.walk(self._dut_instance.get_report_tree().get_report_path()):
-            for filename in fnmatch.filter(filenames, pattern):
-                fileslist.append(os.path.join(root, filename))
-        return fileslist
-
-    def __parse_log_file(self, filename):
+    def __get_log_scanner(self):
         """
+        Get the scanner of the log files of the campaign report,
+        it only reads the data logged since its previous scan
 
-        :param filename:
-        :type filename:
-        :return:
-        :rtype:
+        :return: the log scanner
+        :rtype: LogScanner
         """
-
-        metrics_logs = []
-        with open(filename, 'r') as logs:
-            for line in logs.readlines():
-                if "***** UNEXPECTED DEVICE REBOOT! *****" in line:
-                    metrics_logs.append(line)
-        return metrics_logs
+        report_path = self._dut_instance.get_report_tree().get_report_path()
+        if self.__log_scanner is None or self.__log_scanner.root_path != report_path:
+            self.__log_scanner = LogScanner(report_path, '*.log')
+            self.__log_scanner.subscribe(self.UNEXPECTED_REBOOT_LOG)
+        return self.__log_scanner
 
     def __get_metrics_logs(self):
         """
@@ -381,9 +371,11 @@ class TestCaseManager(object):
         :rtype:
         """
         metrics_logs = []
-        filenames = self.__get_log_files()
+        log_scanner = self.__get_log_scanner()
+        filenames = log_scanner.get_log_files()
         if len(filenames) == 1:
-            metrics_logs = self.__parse_log_file(filenames[0])
+            log_scanner.scan(filenames)
+            metrics_logs = log_scanner.get_matches(self.UNEXPECTED_REBOOT_LOG, filenames[0])
         else:
             # fallback => degraded mode
             # We got the info from Metrics
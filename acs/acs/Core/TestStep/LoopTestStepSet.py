@@ -65,5 +65,8 @@ class LoopTestStepSet(TestStepSet):
 
         # Loop on Test Steps
         for iteration in xrange(nb_iteration):
+            if self.is_canceled():
+                self._logger.info("--- Loop '%s' canceled ---", loop_id)
+                break
             self._logger.info("--- Loop '%s' - Iteration %d ---", loop_id, (iteration + 1))
             TestStepSet.run(self, context)
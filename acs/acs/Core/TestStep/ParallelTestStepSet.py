@@ -17,11 +17,42 @@ and limitations under the License.
 SPDX-License-Identifier: Apache-2.0
 """
 
+import atexit
 import time
-from Queue import Queue
+import weakref
+from Queue import Queue, Empty
 
-from acs.Core.TestStep.ThreadStepRunner import ThreadStepRunner
+from acs.Core.TestStep.ThreadStepRunner import ThreadStepPool
 from acs.Core.TestStep.TestStepSet import TestStepSet
+from acs.ErrorHandling.AcsConfigException import AcsConfigException
+from acs.UtilitiesFWK.Patterns import Cancel
+from acs.UtilitiesFWK.Utilities import str_to_bool_ex
+
+# Thread pools of the forks, indexed by weak reference on the fork
+_POOLS = {}
+
+
+# Max time (in sec) to wait for the idle threads of the pools at exit
+_SHUTDOWN_TIMEOUT = 1.0
+
+
+def _shutdown_pool(fork_ref):
+    """
+    Shut down the thread pool of a deleted fork
+    """
+    pool = _POOLS.pop(fork_ref, None)
+    if pool is not None:
+        pool.shutdown()
+
+
+@atexit.register
+def _shutdown_pools():
+    """
+    Let the idle threads of the remaining forks exit before the interpreter shutdown
+    """
+    end_time = time.time() + _SHUTDOWN_TIMEOUT
+    while _POOLS:
+        _POOLS.popitem()[1].shutdown(max(0, end_time - time.time()))
 
 
 class ParallelTestStepSet(TestStepSet):
@@ -66,14 +97,28 @@ class ParallelTestStepSet(TestStepSet):
     **<Fork/>** in the main thread, hence serializing them. In fact, what TestStepEngine does
     under the hood is to create a TestStepSet instead of a ParallelTestStepSet.
 
+    The attribute MAX_WORKERS is optional and limits the number of steps running at the same time.
+    By default all the steps of the fork run at the same time.
+
+    The attribute FAIL_FAST is optional and by default is False. If set to True, the first exception
+    raised by a test step is raised by the fork without waiting for the other steps: the steps not started
+    yet are skipped and the running ones are notified through their shared
+    :py:class:`~acs.UtilitiesFWK.Patterns.Cancel` (see TestStepBase.is_canceled()).
+
+    The wall time of each step is reported in the test step report.
+
     As for a normal test step set, all the attribute declared for the **<Fork/>** tag are passed
     down to the test steps.
 
     .. warning::
-        ParallelTestStepSet uses a thread per each inner test step so potentially threading problems might be introduced
-        For this reason use it carefully.
+        ParallelTestStepSet uses a thread per each running inner test step so potentially threading problems might
+        be introduced. For this reason use it carefully.
+        Threads are kept between runs of the fork (i.e. in a loop) and stopped when the fork is deleted.
     """
 
+    # Delay (in sec) between checks of the parent fork cancel while waiting for the steps
+    CANCEL_POLL_DELAY = 1.0
+
     def __init__(self, tc_conf, global_conf, ts_conf, factory):
         """
         Constructor
@@ -81,8 +126,9 @@ class ParallelTestStepSet(TestStepSet):
 
         TestStepSet.__init__(self, tc_conf, global_conf, ts_conf, factory)
 
-        self._queue = Queue()
-        self._execution_queue = Queue()
+        self._pool = ThreadStepPool()
+        # Stop the threads of the pool once the fork is deleted
+        _POOLS[weakref.ref(self, _shutdown_pool)] = self._pool
 
     def run(self, context):
         """
@@ -95,49 +141,82 @@ class ParallelTestStepSet(TestStepSet):
         # log in acs logs
         self._logger.info("Running %d steps in parallel ...", len(self._test_steps))
 
-        self._create_test_steps_threads(context)
+        self._pool.max_workers = self._get_max_workers()
+        fail_fast = bool(str_to_bool_ex(self._pars.fail_fast))
+        cancel = Cancel()
+        execution_queue = Queue()
 
-        self._pump_test_steps_into_queue()
+        self._pump_test_steps_into_pool(context, cancel, fail_fast, execution_queue)
 
         # Waiting until all threads have finished processing their step
-        self._queue.join()
-
-        # Get content of the execution queue (exception, test step verdicts)
-        while not self._execution_queue.empty():
-            # There is at least one exception in the queue
-            # Get the first and raise it
-            queue_content = self._execution_queue.get()
-            if isinstance(queue_content, tuple):
-                # In this case the queue will contain a tuple (test_step_name, test_step_verdict)
-                if isinstance(self.ts_verdict_msg, list):  # pylint: disable=E0203
-                    self.ts_verdict_msg.append(queue_content)  # pylint: disable=E0203
+        # Each item of the execution queue is (test_step_name, test_step_verdict or exception, wall time)
+        results = []
+        while len(results) < len(self._test_steps):
+            try:
+                if self._cancel is None:
+                    result = execution_queue.get()
                 else:
-                    self.ts_verdict_msg = [queue_content]  # pylint: disable=W0201
+                    result = execution_queue.get(timeout=self.CANCEL_POLL_DELAY)
+            except Empty:
+                if self.is_canceled():
+                    # The parent fork is canceled, forward it to the steps
+                    cancel.cancel()
+                    return
+                continue
+
+            results.append(result)
+            if fail_fast and isinstance(result[1], Exception):
+                self._logger.info("%s failed, the other steps of the fork are canceled", result[0])
+                break
 
+        # Get content of the execution queue (exception, test step verdicts)
+        for ts_name, ts_verdict_msg, wall_time in results:
+            if isinstance(ts_verdict_msg, Exception):
+                # There is at least one exception in the queue
+                # Get the first and raise it
+                cancel.cancel()
+                raise ts_verdict_msg
+
+            self._logger.debug("%s executed in %.2f secs", ts_name, wall_time)
+            # In this case the queue will contain a tuple (test_step_name, test_step_verdict, wall time)
+            if isinstance(self.ts_verdict_msg, list):  # pylint: disable=E0203
+                self.ts_verdict_msg.append((ts_name, ts_verdict_msg, wall_time))  # pylint: disable=E0203
             else:
-                raise queue_content
+                self.ts_verdict_msg = [(ts_name, ts_verdict_msg, wall_time)]  # pylint: disable=W0201
 
-    def _create_test_steps_threads(self, context):
+    def _get_max_workers(self):
         """
-        Create one thread per test step in the steps collection
-        Each thread will process one item from the queue
-        """
-        for _ in self._test_steps:
-            thread = ThreadStepRunner(self._queue, self._execution_queue, context)
-            thread.setDaemon(True)
-            thread.start()
+        Get the max number of steps running at the same time from MAX_WORKERS parameter
 
-    def _pump_test_steps_into_queue(self):
+        :rtype: int
+        :return: the max number of threads, None if not limited
+        """
+        if not self._pars.max_workers:
+            return None
+
+        try:
+            max_workers = int(self._pars.max_workers)
+        except ValueError:
+            max_workers = 0
+        if max_workers <= 0:
+            error_msg = ("Fork expects a positive integer value as "
+                         "max number of workers (Given value: {0})").format(self._pars.max_workers)
+            raise AcsConfigException(AcsConfigException.INVALID_PARAMETER, error_msg)
+        return max_workers
+
+    def _pump_test_steps_into_pool(self, context, cancel, fail_fast, execution_queue):
         """
-        Pumps the test steps into the queue; An equal number of threads are waiting to get a test step from the queue.
+        Pumps the test steps into the pool; Threads of the pool are waiting to get a test step from the queue.
         As soon as an item gets pumped into the queue, a waiting thread will get it and run it.
         If a delay was specified, the method waits for that delay before pumping the next test step into the queue
         """
-        count = 0
-        for step in self._test_steps:
-            self._queue.put(step)
+        for count, step in enumerate(self._test_steps):
+            if cancel.is_canceled:
+                # A step failed in fail fast mode, do not wait before the next steps
+                break
+            step.cancel = cancel
+            self._pool.submit(step, context, cancel, fail_fast, execution_queue)
             self._delay_if_needed(count)
-            count += 1
 
     def _delay_if_needed(self, count):
         """
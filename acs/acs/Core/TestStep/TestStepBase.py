@@ -109,6 +109,9 @@ class TestStepBase(object):
         self._context = None
         self._run_by_engine = False
 
+        # Set by the parent ParallelTestStepSet, canceled when the remaining steps of the fork must stop
+        self._cancel = None
+
     @property
     def ts_verdict_msg(self):
         """
@@ -145,6 +148,33 @@ class TestStepBase(object):
         """
         self._name = ts_name
 
+    @property
+    def cancel(self):
+        """
+        Cancel object shared with the parent fork
+
+        :rtype: :py:class:`~acs.UtilitiesFWK.Patterns.Cancel`
+        :return: the cancel object, None if the step is not run by a fork
+        """
+        return self._cancel
+
+    @cancel.setter
+    def cancel(self, cancel):
+        """
+        :type cancel: :py:class:`~acs.UtilitiesFWK.Patterns.Cancel`
+        :param cancel: cancel object shared with the parent fork
+        """
+        self._cancel = cancel
+
+    def is_canceled(self):
+        """
+        Check if the parent fork requested to stop the step
+
+        :rtype: bool
+        :return: True if the step shall stop as soon as possible
+        """
+        return self._cancel is not None and self._cancel.is_canceled
+
     def _safe_replace_static_pars(self):
         """
         Calls _pars.replace_static_pars catching exceptions if any (to avoid raising it from the constructor)
@@ -25,6 +25,8 @@ class TestStepConstants(object):
     """
 
     STR_PAR_TSE_ENTRY = "TEST_STEP_ENGINE_ENTRY"
+    STR_PAR_TS_REPORT_FLUSH_NB = "TEST_STEP_REPORT_FLUSH_NB"
+    STR_PAR_TS_REPORT_FLUSH_INTERVAL = "TEST_STEP_REPORT_FLUSH_INTERVAL"
     STR_TS_ID = "Id"
     STR_SET_ID = "SetId"
     STR_FORK_ID = "Id"
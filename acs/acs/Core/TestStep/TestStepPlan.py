@@ -0,0 +1,275 @@
+"""
+Copyright (C) 2018 Intel Corporation
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions
+and limitations under the License.
+
+
+SPDX-License-Identifier: Apache-2.0
+"""
+
+import copy
+import os
+
+from acs.Core.Report.ACSLogging import LOGGER_FWK_STATS
+from acs.ErrorHandling.AcsConfigException import AcsConfigException
+
+
+class TestStepPlanNode(object):
+
+    """
+    Compiled test step of a test case file: the class to instantiate, its parameters,
+    its name and its children when it is a test step set.
+
+    Nodes are shared by all the runs of the test case,
+    a new test step instance is created from the node for each run.
+    """
+
+    __slots__ = ("step_class", "pars", "name", "children", "teststep_id")
+
+    def __init__(self, step_class, pars, name, children=None, teststep_id=None):
+        """
+        Constructor
+
+        :type step_class: type
+        :param step_class: class of the test step (or test step set)
+
+        :type pars: dict
+        :param pars: the test step's parameters, None if the step does not take parameters
+
+        :type name: str
+        :param name: the test step name
+
+        :type children: list
+        :param children: the nodes of the test step set, None for a test step
+
+        :type teststep_id: str
+        :param teststep_id: Id of the test step in the test step catalogs, None for a test step set
+        """
+        self.step_class = step_class
+        self.pars = dict(pars) if pars is not None else None
+        self.name = name
+        self.children = tuple(children) if children is not None else None
+        self.teststep_id = teststep_id
+
+    def create(self, tc_conf, global_conf, factory):
+        """
+        Create the test step instance described by the node
+
+        :type tc_conf: :py:class:`~acs.Core.TCParameters`
+        :param tc_conf: test case parameters
+
+        :type global_conf: object
+        :param global_conf: global configuration data
+
+        :type factory: object
+        :param factory: it's responsible for creating ACS objects needed by the test step
+
+        :rtype: :py:class:`~acs.Core.TestStep.TestStepBase`
+        :return: the new instance of the test step.
+        """
+        # Test steps update their parameters, give them their own copy
+        pars = dict(self.pars) if self.pars is not None else None
+
+        if self.children is None:
+            try:
+                LOGGER_FWK_STATS.info("Create test_step={0}".format(self.teststep_id))
+                teststep_instance = self.step_class(tc_conf, global_conf, pars, factory)
+            except Exception as generic_exception:
+                exception_msg = "Unable to instantiate '{0}' test step.".format(self.teststep_id)
+                exception_msg += " Following error occurred : {0}".format(generic_exception)
+                raise AcsConfigException(AcsConfigException.INSTANTIATION_ERROR, exception_msg)
+            teststep_instance.name = self.name
+            teststep_instance.call_by_engine()
+        else:
+            teststep_instance = self.step_class(tc_conf, global_conf, pars, factory)
+            teststep_instance.name = self.name
+            teststep_instance.add_steps([child.create(tc_conf, global_conf, factory) for child in self.children])
+
+        return teststep_instance
+
+
+class TestStepPlan(object):
+
+    """
+    Compiled test case file: the parsed XML tree (with its included files inlined)
+    and the test steps of its sections (Setup, RunTest ...), compiled at their first use.
+
+    The plan is built once per test case file and reused by the following runs of the test case
+    (b2b iterations, retries, other test cases using the same file) until one of its files is modified.
+    """
+
+    # Plans of the test case files, {test case file: plan}
+    __plans = {}
+
+    def __init__(self, testcase_file, xml_etree, included_files, included_teststeps, build_time):
+        """
+        Constructor
+
+        :type testcase_file: str
+        :param testcase_file: path of the test case file
+
+        :type xml_etree: etree.ElementTree
+        :param xml_etree: parsed test case file, included nodes added
+
+        :type included_files: list
+        :param included_files: paths of the files included by the test case file
+
+        :type included_teststeps: dict
+        :param included_teststeps: test steps declared by the included files
+
+        :type build_time: float
+        :param build_time: time spent (in sec) to parse the files
+        """
+        self.testcase_file = testcase_file
+        self.xml_etree = xml_etree
+        self.included_files = tuple(included_files)
+        self.signature = self.get_signature((testcase_file,) + self.included_files)
+        # Time spent (in sec) to parse the files and compile the sections of the plan
+        self.build_time = build_time
+
+        self.__included_teststeps = copy.deepcopy(included_teststeps)
+        self.__sections = {}
+        # Class names of the test steps used by the plan, {test step Id: class name}
+        self.__class_names = {}
+
+    @classmethod
+    def get_plan(cls, testcase_file):
+        """
+        Get the plan of a test case file
+
+        :type testcase_file: str
+        :param testcase_file: path of the test case file
+
+        :rtype: :py:class:`~acs.Core.TestStep.TestStepPlan`
+        :return: the plan of the test case file, None if not built yet or if one of its files has changed
+        """
+        plan = cls.__plans.get(testcase_file)
+        if plan is not None and plan.signature != cls.get_signature((testcase_file,) + plan.included_files):
+            plan = None
+        return plan
+
+    @classmethod
+    def add_plan(cls, plan):
+        """
+        Store the plan of a test case file, replacing the previous one
+
+        :type plan: :py:class:`~acs.Core.TestStep.TestStepPlan`
+        :param plan: the plan to store
+        """
+        cls.__plans[plan.testcase_file] = plan
+
+    @staticmethod
+    def get_signature(file_names):
+        """
+        Compute the signature of files, made of their paths, modification times and sizes
+
+        :type file_names: tuple
+        :param file_names: paths of the files
+
+        :rtype: tuple
+        :return: signature changing as soon as one of the files is modified
+        """
+        signature = []
+        for file_name in file_names:
+            try:
+                file_stat = os.stat(file_name)
+                signature.append((file_name, file_stat.st_mtime, file_stat.st_size))
+            except OSError:
+                signature.append((file_name, None, None))
+        return tuple(signature)
+
+    @property
+    def included_teststeps(self):
+        """
+        Test steps declared by the included files
+
+        :rtype: dict
+        :return: a copy of the test steps, that the caller can update
+        """
+        return copy.deepcopy(self.__included_teststeps)
+
+    def match_catalog(self, teststep_dictionary):
+        """
+        Check that the test steps used by the plan still have the same class in the test step catalogs
+
+        :type teststep_dictionary: dict
+        :param teststep_dictionary: test steps read from the test step catalogs and the included files
+
+        :rtype: bool
+        :return: True if the plan can be reused
+        """
+        for teststep_id, class_name in self.__class_names.iteritems():
+            if teststep_dictionary.get(teststep_id, {}).get("ClassName") != class_name:
+                return False
+        return True
+
+    def add_class_name(self, teststep_id, class_name):
+        """
+        Register the class name of a test step used by the plan
+
+        :type teststep_id: str
+        :param teststep_id: Id of the test step in the test step catalogs
+
+        :type class_name: str
+        :param class_name: class name of the test step
+        """
+        self.__class_names[teststep_id] = class_name
+
+    def get_section(self, path):
+        """
+        Get the compiled nodes of a section
+
+        :type path: str
+        :param path: the XML Path identifying the section
+
+        :rtype: tuple
+        :return: the nodes of the section, None if the section is not compiled yet
+        """
+        return self.__sections.get(path)
+
+    def set_section(self, path, nodes, build_time):
+        """
+        Store the compiled nodes of a section
+
+        :type path: str
+        :param path: the XML Path identifying the section
+
+        :type nodes: list
+        :param nodes: the nodes of the section
+
+        :type build_time: float
+        :param build_time: time spent (in sec) to compile the section
+        """
+        self.__sections[path] = tuple(nodes)
+        self.build_time += build_time
+
+    def create_test_steps(self, path, tc_conf, global_conf, factory):
+        """
+        Create the test step instances of a compiled section
+
+        :type path: str
+        :param path: the XML Path identifying the section
+
+        :type tc_conf: :py:class:`~acs.Core.TCParameters`
+        :param tc_conf: test case parameters
+
+        :type global_conf: object
+        :param global_conf: global configuration data
+
+        :type factory: object
+        :param factory: it's responsible for creating ACS objects needed by the test step
+
+        :rtype: list
+        :return: list of test steps
+        """
+        return [node.create(tc_conf, global_conf, factory) for node in self.__sections[path]]
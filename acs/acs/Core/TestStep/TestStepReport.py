@@ -26,3 +26,7 @@ class TestStepReport(SecondaryTestReport):
     This class implements reporting for Test Step results
     """
     TEST_REPORT_FILENAME = "teststepTestResult.xml"
+
+    # Test step results are numerous (i.e. loops), write them by batch
+    FLUSH_RESULTS_NB = 100
+    FLUSH_INTERVAL = 30
@@ -76,6 +76,10 @@ class TestStepSet(TestStepBase):
         """
 
         for test_step in self._test_steps:
+            # Stop running the set if the parent fork has been canceled
+            if self.is_canceled():
+                break
+            test_step.cancel = self._cancel
             test_step.run(context)
             if isinstance(self.ts_verdict_msg, list):  # pylint: disable=E0203
                 self.ts_verdict_msg.append((test_step.name, test_step.ts_verdict_msg))  # pylint: disable=E0203
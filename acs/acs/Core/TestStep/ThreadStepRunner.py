@@ -18,40 +18,132 @@ SPDX-License-Identifier: Apache-2.0
 """
 
 import threading
+import time
+from Queue import Queue
 
 
 class ThreadStepRunner(threading.Thread):
 
     """
-    Implements thread which runs a test step
+    Implements thread which runs the test steps submitted to a ThreadStepPool
     """
 
-    def __init__(self, queue, execution_queue, context):
+    def __init__(self, pool):
         """
         Constructor
         """
 
         threading.Thread.__init__(self)
 
-        self._queue = queue
-        self._execution_queue = execution_queue
-        self._context = context
+        self._pool = pool
 
     def run(self):
         """
-        Runs the test step into a thread.
+        Runs the test steps into a thread, until the pool is shut down.
         """
 
         threading.Thread.run(self)
 
-        # Grab test step from the queue
-        test_step = self._queue.get()
-
-        try:
-            test_step.run(self._context)
-            self._execution_queue.put((test_step.name, test_step.ts_verdict_msg))
-        except Exception as ex:
-            self._execution_queue.put(ex)
-        finally:
-            # signals to queue job is done
-            self._queue.task_done()
+        while True:
+            # Grab test step from the queue
+            job = self._pool.get_job()
+            if job is None:
+                break
+
+            test_step, context, cancel, fail_fast, execution_queue = job
+            # Do not keep references on the job while waiting for the next one
+            del job
+
+            # Pending steps are not started once the fork is canceled
+            if not cancel.is_canceled:
+                start_time = time.time()
+                try:
+                    test_step.run(context)
+                    execution_queue.put((test_step.name, test_step.ts_verdict_msg, time.time() - start_time))
+                except Exception as ex:
+                    if fail_fast:
+                        cancel.cancel()
+                    execution_queue.put((test_step.name, ex, time.time() - start_time))
+
+            del test_step, context, cancel, execution_queue
+            # signals pool job is done
+            self._pool.job_done()
+
+
+class ThreadStepPool(object):
+
+    """
+    Implements a pool of threads running test steps, bounded by max_workers.
+    Threads are kept between runs and stopped by shutdown().
+    """
+
+    def __init__(self, max_workers=None):
+        """
+        Constructor
+
+        :type max_workers: int
+        :param max_workers: max number of threads, None for one thread per running step
+        """
+
+        self.max_workers = max_workers
+
+        self._queue = Queue()
+        self._lock = threading.Lock()
+        self._workers = []
+        # Number of threads waiting for a job minus number of jobs waiting for a thread
+        self._idle = 0
+
+    def submit(self, test_step, context, cancel, fail_fast, execution_queue):
+        """
+        Submit a test step to the pool, its result (name, verdict message or exception, wall time)
+        is put in execution_queue once the step has run
+
+        :type cancel: :py:class:`~acs.UtilitiesFWK.Patterns.Cancel`
+        :param cancel: step is skipped if canceled before it starts
+
+        :type fail_fast: bool
+        :param fail_fast: cancel on test step exception
+        """
+        with self._lock:
+            self._queue.put((test_step, context, cancel, fail_fast, execution_queue))
+            self._idle -= 1
+            if self._idle < 0 and (self.max_workers is None or len(self._workers) < self.max_workers):
+                thread = ThreadStepRunner(self)
+                thread.setDaemon(True)
+                thread.start()
+                self._workers.append(thread)
+                self._idle += 1
+
+    def get_job(self):
+        """
+        Wait for the next job, None if the pool is shut down
+        """
+        return self._queue.get()
+
+    def job_done(self):
+        """
+        Signals a thread is available
+        """
+        with self._lock:
+            self._idle += 1
+
+    def shutdown(self, timeout=0):
+        """
+        Stop the threads once they are done with their current job
+
+        :type timeout: float
+        :param timeout: max time (in sec) to wait for the threads to stop
+        """
+        with self._lock:
+            workers = self._workers
+            for _ in workers:
+                self._queue.put(None)
+            self._workers = []
+            self._idle = 0
+
+        end_time = time.time() + timeout
+        for thread in workers:
+            remaining = end_time - time.time()
+            if remaining <= 0:
+                break
+            thread.join(remaining)
@@ -23,6 +23,100 @@ import threading
 import time
 
 
+class TriggerMatcher(object):
+
+    """ Match lines against a set of trigger messages.
+        A message is either a literal string or a regular expression prefixed by "regex:".
+
+        All messages are compiled once, in a combined pattern used to skip
+        lines which cannot match any message.
+    """
+
+    REGEX_PREFIX = "regex:"
+
+    def __init__(self, messages, logger=None):
+        """
+        :type  messages: list
+        :param messages: trigger messages
+
+        :type  logger: logger object
+        :param logger: logger used to report invalid regular expressions
+        """
+        # Literal messages
+        self.__literals = []
+        # Regular expressions which are part of the combined pattern
+        self.__combined_regexes = []
+        # Regular expressions which must be checked on each line (i.e. with groups or flags)
+        self.__regexes = []
+
+        prefilter_parts = []
+        for message in messages:
+            if message.startswith(self.REGEX_PREFIX):
+                reg_ex = message.split(self.REGEX_PREFIX)[1]
+                try:
+                    compiled_reg_ex = re.compile(reg_ex)
+                except re.error as ex:
+                    if logger is not None:
+                        logger.error("Cannot compute regular expression \"%s\": %s" % (reg_ex, ex))
+                    continue
+
+                if compiled_reg_ex.groups == 0 and "(?" not in reg_ex:
+                    self.__combined_regexes.append((message, compiled_reg_ex))
+                    prefilter_parts.append("(?:%s)" % reg_ex)
+                else:
+                    self.__regexes.append((message, compiled_reg_ex))
+            else:
+                self.__literals.append(message)
+                prefilter_parts.append(re.escape(message))
+
+        self.__prefilter = None
+        if prefilter_parts:
+            try:
+                self.__prefilter = re.compile("|".join(prefilter_parts))
+            except (re.error, OverflowError, AssertionError):
+                # Combined pattern is too big, check every message on each line
+                self.__prefilter = None
+
+        # A batch of lines can be checked at once if no message can match over several lines
+        self.__batch_prefilter = (self.__prefilter is not None and not self.__combined_regexes
+                                  and not self.__regexes and not any("\n" in message for message in self.__literals))
+
+    def match(self, lines):
+        """ Check lines against all trigger messages
+
+        :type  lines: list
+        :param lines: lines to check
+
+        :rtype: list
+        :return: list of (message, line) for each message found in a line
+        """
+        hits = []
+        if not self.__literals and not self.__combined_regexes and not self.__regexes:
+            return hits
+
+        if self.__batch_prefilter and self.__prefilter.search("".join(lines)) is None:
+            return hits
+
+        for line in lines:
+            if not line:
+                continue
+            line = line.rstrip('\r\n')
+
+            if self.__prefilter is None or self.__prefilter.search(line) is not None:
+                for message in self.__literals:
+                    if line.find(message) != -1:
+                        hits.append((message, line))
+                for message, compiled_reg_ex in self.__combined_regexes:
+                    if compiled_reg_ex.search(line) is not None:
+                        hits.append((message, line))
+
+            for message, compiled_reg_ex in self.__regexes:
+                if compiled_reg_ex.search(line) is not None:
+                    hits.append((message, line))
+
+        return hits
+
+
 class LogCatAnalyzerThread():
 
     """ Logger analyzer that will check input messages to check if
@@ -39,6 +133,12 @@ class LogCatAnalyzerThread():
         # Lock object
         self.__lock_message_triggered = threading.RLock()
 
+        # Condition notified when a triggered message is received
+        self.__message_received = threading.Condition(self.__lock_message_triggered)
+
+        # Compiled trigger messages, rebuilt when trigger messages change
+        self.__matcher = TriggerMatcher([])
+
         # Internal buffer
         self.__queue = Queue()
 
@@ -73,42 +173,40 @@ class LogCatAnalyzerThread():
         self.__analyzer_thread.start()
 
     def push(self, line):
-        self.__queue.put_nowait(line)
+        self.__queue.put_nowait([line])
+
+    def push_lines(self, lines):
+        self.__queue.put_nowait(lines)
 
     def __run(self):
         while not self._stop_event.is_set():
-            while not self.__queue.empty():
-                try:
-                    line = self.__queue.get_nowait()
-                    self.__analyze_line(line)
-                except Empty:
-                    pass
-            self._stop_event.wait(self.analyzer_loop_delay)
-
-    def __analyze_line(self, line):
-        if line:
-            line = line.rstrip('\r\n')
-            # Check all messages to be triggered
-            self.__lock_message_triggered.acquire()
-            for trig_message in self.__messages_to_trigger:
-                if trig_message.startswith("regex:"):
-                    reg_ex = trig_message.split("regex:")[1]
-                    try:
-                        if re.search(reg_ex, line) is not None:
-                            # Message received, store log line
-                            self.__messages_to_trigger[trig_message].append(line)
-                    except re.error as ex:
-                        if self._logger is not None:
-                            self._logger.error("Cannot compute regular expression \"%s\": %s" % (reg_ex, ex))
-                elif line.find(trig_message) != -1:
-                    # Message received, store log line
-                    self.__messages_to_trigger[trig_message].append(line)
-
-            self.__lock_message_triggered.release()
+            try:
+                lines = self.__queue.get(True, self.analyzer_loop_delay)
+            except Empty:
+                continue
+            self.__analyze_lines(lines)
+
+    def __analyze_lines(self, lines):
+        # Lines are matched without holding the lock, against the current compiled messages
+        hits = self.__matcher.match(lines)
+        if hits:
+            with self.__message_received:
+                for trig_message, line in hits:
+                    if trig_message in self.__messages_to_trigger:
+                        # Message received, store log line
+                        self.__messages_to_trigger[trig_message].append(line)
+                self.__message_received.notify_all()
+
+    def __update_matcher(self):
+        """ Compile trigger messages, must be called with the lock held
+        """
+        self.__matcher = TriggerMatcher(self.__messages_to_trigger.keys(), self._logger)
 
     def add_trigger_messages(self, messages):
-        for message in messages:
-            self.add_trigger_message(message)
+        with self.__lock_message_triggered:
+            for message in messages:
+                self.__messages_to_trigger[message] = list()
+            self.__update_matcher()
 
     def add_trigger_message(self, message):
         """ Trigger a message
@@ -116,9 +214,7 @@ class LogCatAnalyzerThread():
         :type  message: string
         :param message: message to be triggered
         """
-        self.__lock_message_triggered.acquire()
-        self.__messages_to_trigger[message] = list()
-        self.__lock_message_triggered.release()
+        self.add_trigger_messages([message])
 
     def remove_trigger_message(self, message):
         """ Remove a triggered message
@@ -129,6 +225,7 @@ class LogCatAnalyzerThread():
         if message in self.__messages_to_trigger:
             self.__lock_message_triggered.acquire()
             del self.__messages_to_trigger[message]
+            self.__update_matcher()
             self.__lock_message_triggered.release()
 
     def is_message_received(self, message, timeout):
@@ -151,14 +248,17 @@ class LogCatAnalyzerThread():
         begin_time = time.time()
         end_time = begin_time + float(timeout)
 
-        while (not messages_received) and (time.time() < end_time):
+        with self.__message_received:
             messages_received = self.get_message_triggered_status(message)
-            time.sleep(0.2)
-
-        if messages_received:
-            # Clone the list to return as remove trigger message
-            # is going to delete it
-            messages_received = list(messages_received)
+            while not messages_received and time.time() < end_time:
+                # Wait until the analyzer notifies a new received message
+                self.__message_received.wait(end_time - time.time())
+                messages_received = self.get_message_triggered_status(message)
+
+            if messages_received:
+                # Clone the list to return as remove trigger message
+                # is going to delete it
+                messages_received = list(messages_received)
 
         if remove_trigger_message:
             self.remove_trigger_message(message)
@@ -50,18 +50,26 @@ class LogCatLogger(ILogger):
 
         enable_watchdog = device_handle.get_config("enableWatchdog", True, "str_to_bool")
 
+        # Max delay (in sec) and max amount of data (in bytes) to keep before flushing logcat files
+        flush_interval = device_handle.get_config("logcatFlushInterval", 1.0, float)
+        flush_size = device_handle.get_config("logcatFlushSize", 65536, int)
+
         self.__acs_log_reader_thread = LogCatReaderThread(device_handle=device_handle,
                                                           logger=self._logger,
                                                           enable_writer=device_handle.get_config(
                                                               "writeAcsLogcat", "False", "str_to_bool"),
                                                           logcat_cmd_line=acs_logcat_cmd_line,
-                                                          enable_acs_watchdog=enable_watchdog)
+                                                          enable_acs_watchdog=enable_watchdog,
+                                                          writer_flush_interval=flush_interval,
+                                                          writer_flush_size=flush_size)
 
         self.__std_log_reader_thread = LogCatReaderThread(device_handle=device_handle,
                                                           logger=None,
                                                           enable_writer=write_logcat_file,
                                                           logcat_cmd_line=logcat_cmd_line,
-                                                          enable_acs_watchdog=enable_watchdog)
+                                                          enable_acs_watchdog=enable_watchdog,
+                                                          writer_flush_interval=flush_interval,
+                                                          writer_flush_size=flush_size)
 
         self.__device_handle = device_handle
 
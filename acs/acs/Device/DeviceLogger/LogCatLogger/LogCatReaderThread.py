@@ -17,6 +17,7 @@ and limitations under the License.
 SPDX-License-Identifier: Apache-2.0
 """
 
+from Queue import Empty
 import threading
 import time
 
@@ -30,7 +31,14 @@ class LogCatReaderThread():
     """ Logger based on logcat utility
     """
 
-    def __init__(self, device_handle, logger, logcat_cmd_line, enable_writer=True, enable_acs_watchdog=True):
+    # Max delay (in sec) to wait for logcat data, so that stop and reset requests are handled
+    READ_TIMEOUT = 0.5
+
+    # Max number of logcat chunks read from adb output and handed to consumers at once
+    MAX_CHUNKS_PER_BATCH = 1000
+
+    def __init__(self, device_handle, logger, logcat_cmd_line, enable_writer=True, enable_acs_watchdog=True,
+                 writer_flush_interval=None, writer_flush_size=None):
 
         # Log logger
         self._logger = logger
@@ -51,7 +59,7 @@ class LogCatReaderThread():
         # Writer
         self.__writer_thread = None
         if enable_writer:
-            self.__writer_thread = LogCatWriterThread(self._logger)
+            self.__writer_thread = LogCatWriterThread(self._logger, writer_flush_interval, writer_flush_size)
 
         # ADB process
         self._adb_process = None
@@ -166,6 +174,46 @@ class LogCatReaderThread():
 
         self.__lock.release()
 
+    def __read_lines(self, timeout):
+        """
+        Block until logcat data is available or timeout expires, then read all available data
+
+        :type  timeout: float
+        :param timeout: max delay to wait for data
+
+        :rtype: list
+        :return: complete lines read, None if no data was received
+        """
+        adb_stdout = self._adb_stdout
+        if not adb_stdout:
+            self._stop_event.wait(timeout)
+            return None
+
+        try:
+            chunks = [adb_stdout.get(True, timeout)]
+        except Empty:
+            return None
+
+        # Drain what is already available, to hand it at once to consumers
+        try:
+            while len(chunks) < self.MAX_CHUNKS_PER_BATCH:
+                chunks.append(adb_stdout.get_nowait())
+        except Empty:
+            pass
+
+        if self.__incomplete_frame:
+            # We have incomplete frame, we assume that
+            # the end of the frame is the next received one
+            chunks.insert(0, self.__incomplete_frame)
+            self.__incomplete_frame = None
+
+        lines = "".join(chunks).splitlines(True)
+        if lines and not lines[-1].endswith("\n"):
+            # Incomplete frame, keep it for next time
+            self.__incomplete_frame = lines.pop()
+
+        return [line for line in lines if line.rstrip("\n")]
+
     def __run(self):
         """
         Start the Logcat reader thread
@@ -183,32 +231,23 @@ class LogCatReaderThread():
                 # Reinitialize watchdog timeout
                 t_0 = time.time()
 
-            if not self._stop_event.is_set() and self._adb_stdout and not self._adb_stdout.empty():
+            # Wait for data, but not beyond the watchdog timeout
+            read_timeout = self.READ_TIMEOUT
+            if self.__enable_watchdog:
+                read_timeout = max(0, min(read_timeout, t_0 + wd_log_timeout_def - time.time()))
+
+            lines = self.__read_lines(read_timeout)
+            if lines is not None and not self._stop_event.is_set():
                 # Reinitialize watchdog timeout
                 t_0 = time.time()
 
-                # read data from logcat
-                logcat_data = self._adb_stdout.get_nowait()
-
-                for line in logcat_data.splitlines(True):
-                    if line and not self._stop_event.is_set():
-                        if self.__incomplete_frame:
-                            # We have incomplete frame, we assume that
-                            # the end of the frame is the next received one
-                            line = self.__incomplete_frame + line
-                            self.__incomplete_frame = None
-
-                        if line.endswith("\n"):
-                            if line.rstrip("\n"):
-                                # Push it for writing
-                                if self.__writer_thread:
-                                    self.__writer_thread.push(line)
-
-                                # Push it for analyze
-                                self.__analyser_thread.push(line)
-                        else:
-                            # Incomplete frame, keep it for next time
-                            self.__incomplete_frame = line
+                if lines:
+                    # Push them for writing
+                    if self.__writer_thread:
+                        self.__writer_thread.push_lines(lines)
+
+                    # Push them for analyze
+                    self.__analyser_thread.push_lines(lines)
 
             # Compute watchdog timeout
             wd_log_timeout = time.time() - t_0
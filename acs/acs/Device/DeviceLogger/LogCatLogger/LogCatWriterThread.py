@@ -29,7 +29,13 @@ from datetime import datetime
 
 class LogCatWriterThread():
 
-    def __init__(self, logger):
+    # Default max delay (in sec) before flushing written lines in the output file
+    DEFAULT_FLUSH_INTERVAL = 1.0
+
+    # Default max amount of data (in bytes) written before flushing the output file
+    DEFAULT_FLUSH_SIZE = 65536
+
+    def __init__(self, logger, flush_interval=None, flush_size=None):
         # Output file
         self.__output_file_path = None
         self.__output_stream = None
@@ -49,6 +55,14 @@ class LogCatWriterThread():
         # Delay to wait before processing new item in the queue
         self.writer_loop_delay = 0.1
 
+        # Flush policy of the output file
+        self.flush_interval = self.DEFAULT_FLUSH_INTERVAL if flush_interval is None else float(flush_interval)
+        self.flush_size = self.DEFAULT_FLUSH_SIZE if flush_size is None else int(flush_size)
+
+        # Host time prefix, computed once per second
+        self.__host_time_sec = None
+        self.__host_time_prefix = None
+
     def set_output_path(self, output_path):
         """Set stdout file path
 
@@ -90,7 +104,15 @@ class LogCatWriterThread():
         :type  line: string
         :param line: data to be written
         """
-        self.__queue.put_nowait(line)
+        self.__queue.put_nowait([line])
+
+    def push_lines(self, lines):
+        """Push a batch of data in the internal queue
+
+        :type  lines: list
+        :param lines: lines to be written
+        """
+        self.__queue.put_nowait(lines)
 
     def is_time_format(self, test_str):
         """ Test if test_str contains a date formated like in logcat file
@@ -106,18 +128,59 @@ class LogCatWriterThread():
                 self._logger.error("Unexpected exception in Logcat writer thread : %s" % (str(exc),))
             return False
 
+    def __get_host_time_prefix(self):
+        """ Return the host time prefix of logcat file lines, computed at most once per second
+        """
+        now = int(time.time())
+        if now != self.__host_time_sec:
+            self.__host_time_sec = now
+            self.__host_time_prefix = time.strftime("host: %d/%m %H:%M:%S", time.localtime(now))
+        return self.__host_time_prefix
+
+    def __format_line(self, line_logcat):
+        return "%s - %s\n" % (self.__get_host_time_prefix(), line_logcat.rstrip("\r\n"),)
+
     def write_line_in_logcat_file(self, line_logcat):
-        self.__output_stream.write("%s - %s\n" % (time.strftime("host: %d/%m %H:%M:%S", time.localtime(time.time())),
-                                                  line_logcat.rstrip("\r\n"),))
+        self.__output_stream.write(self.__format_line(line_logcat))
         self.__output_stream.flush()
 
+    def __parse_log_date(self, line, date_cache):
+        """ Return a comparable date of a logcat line, None if the line does not begin by a date.
+        The date is parsed once per second of logs.
+
+        :type  line: string
+        :param line: logcat line
+
+        :type  date_cache: list
+        :param date_cache: [date string, parsed date] of the last parsed second
+        """
+        # date is formatted as '%d-%m %H:%M:%S.%f' on 18 chars, milliseconds are checked apart
+        str_date = line[0:14]
+        if line[14:15] != "." or not line[15:18].isdigit():
+            return None
+
+        if str_date != date_cache[0]:
+            date_cache[0] = str_date
+            date_cache[1] = None
+            if self.is_time_format(str_date + ".0"):
+                date_cache[1] = datetime.strptime(str_date, '%d-%m %H:%M:%S')
+
+        if date_cache[1] is None:
+            return None
+        return date_cache[1], int(line[15:18])
+
     def __run(self):
         """ Runner thread method
         """
-        last_log_date = datetime.min
+        last_log_date = (datetime.min, 0)
+        date_cache = [None, None]
         first_write = False
         skipping_log = False
 
+        # Amount of data written since last flush
+        pending_size = 0
+        last_flush_time = time.time()
+
         # Create the output file if output file was specified
         if self.__output_file_path:
             # Close it if needed
@@ -126,46 +189,62 @@ class LogCatWriterThread():
             first_write = True
 
         self.__start_writting = True
-        while not self._stop_event.is_set():
+        stop_requested = False
+        while not stop_requested:
+            # Once stop is requested, the queue is processed one last time
+            stop_requested = self._stop_event.is_set()
+
+            to_write = []
             while not self.__queue.empty():
                 try:
-                    line = self.__queue.get_nowait()
+                    lines = self.__queue.get_nowait()
+                except Empty:
+                    break
+                if not first_write and not self.__output_stream:
+                    # Nowhere to write
+                    continue
+                for line in lines:
                     if len(line) > 0:
-                        if first_write:
-                            # create the file if it is the first
-                            # time that there are logs
-                            self.__output_stream = open(self.__output_file_path, "wb")
-                            first_write = False
-                        if self.__output_stream:
-                            # extract the begining of the line
-                            str_date = line[0:18]
-                            # if the line begin by a date
-                            if self.is_time_format(str_date):
-                                # change string to date
-                                log_date = datetime.strptime(str_date, '%d-%m %H:%M:%S.%f')
-
-                                # compare the date of the line with these of
-                                # last logcat recorded
-                                if log_date > last_log_date:
-                                    # log doesn t need to be skipped
-                                    skipping_log = False
-
-                                if (log_date >= last_log_date) and not skipping_log:
-                                    # then line is logged in file
-                                    self.write_line_in_logcat_file(line)
-                                    last_log_date = log_date
-                                else:
-                                    # log_cat must be skipped
-                                    skipping_log = True
+                        # extract the date at the begining of the line
+                        log_date = self.__parse_log_date(line, date_cache)
+                        # if the line begin by a date
+                        if log_date is not None:
+                            # compare the date of the line with these of
+                            # last logcat recorded
+                            if log_date > last_log_date:
+                                # log doesn t need to be skipped
+                                skipping_log = False
+
+                            if (log_date >= last_log_date) and not skipping_log:
+                                # then line is logged in file
+                                to_write.append(self.__format_line(line))
+                                last_log_date = log_date
                             else:
-                                if not skipping_log:
-                                    # lines without date are logged in file
-                                    # if log are not skipped
-                                    self.write_line_in_logcat_file(line)
-
-                except Empty:
-                    pass
-            self._stop_event.wait(self.writer_loop_delay)
+                                # log_cat must be skipped
+                                skipping_log = True
+                        else:
+                            if not skipping_log:
+                                # lines without date are logged in file
+                                # if log are not skipped
+                                to_write.append(self.__format_line(line))
+
+            if to_write:
+                if first_write:
+                    # create the file if it is the first
+                    # time that there are logs
+                    self.__output_stream = open(self.__output_file_path, "wb")
+                    first_write = False
+                self.__output_stream.writelines(to_write)
+                pending_size += sum(len(line) for line in to_write)
+
+            if pending_size and (pending_size >= self.flush_size or
+                                 time.time() - last_flush_time >= self.flush_interval):
+                self.__output_stream.flush()
+                pending_size = 0
+                last_flush_time = time.time()
+
+            if not stop_requested:
+                self._stop_event.wait(self.writer_loop_delay)
 
         # Close the output file
         if self.__output_stream and not self.__output_stream.closed:
@@ -21,6 +21,7 @@ import imp
 import os
 import re
 import posixpath
+import shlex
 import socket
 import threading
 import time
@@ -34,13 +35,14 @@ from acs.Core.CampaignMetrics import CampaignMetrics
 from acs.Device.DeviceLogger.LogCatLogger.LogCatLogger import LogCatLogger
 from acs.Device.DeviceManager import DeviceManager
 from acs.Device.Model.DeviceBase import DeviceBase
-from acs.UtilitiesFWK.ADBUtilities import ADBSocket
+from acs.UtilitiesFWK.ADBUtilities import ADBSocket, ADBTransport
 from acs.UtilitiesFWK.Utilities import AcsConstants, Global, run_local_command, internal_shell_exec
 from acs.UtilitiesFWK.CommandLine import CommandLine
 # import acs.UtilitiesFWK.DateUtilities as DateUtil
 from acs.Device.Model.AndroidDevice.Agent.Factory import get_acs_agent_instance
 from acs.ErrorHandling.AcsBaseException import AcsBaseException
 from acs.ErrorHandling.AcsConfigException import AcsConfigException
+from acs.ErrorHandling.AcsToolException import AcsToolException
 from acs.ErrorHandling.DeviceException import DeviceException
 from acs.Device.DeviceController import DeviceController
 from acs.Core.Report.ACSLogging import LOGGER_WD
@@ -65,6 +67,17 @@ ADB_SOCK_CMDS_LIST = ["get-state",
                       "shell getprop",
                       "shell nohup"]
 
+# Commands run through adb server transport, without forking adb client
+ADB_TRANSPORT_CMDS_LIST = ["shell",
+                           "push",
+                           "pull"]
+
+# Line of "getprop" command output: [key]: [value]
+GETPROP_LINE_REGEX = re.compile(r"^\[(?P<key>[^\]]*)\]: \[(?P<value>.*)\]", re.MULTILINE)
+
+# Command setting a device property, which outdates the properties snapshot
+SETPROP_CMD_PATTERN = re.compile(r"\bsetprop\b")
+
 
 class AndroidDeviceBase(DeviceBase):
 
@@ -74,6 +87,13 @@ class AndroidDeviceBase(DeviceBase):
 
     OS_TYPE = 'ANDROID'
 
+    # Properties (or property prefixes) which may change while the device is up:
+    # they are always read from the device, never from the properties snapshot
+    VOLATILE_PROPERTY_KEYS = ("sys.boot_completed",
+                              "dev.bootcomplete",
+                              "init.svc.",
+                              "sys.usb.")
+
     def __init__(self, config, logger):
         """
         Constructor
@@ -182,6 +202,11 @@ class AndroidDeviceBase(DeviceBase):
         # Device log file for individual tests
         self._device_log_file = None
 
+        # Device properties snapshot (one getprop dump), dropped when the device (re)boots
+        self.__properties = None
+        self.__properties_generation = 0
+        self.__properties_lock = threading.Lock()
+
         if not self._use_adb_over_ethernet:
 
             if self._serial_number and self._serial_number != "":
@@ -200,6 +225,13 @@ class AndroidDeviceBase(DeviceBase):
             self._phone_handle = ADBSocket(self.get_logger(), self._serial_number, self._use_adb_over_ethernet,
                                            self._ip_address, self._adb_port)
 
+        # Direct access to device services through adb server, used instead of adb client for
+        # shell and push / pull commands (adb client is still used if transport fails)
+        self._adb_transport = None
+        if self.get_config("useAdbTransport", "True", "str_to_bool"):
+            self._adb_transport = ADBTransport(logger=self.get_logger(), serial=self._serial_number,
+                                               port=self._adb_server_port)
+
         # Default target sim is the first one
         self._target_sim = 1
         self._connection_lock = threading.Lock()
@@ -235,6 +267,8 @@ class AndroidDeviceBase(DeviceBase):
         """
         Stop the server used for device connection
         """
+        if self._adb_transport is not None:
+            self._adb_transport.close()
         if self._phone_handle is not None and self._phone_handle._adb_server_is_running:
             self._phone_handle.adb_stop()
 
@@ -595,6 +629,7 @@ class AndroidDeviceBase(DeviceBase):
                 # device is down and uptime is updated (no error on data retreive by adb)
                 if not self.__is_up and uptime != 0:
                     self.__logger_wd.error("***** UNEXPECTED DEVICE REBOOT! *****")
+                    self.invalidate_properties()
                     CampaignMetrics.instance().unexpected_reboot_count += 1  # Incrementing Metrics count
                     previous_uptime = uptime = 0.0
             except (KeyboardInterrupt, SystemExit):
@@ -860,14 +895,46 @@ class AndroidDeviceBase(DeviceBase):
              "BoardType": self.device_properties.board_type}
         return device_info
 
-    def retrieve_properties(self):
+    def retrieve_properties(self, refresh=False):
         """
         Retrieve full device information as dictionary of
-        property name and its value
+        property name and its value.
+        Properties are read once ("adb shell getprop") until the device reboots.
+
+        :type refresh: bool
+        :param refresh: read properties from the device, even if already done
 
         :rtype: dict
         :return: Dict of properties and their associated values
         """
+        properties = self.__get_properties(refresh)
+        # Returns the dictionary containing all the device properties
+        return dict(properties) if properties is not None else {}
+
+    def invalidate_properties(self):
+        """
+        Drop the device properties snapshot, properties will be read again from the device.
+        To be called when the device (re)boots.
+        """
+        with self.__properties_lock:
+            self.__properties = None
+            self.__properties_generation += 1
+
+    def __get_properties(self, refresh=False):
+        """
+        Return the device properties snapshot, read with one "adb shell getprop" if needed
+
+        :type refresh: bool
+        :param refresh: read properties from the device, even if already done
+
+        :rtype: dict
+        :return: Dict of properties and their associated values, None if properties cannot be read
+        """
+        with self.__properties_lock:
+            if self.__properties is not None and not refresh:
+                return self.__properties
+            generation = self.__properties_generation
+
         adb_cmd_str = "adb shell getprop"
 
         status, status_msg = self.run_cmd(cmd=adb_cmd_str,
@@ -875,34 +942,20 @@ class AndroidDeviceBase(DeviceBase):
                                           force_execution=True,
                                           silent_mode=True)
 
-        result = {}
-        try:
-            if status == Global.SUCCESS:
-                splitted_output = status_msg.splitlines()
-                key_regex = ".*\[(?P<key>(.*))\]: \[(?P<value>(.*))\].*"
-
-                # for each string (describing a property name and value),
-                # we will retrieve name and value for store it into a dictionary
-                reg_ex = re.compile(key_regex)
-                for entry in splitted_output:
-                    entry = entry.rstrip()
-                    matches_str = reg_ex.search(entry)
-                    if matches_str is not None:
-                        # Read found properties
-                        key = matches_str.group("key")
-                        value = matches_str.group("value")
-                        result[key] = value
-
-            else:
-                self.get_logger().debug("Unable to retrieve getprop info")
-                result = {}
+        if status != Global.SUCCESS:
+            self.get_logger().debug("Unable to retrieve getprop info")
+            return None
 
-        except Exception as ex:  # pylint: disable=W0703
-            self.get_logger().debug("Error occured when parsing getprop info ! (%s)" % str(ex))
-            result = {}
+        # for each line (describing a property name and value),
+        # we will retrieve name and value for store it into a dictionary
+        properties = dict((match.group("key"), match.group("value"))
+                          for match in GETPROP_LINE_REGEX.finditer(status_msg))
 
-        # Returns the dictionary containing all the device properties
-        return result
+        with self.__properties_lock:
+            # Do not keep properties read while the device was rebooting
+            if generation == self.__properties_generation:
+                self.__properties = properties
+        return properties
 
     def soft_shutdown_cmd(self):
         """
@@ -1222,6 +1275,7 @@ class AndroidDeviceBase(DeviceBase):
         else:
             return_message = ""
             self._acs_agent.is_started = False
+            self.invalidate_properties()
 
             self.get_logger().info("Switching on the device...")
 
@@ -1801,6 +1855,43 @@ class AndroidDeviceBase(DeviceBase):
 
         return return_code, output
 
+    def _run_adb_transport_cmd(self, cmd, timeout, silent_mode=False, cancel=None):
+        """
+        Execute the input adb shell, push or pull command through the adb server transport,
+        without forking an adb client.
+        Commands the transport cannot run (i.e. push / pull of directories) are executed by adb client.
+
+        :type  cmd: str
+        :param cmd: cmd to be run
+        :type  timeout: int
+        :param timeout: Script execution timeout in sec
+        :type  cancel: Cancel
+        :param cancel: a Cancel object that can be used to stop execution, before completion or timeout(default None)
+
+        :return: Execution status & output string
+        :rtype: int & str
+        """
+        try:
+            # Command line is tokenized as AcsSubprocessLin does for adb client (quotes removed),
+            # raise ValueError on unbalanced quotes
+            args = shlex.split(cmd, posix=True)
+            if len(args) > 2 and args[:2] == [ADB_CMD_NAME, "shell"] and args[2] != "nohup":
+                # Shell params are joined with spaces, as adb client does
+                return self._adb_transport.run_shell(" ".join(args[2:]), timeout,
+                                                     silent_mode=silent_mode, cancel=cancel)
+
+            elif len(args) > 1 and args[:2] in ([ADB_CMD_NAME, "pull"], [ADB_CMD_NAME, "push"]):
+                if len(args) == 4 and args[1] == "pull":
+                    return self._adb_transport.pull_file(args[2], args[3], timeout)
+                elif len(args) == 4:
+                    return self._adb_transport.push_file(args[2], args[3], timeout)
+
+        except (AcsToolException, ValueError) as error:
+            if not silent_mode:
+                self._logger.debug("Cannot use adb transport, adb client will be used (%s)" % str(error))
+
+        return self._run_adb_cmd(cmd, timeout, silent_mode=silent_mode, cancel=cancel)
+
     def _run_fastboot_cmd(self, cmd, timeout, silent_mode=False, wait_for_response=True, cancel=None):
         """
         Execute the input fastboot command and return the result message
@@ -1895,6 +1986,8 @@ class AndroidDeviceBase(DeviceBase):
         msg = "Cannot run the cmd, device not connected!"
 
         is_adb_cmd = any([cmd.startswith("%s %s" % (ADB_CMD_NAME, x)) for x in ADB_SOCK_CMDS_LIST])
+        is_adb_transport_cmd = self._adb_transport is not None and \
+            any([cmd.startswith("%s %s " % (ADB_CMD_NAME, x)) for x in ADB_TRANSPORT_CMDS_LIST])
 
         if self.is_available() or force_execution:
             if cmd.startswith(FASTBOOT_CMD_NAME):
@@ -1902,6 +1995,8 @@ class AndroidDeviceBase(DeviceBase):
                 result, msg = self._run_fastboot_cmd(cmd, timeout, silent_mode=silent_mode,
                                                      wait_for_response=wait_for_response,
                                                      cancel=cancel)
+            elif is_adb_transport_cmd and wait_for_response:
+                result, msg = self._run_adb_transport_cmd(cmd, timeout, silent_mode=silent_mode, cancel=cancel)
             elif not self._use_adb_socket or is_adb_cmd:
                 # Cmd not yet supported thru ADBSocket
                 # Use std adb cmd (warning as it may leak)
@@ -1911,6 +2006,10 @@ class AndroidDeviceBase(DeviceBase):
             else:
                 result, msg = self._phone_handle.run_cmd(cmd, timeout, wait_for_response, silent_mode=silent_mode)
 
+            if SETPROP_CMD_PATTERN.search(cmd):
+                # Properties snapshot may be outdated by the command
+                self.invalidate_properties()
+
         elif not silent_mode:
             self.get_logger().warning("Cannot run '%s', device not connected!" % (str(cmd),))
 
@@ -2381,9 +2480,14 @@ class AndroidDeviceBase(DeviceBase):
                 DeviceException.FILE_SYSTEM_ERROR,
                 "set_filesystem_rw error: %s" % err_msg)
 
-    def get_property_value(self, key):
+    def get_property_value(self, key, volatile=None):
         """
-        Returns property value by executing "adb shell getprop" command.
+        Returns property value, from the device properties snapshot (see retrieve_properties)
+        or by executing "adb shell getprop" command for volatile properties.
+
+        The snapshot is dropped when the device reboots or when run_cmd runs a setprop command.
+        Properties set by other means (i.e. by the device itself or by an agent) are not seen
+        until then: read them with volatile=True, or call invalidate_properties.
 
         .. attention:: This implementation should prior from one in PhoneSystem UeCmd,
         this last calls should be removed and replaced by this one
@@ -2391,8 +2495,22 @@ class AndroidDeviceBase(DeviceBase):
         :type key: str
         :param key: Key corresponding to the value you want to retrieve.
 
+        :type volatile: bool
+        :param volatile: read the property from the device, instead of the properties snapshot.
+                         By default, only properties of VOLATILE_PROPERTY_KEYS are read from the device.
+
         :return: The associated value or None if the key hasn't been found.
         """
+        if volatile is None:
+            volatile = key.startswith(self.VOLATILE_PROPERTY_KEYS)
+
+        if not volatile:
+            properties = self.__get_properties()
+            if properties is not None:
+                # getprop returns an empty value for unknown keys
+                property_value = properties.get(key, "")
+                DeviceManager().update_device_properties(self.whoami().get('device'), {key: property_value})
+                return property_value
 
         # Try to call getprop, then update the DeviceManager
         property_value = None
@@ -2415,6 +2533,9 @@ class AndroidDeviceBase(DeviceBase):
             if status_msg is not None:
                 property_value = status_msg.rstrip("\r\n")
                 DeviceManager().update_device_properties(self.whoami().get('device'), {key: property_value})
+                with self.__properties_lock:
+                    if self.__properties is not None:
+                        self.__properties[key] = property_value
         else:
             self.get_logger().warning("Fail to retrieve " + str(key) + " key")
 
@@ -2437,8 +2558,8 @@ class AndroidDeviceBase(DeviceBase):
         adb_cmd_str = "adb shell setprop %s %s" % (key, value)
         self.run_cmd(adb_cmd_str, self._uecmd_default_timeout, True)
 
-        # Check that the previous command had the expected effect
-        new_value = self.get_property_value(key)
+        # Check that the previous command had the expected effect (and update properties snapshot)
+        new_value = self.get_property_value(key, volatile=True)
         if value != new_value:
             # Build an error message
             message = "Could not change property %s's values to %s" % (
@@ -2894,6 +3015,7 @@ class AndroidDeviceBase(DeviceBase):
 
                 # Consider after reboot that we shall restart the acs agent
                 self._acs_agent.is_started = False
+                self.invalidate_properties()
 
                 # check reboot result
                 if self._wait_reboot_cmd_returns and output[0] == Global.FAILURE:
@@ -28,6 +28,7 @@ from acs.Core.TestStep.ParallelTestStepSet import ParallelTestStepSet
 from acs.Core.TestStep.LoopTestStepSet import LoopTestStepSet
 from acs.Core.TestStep.IfTestStepSet import IfTestStepSet
 from acs.Core.TestStep.TestStepReport import TestStepReport
+from acs.Core.TestStep.TestStepPlan import TestStepPlan, TestStepPlanNode
 from acs.Core.TestBase import TestBase
 from acs.UtilitiesFWK.Utilities import str_to_bool_ex, get_class, Global, Verdict, error_to_verdict
 from acs.ErrorHandling.AcsBaseException import AcsBaseException
@@ -89,6 +90,11 @@ class TestStepEngine(TestBase):
         # Member variables to be used later
         self._xml_etree = None
 
+        # Compiled test case file, shared with the other runs of the same file
+        self._plan = None
+        # Time spent (in sec) to create the test steps of the last section from the plan
+        self._steps_creation_time = 0.0
+
         # dictionary containing test steps read from TestStep catalogs
         self._teststep_catalog_parser = TestStepCatalogParser()
         self._teststep_dictionary = {}
@@ -103,6 +109,9 @@ class TestStepEngine(TestBase):
         # Create test step report
         self._teststep_report = TestStepReport(
             global_config.campaignConfig["campaignReportTree"].get_report_path())
+        self._teststep_report.set_flush_policy(
+            self._tc_parameters.get_param_value(TestStepConstants.STR_PAR_TS_REPORT_FLUSH_NB, None, int),
+            self._tc_parameters.get_param_value(TestStepConstants.STR_PAR_TS_REPORT_FLUSH_INTERVAL, None, float))
 
         # Create the factory, used by test steps to request ACS objects (such as DeviceManager, for example)
         self._factory = Factory()
@@ -115,10 +124,6 @@ class TestStepEngine(TestBase):
         # Check that given xml file exists
         self.__check_file_exists(self._testcase_file_name)
 
-        # Load and parse the XML file
-        # Done here as it could potentially raise exception
-        self._xml_etree = self.__parse_xml_file(self._testcase_file_name)
-
         # Collects test steps from Acs TestStep Catalog and put them in a dictionary
         try:
             self._teststep_dictionary = self._teststep_catalog_parser.parse_catalog_folder()
@@ -126,12 +131,36 @@ class TestStepEngine(TestBase):
             self.__config_error = True
             raise
 
-        # Process <Include> tags to include external files.
-        test_steps_root = self._xml_etree.xpath(TestStepConstants.STR_PATH_ROOT)
-        if test_steps_root:
-            # Extract STR_PATH_INCLUDE tag from first found tag STR_PATH_ROOT
-            # In a test case we shall have only one STR_PATH_ROOT, that is why we take the first element
-            self._process_include_tag(TestStepConstants.STR_PATH_INCLUDE, test_steps_root[0])
+        # Reuse the plan of the test case file if none of its files nor its test step classes changed
+        self._plan = TestStepPlan.get_plan(self._testcase_file_name)
+        if self._plan is not None:
+            self.__include_test_steps(self._plan.included_teststeps)
+            if not self._plan.match_catalog(self._teststep_dictionary):
+                self._plan = None
+                self._teststep_dictionary = self._teststep_catalog_parser.parse_catalog_folder()
+
+        if self._plan is None:
+            build_start = time.time()
+            included_files = []
+            included_teststeps = {}
+
+            # Load and parse the XML file
+            # Done here as it could potentially raise exception
+            self._xml_etree = self.__parse_xml_file(self._testcase_file_name)
+
+            # Process <Include> tags to include external files.
+            test_steps_root = self._xml_etree.xpath(TestStepConstants.STR_PATH_ROOT)
+            if test_steps_root:
+                # Extract STR_PATH_INCLUDE tag from first found tag STR_PATH_ROOT
+                # In a test case we shall have only one STR_PATH_ROOT, that is why we take the first element
+                self._process_include_tag(TestStepConstants.STR_PATH_INCLUDE, test_steps_root[0],
+                                          included_files, included_teststeps)
+
+            self._plan = TestStepPlan(self._testcase_file_name, self._xml_etree, included_files,
+                                      included_teststeps, time.time() - build_start)
+            TestStepPlan.add_plan(self._plan)
+        else:
+            self._xml_etree = self._plan.xml_etree
 
         # Process TestStep parameters regarding definition from Parameters catalog
         self._process_test_step_parameters()
@@ -208,6 +237,26 @@ class TestStepEngine(TestBase):
 
         return self._error.Code, self._error.Msg
 
+    @property
+    def plan_build_time(self):
+        """
+        Time spent to parse the test case file and compile its sections, once for all the runs of the file
+
+        :rtype: float
+        :return: build time of the plan (in sec)
+        """
+        return self._plan.build_time if self._plan is not None else 0.0
+
+    @property
+    def steps_creation_time(self):
+        """
+        Time spent to create the test steps of the last executed section from the plan, spent on each run
+
+        :rtype: float
+        :return: creation time of the test steps (in sec)
+        """
+        return self._steps_creation_time
+
     def _run_test_steps(self, path, optional_step=False):
         """
         Runs test steps created from the XML path identifying a "section" (Setup/RunTest/TearDown)
@@ -222,7 +271,7 @@ class TestStepEngine(TestBase):
         :param path: the XML Path identifying the section to process
         """
 
-        def update_ts_report(ts_name, ts_verdict, ts_verdict_msg):
+        def update_ts_report(ts_name, ts_verdict, ts_verdict_msg, ts_duration=None):
             """
             Parse the test step verdict until we get the test step verdict message
             Add it in the test step report
@@ -235,23 +284,28 @@ class TestStepEngine(TestBase):
 
             :type ts_verdict_msg: str/list
             :param ts_verdict_msg: specific message from test step
+
+            :type ts_duration: float
+            :param ts_duration: wall time of the test step (in sec), if measured
             """
             if isinstance(ts_verdict_msg, str):
                 # Add test step result into the test step report
                 self._teststep_report.add_result(
-                    ts_name, ts_verdict, ts_verdict_msg, self.get_name(), self.tc_order)
+                    ts_name, ts_verdict, ts_verdict_msg, self.get_name(), self.tc_order, ts_duration)
             else:
                 # In other case ts_verdict_msg will contain list of nested test steps with their verdict as follow
                 # [('Run.Fork Test1.MultiSuspend.SUSPEND', <UtilitiesFWK.Utilities.Error object at 0x033018F0>),
                 #  ('Run.Fork Test1.MultiSuspend.SUSPEND', <UtilitiesFWK.Utilities.Error object at 0x03301750>)]
-                for sub_ts_name, sub_ts_verdict_msg in ts_verdict_msg:
+                # Steps run by a fork have their wall time as third item
+                for sub_ts_result in ts_verdict_msg:
+                    sub_ts_name, sub_ts_verdict_msg = sub_ts_result[:2]
+                    sub_ts_duration = sub_ts_result[2] if len(sub_ts_result) > 2 else None
                     # it cannot be BLOCKED or FAILURE, if so it would have been process in exception
                     sub_ts_verdict = error_to_verdict(Global.SUCCESS)
-                    update_ts_report(sub_ts_name, sub_ts_verdict, sub_ts_verdict_msg)
+                    update_ts_report(sub_ts_name, sub_ts_verdict, sub_ts_verdict_msg, sub_ts_duration)
 
         # Kick off the process of test steps creation
-        steps = self._create_test_steps_list(path, extra_pars=None, ts_name=os.path.basename(path),
-                                             optional_nodes=optional_step)
+        steps = self._create_test_steps(path, optional_step)
 
         # Set start time
         run_start = time.time()
@@ -275,6 +329,7 @@ class TestStepEngine(TestBase):
                     # In case of user interruption add it in the test step report then re-raise the exception
                     self._teststep_report.add_result(
                         step_name, Verdict.BLOCKED, AcsBaseException.USER_INTERRUPTION, self.get_name(), self.tc_order)
+                    self._teststep_report.flush()
                     raise
 
                 except Exception as test_step_error:
@@ -290,6 +345,7 @@ class TestStepEngine(TestBase):
                     # Add verdict of the test step before stopping execution
                     self._teststep_report.add_result(
                         step_name, self._error.Verdict, error_msg, self.get_name(), self.tc_order)
+                    self._teststep_report.flush()
                     raise
 
                 finally:
@@ -305,12 +361,44 @@ class TestStepEngine(TestBase):
                 if self._error.Code != Global.SUCCESS:
                     break
 
+        # Write buffered test step results at the end of each section
+        self._teststep_report.flush()
+
         # Return the execution time
         return time.time() - run_start
 
-    def _create_test_steps_list(self, path, extra_pars=None, ts_name=None, optional_nodes=False):
+    def _create_test_steps(self, path, optional_step=False):
         """
-        Creates a list of test steps from the XML path.
+        Creates the test steps of a section from the plan, the section is compiled at its first use
+
+        :type path: str
+        :param path: the XML Path identifying the section to process
+
+        :type optional_step: bool
+        :param optional_step: is it optional steps
+
+        :rtype: list
+        :return: list of test steps
+        """
+        if self._plan.get_section(path) is None:
+            build_start = time.time()
+            nodes = self._create_test_step_nodes(path, extra_pars=None, ts_name=os.path.basename(path),
+                                                 optional_nodes=optional_step)
+            build_time = time.time() - build_start
+            self._plan.set_section(path, nodes, build_time)
+            LOGGER_FWK_STATS.info("Compile test_steps={0}; build_time={1:.6f}".format(path, build_time))
+
+        creation_start = time.time()
+        steps = self._plan.create_test_steps(path, self._conf, self._global_conf, self._factory)
+        self._steps_creation_time = time.time() - creation_start
+        LOGGER_FWK_STATS.info("Create test_steps={0}; creation_time={1:.6f}; plan_build_time={2:.6f}".format(
+            path, self._steps_creation_time, self._plan.build_time))
+
+        return steps
+
+    def _create_test_step_nodes(self, path, extra_pars=None, ts_name=None, optional_nodes=False):
+        """
+        Creates a list of test step nodes from the XML path.
 
         It implements a cascade mechanism to make nested items inherit parameters.
 
@@ -329,11 +417,11 @@ class TestStepEngine(TestBase):
         :param optional_nodes: raise error if nodes are missing
 
         :rtype: list
-        :return: list of test steps
+        :return: list of test step nodes
         """
 
-        # The initial empty list of test steps to be executed.
-        # A test step is a TestStepBase hierarchy class (such as TestStep, TestStepSet,
+        # The initial empty list of test step nodes to be executed.
+        # A node describes a TestStepBase hierarchy class (such as TestStep, TestStepSet,
         # ParallelTestSet, etc...
         test_steps = []
 
@@ -380,7 +468,7 @@ class TestStepEngine(TestBase):
         :param path: is the current XML path the fork tag is in
 
         :type test_steps: list
-        :param test_steps:  list of test steps
+        :param test_steps:  list of test step nodes
 
         :type pars: dict
         :param pars: the test step's parameters
@@ -397,20 +485,18 @@ class TestStepEngine(TestBase):
 
         # Create test steps
         ts_name = "{0}.{1}".format(ts_name, fork_id) if ts_name else fork_id
-        fork_steps = self._create_test_steps_list(new_path, pars, ts_name)
+        fork_steps = self._create_test_step_nodes(new_path, pars, ts_name)
 
         # If STR_SERIALIZE is specified <Fork> behaves like a <TestStepSet>
         # Useful to switch parallel / serial just changing the attribute
         if (TestStepConstants.STR_SERIALIZE not in pars.keys()
                 or not str_to_bool_ex(pars[TestStepConstants.STR_SERIALIZE])):
-            fork_set = ParallelTestStepSet(self._conf, self._global_conf, pars, self._factory)
+            fork_class = ParallelTestStepSet
         else:
-            fork_set = TestStepSet(self._conf, self._global_conf, pars, self._factory)
+            fork_class = TestStepSet
 
-        fork_set.name = ts_name
-        fork_set.add_steps(fork_steps)
         # Add the test step set to the test step list
-        test_steps.append(fork_set)
+        test_steps.append(TestStepPlanNode(fork_class, pars, ts_name, fork_steps))
 
     def _process_loop_tag(self, path, test_steps, pars, ts_name=None):
         """
@@ -420,7 +506,7 @@ class TestStepEngine(TestBase):
         :param path: is the current XML path the loop tag is in
 
         :type test_steps: list
-        :param test_steps:  list of test steps
+        :param test_steps:  list of test step nodes
 
         :type pars: dict
         :param pars: the test step's parameters
@@ -440,14 +526,10 @@ class TestStepEngine(TestBase):
 
         # Create test steps
         ts_name = "{0}.{1}".format(ts_name, loop_id) if ts_name else loop_id
-        loop_steps = self._create_test_steps_list(new_path, extra_pars, ts_name)
-
-        loop_set = LoopTestStepSet(self._conf, self._global_conf, pars, self._factory)
+        loop_steps = self._create_test_step_nodes(new_path, extra_pars, ts_name)
 
-        loop_set.name = ts_name
-        loop_set.add_steps(loop_steps)
         # Add the test step set to the test step list
-        test_steps.append(loop_set)
+        test_steps.append(TestStepPlanNode(LoopTestStepSet, pars, ts_name, loop_steps))
 
     def _process_if_tag(self, path, test_steps, pars, ts_name=None):
         """
@@ -457,7 +539,7 @@ class TestStepEngine(TestBase):
         :param path: is the current XML path the if tag is in
 
         :type test_steps: list
-        :param test_steps:  list of test steps
+        :param test_steps:  list of test step nodes
 
         :type pars: dict
         :param pars: the test step's parameters
@@ -477,21 +559,17 @@ class TestStepEngine(TestBase):
 
         # Create test steps
         ts_name = "{0}.{1}".format(ts_name, if_id) if ts_name else if_id
-        if_steps = self._create_test_steps_list(new_path, extra_pars, ts_name)
+        if_steps = self._create_test_step_nodes(new_path, extra_pars, ts_name)
 
-        if_set = IfTestStepSet(self._conf, self._global_conf, pars, self._factory)
-
-        if_set.name = ts_name
-        if_set.add_steps(if_steps)
         # Add the test step set to the test step list
-        test_steps.append(if_set)
+        test_steps.append(TestStepPlanNode(IfTestStepSet, pars, ts_name, if_steps))
 
     def _process_test_step_tag(self, test_steps, pars, ts_name=None):
         """
         Process **<TestStep>** tag, to create test steps.
 
         :type test_steps: list
-        :param test_steps: list of test steps
+        :param test_steps: list of test step nodes
 
         :type pars: dict
         :param pars: test step's parameters
@@ -500,9 +578,9 @@ class TestStepEngine(TestBase):
         :param ts_name: test step's parent name
         """
         if TestStepConstants.STR_TS_ID in pars.keys():
-            test_step = self._create_test_step_instance(pars, ts_name)
+            test_step = self._create_test_step_node(pars, ts_name)
         elif TestStepConstants.STR_SET_ID in pars.keys():
-            test_step = self._create_test_step_set_instance(pars, ts_name)
+            test_step = self._create_test_step_set_node(pars, ts_name)
         else:
             error_msg = "Either %s or %s <TestStep> attribute " \
                         " is mandatory " % (TestStepConstants.STR_TS_ID, TestStepConstants.STR_SET_ID)
@@ -512,9 +590,9 @@ class TestStepEngine(TestBase):
         # Everything went fine, add the step to test step list
         test_steps.append(test_step)
 
-    def _create_test_step_set_instance(self, pars, ts_name=None):
+    def _create_test_step_set_node(self, pars, ts_name=None):
         """
-        Create test step set instance
+        Create test step set node
 
         :type pars: dict
         :param pars: the test step's parameters
@@ -522,8 +600,8 @@ class TestStepEngine(TestBase):
         :type ts_name: str
         :param ts_name: the test step's parent name
 
-        :rtype: :py:class:`~acs.Core.TestStep.TestStepSet`
-        :return: the new instance of the test step set.
+        :rtype: :py:class:`~acs.Core.TestStep.TestStepPlan.TestStepPlanNode`
+        :return: the node of the test step set.
         """
 
         # It's probably a test step macro. check it
@@ -536,21 +614,19 @@ class TestStepEngine(TestBase):
             # MacroId (just to avoid confusion)
             pars.pop(TestStepConstants.STR_SET_ID, None)
             ts_name = "{0}.{1}".format(ts_name, macro_id) if ts_name else macro_id
-            macro_steps = self._create_test_steps_list(new_path, pars, ts_name)
+            macro_steps = self._create_test_step_nodes(new_path, pars, ts_name)
 
             # Create a test step set and add the macro steps to it
-            step_set = TestStepSet(self._conf, self._global_conf, None, self._factory)
-            step_set.name = ts_name
-            step_set.add_steps(macro_steps)
+            step_set = TestStepPlanNode(TestStepSet, None, ts_name, macro_steps)
         else:
             error_msg = "%s is None " % TestStepConstants.STR_SET_ID
             raise AcsConfigException(AcsConfigException.OPERATION_FAILED, error_msg)
 
         return step_set
 
-    def _create_test_step_instance(self, pars, ts_name=None):
+    def _create_test_step_node(self, pars, ts_name=None):
         """
-        Create test step instance given its class name
+        Create test step node, resolving the test step class given its class name
 
         :type pars: dict
         :param pars: the test step's parameters
@@ -558,10 +634,10 @@ class TestStepEngine(TestBase):
         :type ts_name: str
         :param ts_name: the test step's parent name
 
-        :rtype: :py:class:`~acs.Core.TestStep.TestStepBase`
-        :return: the new instance of the test step.
+        :rtype: :py:class:`~acs.Core.TestStep.TestStepPlan.TestStepPlanNode`
+        :return: the node of the test step.
         """
-        teststep_instance = None
+        teststep_node = None
         exception_code = None
         exception_msg = ""
 
@@ -573,10 +649,12 @@ class TestStepEngine(TestBase):
 
         if teststep_name in self._teststep_dictionary:
             try:
-                LOGGER_FWK_STATS.info("Create test_step={0}".format(teststep_name))
                 cls_name = self._teststep_dictionary[teststep_name]["ClassName"]
-                teststep_instance = get_class(cls_name)(self._conf, self._global_conf, pars, self._factory)
-                teststep_instance.name = "{0}.{1}".format(ts_name, teststep_name) if ts_name else teststep_name
+                teststep_node = TestStepPlanNode(
+                    get_class(cls_name), pars,
+                    "{0}.{1}".format(ts_name, teststep_name) if ts_name else teststep_name,
+                    teststep_id=teststep_name)
+                self._plan.add_class_name(teststep_name, cls_name)
             except KeyError:
                 exception_code = AcsConfigException.INVALID_PARAMETER
                 exception_msg = "Unable to find class name of '{0}' test step.".format(teststep_name)
@@ -594,14 +672,12 @@ class TestStepEngine(TestBase):
                 "Unable to find '{0}' test step in any test step catalogs (official or external).".format(teststep_name)
             exception_msg += " Check that it is declared in the test step catalogs"
 
-        if teststep_instance:
-            teststep_instance.call_by_engine()
-        else:
+        if teststep_node is None:
             raise AcsConfigException(exception_code, exception_msg)
 
-        return teststep_instance
+        return teststep_node
 
-    def _process_include_tag(self, path, node):
+    def _process_include_tag(self, path, node, included_files=None, included_teststeps=None):
         """
         Include another XML file and add its nodes to node
 
@@ -610,6 +686,12 @@ class TestStepEngine(TestBase):
 
         :type node: Element
         :param node: the XML node to add the included information to
+
+        :type included_files: list
+        :param included_files: filled with the paths of the included files
+
+        :type included_teststeps: dict
+        :param included_teststeps: filled with the test steps declared by the included files
         """
 
         nodes = node.xpath(path)
@@ -619,6 +701,8 @@ class TestStepEngine(TestBase):
                 # Raise an exception in case file does not exists
                 file_name = os.path.normpath(os.path.join(self._execution_config_path, src))
                 self.__check_file_exists(file_name)
+                if included_files is not None:
+                    included_files.append(file_name)
 
                 # Parse the xml file to include
                 to_include = self.__parse_xml_file(file_name)
@@ -628,15 +712,9 @@ class TestStepEngine(TestBase):
                 if teststeps_root_node:
                     # TestSteps to include into the reference Test Step catalog
                     teststeps_to_include = self._teststep_catalog_parser.parse_catalog_file(file_name)
-
-                    # Raise an exception if a test step is already defined
-                    for teststep_name in teststeps_to_include.iterkeys():
-                        if teststep_name in self._teststep_dictionary:
-                            error_msg = "TestStep '%s' is defined more than one time !" % teststep_name
-                            self.__config_error = True
-                            raise AcsConfigException(AcsConfigException.PROHIBITIVE_BEHAVIOR, error_msg)
-
-                    self._teststep_dictionary.update(teststeps_to_include)
+                    if included_teststeps is not None:
+                        included_teststeps.update(teststeps_to_include)
+                    self.__include_test_steps(teststeps_to_include)
 
                 # All the TestStepSet shall be defined in <TestStepSets/> node
                 teststepsets_root_node = to_include.xpath("/" + TestStepConstants.STR_PATH_INCLUDE)
@@ -648,6 +726,24 @@ class TestStepEngine(TestBase):
                         if isinstance(item.tag, basestring):
                             node.append(item)
 
+    def __include_test_steps(self, teststeps_to_include):
+        """
+        Add the test steps declared by an included file to the test step dictionary
+
+        :type teststeps_to_include: dict
+        :param teststeps_to_include: test steps to add
+
+        :raise: AcsConfigException in case a test step is already defined
+        """
+        # Raise an exception if a test step is already defined
+        for teststep_name in teststeps_to_include.iterkeys():
+            if teststep_name in self._teststep_dictionary:
+                error_msg = "TestStep '%s' is defined more than one time !" % teststep_name
+                self.__config_error = True
+                raise AcsConfigException(AcsConfigException.PROHIBITIVE_BEHAVIOR, error_msg)
+
+        self._teststep_dictionary.update(teststeps_to_include)
+
     def __parse_xml_file(self, file_name):
         """
         Parse the xml file
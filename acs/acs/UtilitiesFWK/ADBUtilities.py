@@ -19,8 +19,11 @@ SPDX-License-Identifier: Apache-2.0
 
 import subprocess
 import os
+import posixpath
 import select
 import socket
+import stat
+import struct
 import re
 import time
 import tempfile
@@ -29,6 +32,7 @@ import psutil
 import random
 import threading
 
+from acs.Core.Report.ACSLogging import RAW_LEVEL
 from acs.ErrorHandling.AcsToolException import AcsToolException
 from acs.UtilitiesFWK.Utilities import Global, internal_shell_exec
 
@@ -710,3 +714,492 @@ class ADBSocket():
             port = self.get_adb_server_port(port=None,
                                             retry=retry - 1)
         return port
+
+
+class ADBTransport(ADBSocket):
+
+    """
+    Direct access to the services of one device through the adb server (host protocol),
+    used to run shell commands and sync transfers (push / pull) without forking an adb client.
+
+    The adb server ends a connection with the service it carries: each shell command
+    uses its own connection, bound to the device transport.
+    The sync service handles several requests, its connection is kept open between transfers.
+
+    Methods raise AcsToolException when the service cannot be used (adb server or device unreachable,
+    unsupported request...): nothing has been done on the device and the adb client can be used instead.
+    """
+
+    # Max time (in sec) to connect to the adb server and get its answer to a request
+    CONNECT_TIMEOUT = 2.0
+
+    # Max time (in sec) to block on a socket, so that cancel requests are handled
+    MAX_IO_WAIT_TIME = 0.1
+
+    # Size of the buffer (in bytes) to be read
+    READ_BUFFER_SIZE = 65536
+
+    # Max length of a request sent to the adb server
+    MAX_REQUEST_LENGTH = 0xffff
+
+    # Max size (in bytes) of a data chunk sent through sync service
+    SYNC_DATA_MAX = 65536
+
+    # Error message of a canceled shell command
+    CANCELED_MSG = "was canceled!"
+
+    # Packet ids of shell protocol v2
+    SHELL_STDOUT = 1
+    SHELL_STDERR = 2
+    SHELL_EXIT = 3
+
+    def __init__(self, logger=None, serial=None, hostname='localhost', port=5037):
+        ADBSocket.__init__(self, logger=logger, serial=serial, hostname=hostname, port=port, silent_mode=True)
+
+        if serial:
+            self.__features_request = "host-serial:%s:features" % serial
+        else:
+            self.__features_request = "host-usb:features"
+
+        # Features of the device transport (i.e. shell_v2), got from the adb server once
+        self.__features = None
+        self.__features_lock = threading.Lock()
+
+        # Persistent sync service connection
+        self.__sync_connection = None
+        self.__sync_lock = threading.Lock()
+
+    def close(self):
+        """
+        Close the persistent connections and forget the device features
+        """
+        with self.__sync_lock:
+            self.__close_sync_connection()
+        with self.__features_lock:
+            self.__features = None
+
+    def run_shell(self, command, timeout, silent_mode=False, cancel=None):
+        """
+        Run a command through the shell service of the device and return its output
+        as the adb client would (stdout and stderr lines in the order they are received).
+        Shell protocol v2 is used when the device supports it to get the command exit code.
+
+        :type  command: str
+        :param command: command to be run by the device shell
+        :type  timeout: float
+        :param timeout: command execution timeout in sec
+        :type  silent_mode: bool
+        :param silent_mode: Display logs in ACS logger
+        :type  cancel: Cancel
+        :param cancel: a Cancel object that can be used to stop execution, before completion or timeout(default None)
+
+        :return: Execution status & output string
+        :rtype: tuple(int, str)
+
+        :raise AcsToolException: shell service cannot be started, command has not been run
+        """
+        shell_v2 = "shell_v2" in self.__get_features()
+        service = ("shell,v2,raw:%s" if shell_v2 else "shell:%s") % command
+
+        if not silent_mode and self._logger:
+            self._logger.debug("*** RUN (adb transport): %s, timeout=%s" % (command, timeout))
+
+        begin_time = time.time()
+        connection = self.__open_service(service)
+        try:
+            streams = {self.SHELL_STDOUT: "", self.SHELL_STDERR: ""}
+            lines = []
+            exit_code, error_msg = self.__read_shell(connection, shell_v2, streams, lines, begin_time + timeout,
+                                                     cancel)
+        finally:
+            self.__close(connection)
+
+        for stream_id in (self.SHELL_STDOUT, self.SHELL_STDERR):
+            if streams[stream_id]:
+                lines.append(streams[stream_id].rstrip("\r"))
+
+        if not silent_mode and self._logger:
+            for line in lines:
+                self._logger.log(RAW_LEVEL, line)
+            if error_msg is not None:
+                self._logger.error("Command %s %s" % (command, error_msg))
+
+        if error_msg == self.CANCELED_MSG and cancel.callback is not None:
+            # execute callback if execution was canceled
+            cancel.callback()
+
+        # Exit code is not known without shell protocol v2, as for the adb client
+        status = Global.SUCCESS if error_msg is None and exit_code in (None, 0) else Global.FAILURE
+        return status, "\n".join(lines)
+
+    def pull_file(self, remote_path, local_path, timeout):
+        """
+        Pull a regular file of the device through the sync service
+
+        :type  remote_path: str
+        :param remote_path: path of the file on the device
+        :type  local_path: str
+        :param local_path: path of the local file or directory
+        :type  timeout: float
+        :param timeout: transfer timeout in sec
+
+        :return: Execution status & output string
+        :rtype: tuple(int, str)
+
+        :raise AcsToolException: file cannot be pulled through the sync service
+        """
+        end_time = time.time() + timeout
+        local_file_created = False
+        with self.__sync_lock:
+            connection = self.__get_sync_connection()
+            try:
+                mode, _, _ = self.__sync_stat(connection, remote_path, end_time)
+                if not stat.S_ISREG(mode):
+                    raise AcsToolException(AcsToolException.FEATURE_NOT_AVAILABLE,
+                                           "[ADB-TRANSPORT] %s is not a regular file" % remote_path)
+
+                if os.path.isdir(local_path):
+                    local_path = os.path.join(local_path, posixpath.basename(remote_path))
+
+                self.__sync_send_request(connection, "RECV", remote_path)
+                received = 0
+                local_file_created = True
+                with open(local_path, "wb") as local_file:
+                    while True:
+                        request_id, length = self.__sync_read_header(connection, end_time)
+                        if request_id == "DONE":
+                            break
+                        elif request_id != "DATA":
+                            message = self.__recv_exact(connection, length, end_time)
+                            raise AcsToolException(AcsToolException.OPERATION_FAILED,
+                                                   "[ADB-TRANSPORT] Pull %s failed: %s" % (remote_path, message))
+                        local_file.write(self.__recv_exact(connection, length, end_time))
+                        received += length
+
+            except socket.timeout:
+                self.__close_sync_connection()
+                if local_file_created:
+                    self.__remove_file(local_path)
+                return Global.FAILURE, "Pull of %s has timeout after %ss!" % (remote_path, timeout)
+            except (socket.error, struct.error, AcsToolException) as error:
+                self.__close_sync_connection()
+                if local_file_created:
+                    self.__remove_file(local_path)
+                raise self.__transport_error(error)
+
+        elapsed_time = timeout - (end_time - time.time())
+        return Global.SUCCESS, "%s: 1 file pulled. (%d bytes in %.3fs)" % (remote_path, received, elapsed_time)
+
+    def push_file(self, local_path, remote_path, timeout):
+        """
+        Push a regular local file on the device through the sync service
+
+        :type  local_path: str
+        :param local_path: path of the local file
+        :type  remote_path: str
+        :param remote_path: path of the file or directory on the device
+        :type  timeout: float
+        :param timeout: transfer timeout in sec
+
+        :return: Execution status & output string
+        :rtype: tuple(int, str)
+
+        :raise AcsToolException: file cannot be pushed through the sync service
+        """
+        if not os.path.isfile(local_path):
+            raise AcsToolException(AcsToolException.FEATURE_NOT_AVAILABLE,
+                                   "[ADB-TRANSPORT] %s is not a regular file" % local_path)
+
+        end_time = time.time() + timeout
+        local_stat = os.stat(local_path)
+        with self.__sync_lock:
+            connection = self.__get_sync_connection()
+            try:
+                mode, _, _ = self.__sync_stat(connection, remote_path, end_time)
+                if stat.S_ISDIR(mode):
+                    remote_path = posixpath.join(remote_path, os.path.basename(local_path))
+                elif remote_path.endswith("/"):
+                    raise AcsToolException(AcsToolException.FEATURE_NOT_AVAILABLE,
+                                           "[ADB-TRANSPORT] %s is not a directory" % remote_path)
+
+                self.__sync_send_request(connection, "SEND", "%s,%d" % (remote_path, local_stat.st_mode))
+                with open(local_path, "rb") as local_file:
+                    data = local_file.read(self.SYNC_DATA_MAX)
+                    while data:
+                        connection.settimeout(max(end_time - time.time(), 0.001))
+                        connection.sendall(struct.pack("<4sI", "DATA", len(data)) + data)
+                        data = local_file.read(self.SYNC_DATA_MAX)
+                connection.sendall(struct.pack("<4sI", "DONE", int(local_stat.st_mtime)))
+
+                request_id, length = self.__sync_read_header(connection, end_time)
+                if request_id != "OKAY":
+                    message = self.__recv_exact(connection, length, end_time)
+                    raise AcsToolException(AcsToolException.OPERATION_FAILED,
+                                           "[ADB-TRANSPORT] Push %s failed: %s" % (local_path, message))
+
+            except socket.timeout:
+                self.__close_sync_connection()
+                return Global.FAILURE, "Push of %s has timeout after %ss!" % (local_path, timeout)
+            except (socket.error, struct.error, AcsToolException) as error:
+                self.__close_sync_connection()
+                raise self.__transport_error(error)
+
+        elapsed_time = timeout - (end_time - time.time())
+        return Global.SUCCESS, "%s: 1 file pushed. (%d bytes in %.3fs)" % (local_path, local_stat.st_size,
+                                                                           elapsed_time)
+
+    def __get_features(self):
+        """
+        Return the features of the device transport, requested once to the adb server
+
+        :rtype: list
+        """
+        with self.__features_lock:
+            if self.__features is None:
+                connection = self.__connect()
+                try:
+                    self.__request(connection, self.__features_request)
+                    length = int(self.__recv_exact(connection, 4), 16)
+                    self.__features = self.__recv_exact(connection, length).split(",")
+                except (socket.error, ValueError) as error:
+                    raise self.__transport_error(error)
+                finally:
+                    self.__close(connection)
+            return self.__features
+
+    def __read_shell(self, connection, shell_v2, streams, lines, end_time, cancel):
+        """
+        Read the shell service output until the end of the command, the timeout or the cancel
+
+        :type  streams: dict
+        :param streams: incomplete last line of each output stream
+        :type  lines: list
+        :param lines: complete lines of all the output streams, in the order they are received
+
+        :return: the command exit code (None if unknown) & an error message (None if command ended)
+        :rtype: tuple(int, str)
+        """
+        data = ""
+        while True:
+            if cancel is not None and cancel.is_canceled:
+                return None, self.CANCELED_MSG
+
+            remaining_time = end_time - time.time()
+            if remaining_time <= 0:
+                return None, "has timeout!"
+
+            readable, _, _ = select.select([connection], [], [], min(remaining_time, self.MAX_IO_WAIT_TIME))
+            if not readable:
+                continue
+
+            try:
+                chunk = connection.recv(self.READ_BUFFER_SIZE)
+            except socket.error as error:
+                return None, "connection lost (%s)" % error
+
+            if not chunk:
+                # Without shell protocol v2, connection is closed at the end of the command
+                return None, "connection lost" if shell_v2 else None
+
+            if not shell_v2:
+                self.__add_output(streams, self.SHELL_STDOUT, lines, chunk)
+                continue
+
+            # Shell protocol v2 packet: id (1 byte), length (4 bytes), payload
+            data += chunk
+            offset = 0
+            while len(data) - offset >= 5:
+                packet_id, length = struct.unpack_from("<BI", data, offset)
+                if len(data) - offset - 5 < length:
+                    break
+                payload = data[offset + 5:offset + 5 + length]
+                offset += 5 + length
+                if packet_id in streams:
+                    self.__add_output(streams, packet_id, lines, payload)
+                elif packet_id == self.SHELL_EXIT:
+                    return ord(payload[0]) if payload else 0, None
+            data = data[offset:]
+
+    @staticmethod
+    def __add_output(streams, stream_id, lines, data):
+        """
+        Split output data in lines, as the adb client output would be
+
+        :type  streams: dict
+        :param streams: incomplete last line of each output stream
+        :type  stream_id: int
+        :param stream_id: output stream of the data
+        :type  lines: list
+        :param lines: complete lines of all the output streams
+        """
+        if "\n" in data:
+            new_lines = (streams[stream_id] + data).split("\n")
+            streams[stream_id] = new_lines.pop()
+            lines.extend(line.rstrip("\r") for line in new_lines)
+        else:
+            streams[stream_id] += data
+
+    def __connect(self):
+        """
+        Open a connection to the adb server
+
+        :rtype: socket
+        """
+        try:
+            connection = socket.create_connection((str(self._adb_hostname), int(self._adb_host_port)),
+                                                  self.CONNECT_TIMEOUT)
+            connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        except socket.error as error:
+            raise self.__transport_error(error)
+        return connection
+
+    def __open_service(self, service):
+        """
+        Open a connection to a service of the device
+
+        :rtype: socket
+        """
+        connection = self.__connect()
+        try:
+            connection.sendall(self._adb_serial)
+            self.__check_status(connection, "transport")
+            self.__request(connection, service)
+        except (socket.error, ValueError, AcsToolException) as error:
+            self.__close(connection)
+            # Device may have been replaced (i.e. flashed), features are got again on next service
+            with self.__features_lock:
+                self.__features = None
+            raise self.__transport_error(error)
+        return connection
+
+    def __request(self, connection, request):
+        """
+        Send a request to the adb server and check its answer
+        """
+        if len(request) > self.MAX_REQUEST_LENGTH:
+            raise AcsToolException(AcsToolException.FEATURE_NOT_AVAILABLE,
+                                   "[ADB-TRANSPORT] Request too long (%d bytes)" % len(request))
+        connection.sendall("%04x%s" % (len(request), request))
+        self.__check_status(connection, request)
+
+    def __check_status(self, connection, request):
+        """
+        Read the adb server answer (OKAY or FAIL) to a request
+        """
+        status = self.__recv_exact(connection, 4)
+        if status != "OKAY":
+            if status == "FAIL":
+                message = self.__recv_exact(connection, int(self.__recv_exact(connection, 4), 16))
+            else:
+                message = "unexpected answer %r" % status
+            raise AcsToolException(AcsToolException.OPERATION_FAILED,
+                                   "[ADB-TRANSPORT] %s failed: %s" % (request, message))
+
+    def __get_sync_connection(self):
+        """
+        Return the sync service connection, opened if needed.
+        Must be called with sync lock held.
+
+        :rtype: socket
+        """
+        if self.__sync_connection is not None:
+            # Nothing is expected from an idle sync connection: if readable, it was closed by adb server
+            readable, _, _ = select.select([self.__sync_connection], [], [], 0)
+            if readable:
+                self.__close_sync_connection()
+
+        if self.__sync_connection is None:
+            self.__sync_connection = self.__open_service("sync:")
+        return self.__sync_connection
+
+    def __close_sync_connection(self):
+        """
+        Close the sync service connection. Must be called with sync lock held.
+        """
+        if self.__sync_connection is not None:
+            try:
+                self.__sync_connection.sendall(struct.pack("<4sI", "QUIT", 0))
+            except socket.error:
+                pass
+            self.__close(self.__sync_connection)
+            self.__sync_connection = None
+
+    def __sync_send_request(self, connection, request_id, path):
+        """
+        Send a sync service request
+        """
+        connection.sendall(struct.pack("<4sI", request_id, len(path)) + path)
+
+    def __sync_read_header(self, connection, end_time):
+        """
+        Read a sync service message header
+
+        :return: message id & length
+        :rtype: tuple(str, int)
+        """
+        return struct.unpack("<4sI", self.__recv_exact(connection, 8, end_time))
+
+    def __sync_stat(self, connection, path, end_time):
+        """
+        Stat a device file through the sync service
+
+        :return: mode (0 if file does not exist), size & modification time of the file
+        :rtype: tuple(int, int, int)
+        """
+        self.__sync_send_request(connection, "STAT", path)
+        request_id, mode, size, mtime = struct.unpack("<4sIII", self.__recv_exact(connection, 16, end_time))
+        if request_id != "STAT":
+            raise AcsToolException(AcsToolException.OPERATION_FAILED,
+                                   "[ADB-TRANSPORT] Stat %s failed: unexpected answer %r" % (path, request_id))
+        return mode, size, mtime
+
+    def __recv_exact(self, connection, size, end_time=None):
+        """
+        Read exactly size bytes from a connection
+
+        :type  end_time: float
+        :param end_time: time after which socket.timeout is raised, adb server answer is expected
+                         within CONNECT_TIMEOUT if not set
+        """
+        chunks = []
+        while size > 0:
+            if end_time is None:
+                connection.settimeout(self.CONNECT_TIMEOUT)
+            else:
+                connection.settimeout(max(end_time - time.time(), 0.001))
+            chunk = connection.recv(min(size, self.READ_BUFFER_SIZE))
+            if not chunk:
+                raise socket.error("connection closed by adb server")
+            chunks.append(chunk)
+            size -= len(chunk)
+        return "".join(chunks)
+
+    @staticmethod
+    def __close(connection):
+        """
+        Close a connection, ignoring errors
+        """
+        try:
+            connection.close()
+        except socket.error:
+            pass
+
+    @staticmethod
+    def __remove_file(file_path):
+        """
+        Remove a partially transferred file
+        """
+        if os.path.isfile(file_path):
+            try:
+                os.remove(file_path)
+            except OSError:
+                pass
+
+    @staticmethod
+    def __transport_error(error):
+        """
+        Return the AcsToolException to be raised for an adb transport error
+        """
+        if isinstance(error, AcsToolException):
+            return error
+        return AcsToolException(AcsToolException.OPERATION_FAILED, "[ADB-TRANSPORT] %s" % error)
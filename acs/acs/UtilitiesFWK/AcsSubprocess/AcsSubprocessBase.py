@@ -147,6 +147,17 @@ class AcsSubprocessBase(object):
                 # Stop the process as usual
                 self._my_process.kill()
 
+    def _wait_io(self, timeout):
+        """
+        Wait for process output and consume it.
+        Default implementation does not block, OS specific implementations
+        may wait up to timeout for something to happen on process streams.
+
+        :type  timeout: float
+        :param timeout: max time to wait in sec
+        """
+        self._check_io()
+
     def _finalize(self, execution_time, timeout, cancel=None):
         """
         Finalize process operation
@@ -261,13 +272,15 @@ class AcsSubprocessBase(object):
             exec_time = time.time()
             while not cancel.is_canceled and exec_time < end_time and self._my_process.poll() is None:
                 # if no output for x seconds, print an info
-                if int(time.time() - self._last_log_time) >= self._max_empty_log_time:
+                if int(exec_time - self._last_log_time) >= self._max_empty_log_time:
                     self._logger.info(
                         "Command execution on going for {0}".format(
-                            datetime.timedelta(seconds=int(time.time() - begin_time))))
-                    self._last_log_time = time.time()
+                            datetime.timedelta(seconds=int(exec_time - begin_time))))
+                    self._last_log_time = exec_time
 
-                self._check_io()
+                # wait for new output, but never beyond the timeout or the next "on going" message
+                next_wakeup = min(end_time, self._last_log_time + self._max_empty_log_time)
+                self._wait_io(max(0.0, next_wakeup - exec_time))
                 exec_time = time.time()
 
             # cleanup operations
@@ -42,6 +42,13 @@ class AcsSubprocessLin(AcsSubprocessBase):
     Linux AcsSubprocess implementation
     """
 
+    # Max time (in sec) to block on process streams, so that cancel requests
+    # and processes leaving their streams to a child (i.e. adb server) are handled
+    MAX_IO_WAIT_TIME = 0.1
+
+    # Polling period (in sec) used to wait the end of the process once its streams are closed
+    PROCESS_EXIT_POLL_TIME = 0.01
+
     def __init__(self, command_line, logger, silent_mode=False,
                  stdout_level=DEBUG, stderr_level=ERROR, max_empty_log_time=60):
         """
@@ -77,15 +84,18 @@ class AcsSubprocessLin(AcsSubprocessBase):
         if not isinstance(self._command_line, list):
             self._command_line = shlex.split(self._command_line)
 
-    def _check_io(self, read_to_eof=False):
+    def _check_io(self, read_to_eof=False, timeout=0):
         """
         Method that will query stdout and stderr streams, log them if needed, and store them in internal queue
 
         :type  read_to_eof: bool
         :param read_to_eof: read to the end of stdout/stderr stream
+
+        :type  timeout: float
+        :param timeout: max time to wait for data to be available on streams (in sec)
         """
         if self._my_process and self._log_level:
-            ready_to_read, _, _ = select.select(self._readable, [], [], 0)
+            ready_to_read, _, _ = select.select(self._readable, [], [], timeout)
             # While we have something to read
             while ready_to_read:
                 # Read it
@@ -106,6 +116,19 @@ class AcsSubprocessLin(AcsSubprocessBase):
                     # Stop reading
                     ready_to_read = None
 
+    def _wait_io(self, timeout):
+        """
+        Block until process streams have data, are closed or timeout expires.
+
+        :type  timeout: float
+        :param timeout: max time to wait in sec
+        """
+        if self._readable:
+            self._check_io(timeout=min(timeout, self.MAX_IO_WAIT_TIME))
+        else:
+            # Streams are closed, only the process exit is expected
+            time.sleep(min(timeout, self.PROCESS_EXIT_POLL_TIME))
+
     def _init_readable(self):
         """
         Method that will init stdout and stderr stream and bind associate log level
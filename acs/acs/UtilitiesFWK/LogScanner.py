@@ -0,0 +1,276 @@
+"""
+Copyright (C) 2018 Intel Corporation
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions
+and limitations under the License.
+
+
+SPDX-License-Identifier: Apache-2.0
+"""
+
+import fnmatch
+import os
+import threading
+import time
+
+
+class LogScanner(object):
+
+    """
+    Incremental scanner of the log files of a folder.
+
+    The scanner remembers, for each log file, the offset of the first byte not scanned yet,
+    so that each :meth:`scan` only reads the data appended since the previous one, chunk by chunk.
+    Lines containing one of the subscribed patterns are kept, and given to the subscriber callbacks.
+
+    The list of the log files is cached: only the directories modified since the previous
+    listing are listed again.
+
+    Usage::
+
+        scanner = LogScanner(report_path, "*.log")
+        scanner.subscribe("UNEXPECTED DEVICE REBOOT")
+        ...
+        scanner.scan()
+        reboot_lines = scanner.get_matches("UNEXPECTED DEVICE REBOOT")
+
+    """
+
+    # Size (in bytes) of the data read at once
+    DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+    def __init__(self, root_path, file_pattern="*.log", chunk_size=None):
+        """
+        Constructor
+
+        :param root_path: the folder containing the log files (searched recursively)
+        :type root_path: str
+
+        :param file_pattern: fnmatch pattern of the log file names
+        :type file_pattern: str
+
+        :param chunk_size: size (in bytes) of the data read at once
+        :type chunk_size: int
+
+        """
+        self._root_path = root_path
+        self._file_pattern = file_pattern
+        self._chunk_size = chunk_size or self.DEFAULT_CHUNK_SIZE
+
+        self._lock = threading.RLock()
+
+        # Subscribed patterns, {pattern: [callbacks]}
+        self._subscribers = {}
+        # Matching lines, {pattern: {log file: [lines]}}
+        self._matches = {}
+        # Offset of the first byte not scanned yet, {log file: offset}
+        self._offsets = {}
+
+        # Listed directories, {directory: (modification time, sub directories, log files)}
+        self._dirs = {}
+
+    @property
+    def root_path(self):
+        """
+        The folder containing the log files
+
+        :rtype: str
+        """
+        return self._root_path
+
+    def subscribe(self, pattern, callback=None):
+        """
+        Register a pattern to look for in the log files.
+        Only the data scanned after the subscription is searched for the pattern.
+
+        :param pattern: string to find in the log lines
+        :type pattern: str
+
+        :param callback: optional callable, called as callback(log_file, line) for each matching line
+        :type callback: callable
+
+        """
+        with self._lock:
+            callbacks = self._subscribers.setdefault(pattern, [])
+            if callback is not None:
+                callbacks.append(callback)
+            self._matches.setdefault(pattern, {})
+
+    def unsubscribe(self, pattern, callback=None):
+        """
+        Unregister a callback of a pattern, or the pattern itself (and its matching lines) if no callback is given
+
+        :param pattern: the subscribed pattern
+        :type pattern: str
+
+        :param callback: the callback to unregister
+        :type callback: callable
+
+        """
+        with self._lock:
+            if callback is None:
+                self._subscribers.pop(pattern, None)
+                self._matches.pop(pattern, None)
+            elif callback in self._subscribers.get(pattern, []):
+                self._subscribers[pattern].remove(callback)
+
+    def get_log_files(self):
+        """
+        List the log files of the folder
+
+        :return: paths of the log files
+        :rtype: list
+
+        """
+        with self._lock:
+            listed_dirs = {}
+            log_files = []
+            self.__list_dir(self._root_path, listed_dirs, log_files)
+            self._dirs = listed_dirs
+            return log_files
+
+    def scan(self, log_files=None):
+        """
+        Scan the data appended to the log files since the previous scan
+
+        :param log_files: the log files to scan, all the log files of the folder if None
+        :type log_files: list
+
+        """
+        with self._lock:
+            if log_files is None:
+                log_files = self.get_log_files()
+            for log_file in log_files:
+                self.__scan_file(log_file)
+
+    def get_matches(self, pattern, log_file=None):
+        """
+        Get the lines containing a subscribed pattern, in their order in the log files
+
+        :param pattern: the subscribed pattern
+        :type pattern: str
+
+        :param log_file: only return the lines of this log file if set
+        :type log_file: str
+
+        :return: the matching lines (with their end of line)
+        :rtype: list
+
+        """
+        with self._lock:
+            matches = self._matches.get(pattern, {})
+            if log_file is not None:
+                return list(matches.get(log_file, []))
+            return [line for file_lines in matches.itervalues() for line in file_lines]
+
+    def __list_dir(self, dir_path, listed_dirs, log_files):
+        """
+        List the log files of a directory and its sub directories,
+        reusing the previous listing if the directory was not modified
+        """
+        try:
+            mtime = os.stat(dir_path).st_mtime
+        except OSError:
+            return
+
+        previous = self._dirs.get(dir_path)
+        if previous is not None and previous[0] == mtime:
+            _, sub_dirs, dir_log_files = previous
+        else:
+            try:
+                entries = os.listdir(dir_path)
+            except OSError:
+                return
+            sub_dirs = []
+            dir_log_files = []
+            for entry in entries:
+                entry_path = os.path.join(dir_path, entry)
+                if os.path.isdir(entry_path):
+                    # Like os.walk, symbolic links to directories are not followed
+                    if not os.path.islink(entry_path):
+                        sub_dirs.append(entry_path)
+                elif fnmatch.fnmatch(entry, self._file_pattern):
+                    dir_log_files.append(entry_path)
+
+        if mtime >= int(time.time()) - 1:
+            # The directory may still be modified within the same second,
+            # do not trust its modification time at next listing
+            mtime = None
+        listed_dirs[dir_path] = (mtime, sub_dirs, dir_log_files)
+        log_files.extend(dir_log_files)
+        for sub_dir in sub_dirs:
+            self.__list_dir(sub_dir, listed_dirs, log_files)
+
+    def __scan_file(self, log_file):
+        """
+        Scan the data appended to a log file since the previous scan.
+        An incomplete last line is left for the next scan.
+        """
+        offset = self._offsets.get(log_file, 0)
+        try:
+            size = os.path.getsize(log_file)
+        except OSError:
+            return
+        if size < offset:
+            # The log file has been truncated or replaced, scan it again from its beginning
+            offset = 0
+        if size == offset or not self._subscribers:
+            self._offsets[log_file] = size
+            return
+
+        try:
+            with open(log_file, "rb") as log_stream:
+                log_stream.seek(offset)
+                remaining = ""
+                while True:
+                    chunk = log_stream.read(self._chunk_size)
+                    if not chunk:
+                        break
+                    data = remaining + chunk
+                    # Last line may continue in the next chunk
+                    end = data.rfind("\n") + 1
+                    remaining = data[end:]
+                    if end:
+                        self.__match_lines(log_file, data[:end])
+                    offset += len(chunk)
+                offset -= len(remaining)
+        except (IOError, OSError):
+            pass
+        self._offsets[log_file] = offset
+
+    def __match_lines(self, log_file, data):
+        """
+        Keep the lines containing a subscribed pattern and notify the subscribers
+
+        :param log_file: the scanned log file
+        :type log_file: str
+
+        :param data: complete lines read from the log file
+        :type data: str
+
+        """
+        found_lines = []
+        for pattern in self._subscribers:
+            # Patterns are searched in the whole data, lines are only extracted around the matches
+            index = data.find(pattern)
+            while index >= 0:
+                line_start = data.rfind("\n", 0, index) + 1
+                line_end = data.find("\n", index) + 1
+                found_lines.append((line_start, pattern, data[line_start:line_end].rstrip("\r\n") + "\n"))
+                index = data.find(pattern, line_end)
+
+        # Notify the lines in their order in the log file
+        found_lines.sort()
+        for _, pattern, line in found_lines:
+            self._matches[pattern].setdefault(log_file, []).append(line)
+            for callback in self._subscribers[pattern]:
+                callback(log_file, line)
@@ -23,6 +23,13 @@ import re
 import signal
 import shutil
 import tempfile
+import atexit
+import collections
+import fcntl
+import json
+import select
+import threading
+import time
 
 from acs_test_scripts.UseCase.UseCaseBase import UseCaseBase
 from acs.Core.Report.Live.LiveReporting import LiveReporting
@@ -30,13 +37,278 @@ from acs.UtilitiesFWK.Utilities import Global
 from acs.Core.PathManager import Paths
 
 
-class TimeoutError(Exception):
-    """Exception to be thrown when action times out"""
-    def __init__(self, value):
-        self.value = value
+class TestlibStream(object):
+    """
+    Bounded capture of one output stream of a testlib process.
+
+    Only the last lines are kept (up to max_size bytes), the first line containing each verdict marker
+    is kept aside so that the verdict can still be computed when it is dropped from the ring buffer.
+    """
+
+    def __init__(self, markers, max_size, logger):
+        self._markers = markers
+        self._max_size = max_size
+        self._logger = logger
+        self._lines = collections.deque()
+        self._size = 0
+        self._truncated_size = 0
+        self._partial = ""
+        self._verdict_lines = []
+
+    def feed(self, data):
+        """
+        Add data read from the stream, complete lines are logged and checked for the verdict markers
+        """
+        lines = (self._partial + data).split("\n")
+        self._partial = lines.pop()
+        for line in lines:
+            self.append(line + "\n")
+        if len(self._partial) > self._max_size:
+            self.append(self._partial)
+            self._partial = ""
+
+    def close(self):
+        """
+        Flush the last line if the stream does not end with a new line
+        """
+        if self._partial:
+            self.append(self._partial)
+            self._partial = ""
+
+    def append(self, line):
+        """
+        Add a complete line to the capture
+        """
+        self._logger.info(line.rstrip("\r\n"))
+        for marker in self._markers:
+            if marker in line:
+                self._markers = [m for m in self._markers if m != marker]
+                self._verdict_lines.append(line)
+
+        if len(line) > self._max_size:
+            self._truncated_size += len(line) - self._max_size
+            line = line[-self._max_size:]
+        self._lines.append(line)
+        self._size += len(line)
+        while self._size > self._max_size:
+            dropped = self._lines.popleft()
+            self._size -= len(dropped)
+            self._truncated_size += len(dropped)
+
+    def getvalue(self):
+        """
+        Return the captured text, preceded by the verdict lines if some data were dropped
+        """
+        text = "".join(self._lines)
+        if self._truncated_size:
+            text = "{0}[... {1} bytes truncated ...]\n{2}".format("".join(self._verdict_lines),
+                                                                  self._truncated_size, text)
+        return text
+
+
+class TestlibWorkerError(Exception):
+    """Exception to be thrown when the testlib worker cannot run a test"""
+    pass
+
+
+class TestlibWorkerProcess(object):
+    """
+    Test script forked by a testlib worker, provides the part of the Popen interface used by the usecase
+    """
+
+    def __init__(self, worker, request_id, pid, stdout, stderr):
+        self._worker = worker
+        self._request_id = request_id
+        self.pid = pid
+        self.stdout = stdout
+        self.stderr = stderr
+        self.returncode = None
+
+    def poll(self):
+        if self.returncode is None:
+            self.returncode = self._worker.get_exit_status(self._request_id, 0)
+        return self.returncode
 
-    def __str__(self):
-        return repr(self.value)
+    def wait(self):
+        while self.returncode is None:
+            self.returncode = self._worker.get_exit_status(self._request_id, None)
+        return self.returncode
+
+
+class TestlibWorker(object):
+    """
+    Long-lived process of a device, importing testlib once and forking it for each test script.
+    See TestlibWorker.py for the worker side.
+    """
+
+    # Max time (in sec) for the worker to import testlib
+    START_TIMEOUT = 120
+
+    # Max time (in sec) for the worker to fork the test script
+    RUN_TIMEOUT = 30
+
+    __instances = {}
+    __instances_lock = threading.Lock()
+
+    def __init__(self, serial, logger):
+        self._serial = serial
+        self._logger = logger
+        self._process = None
+        self._buffer = ""
+        self._request_id = 0
+        self._exit_status = {}
+
+    @classmethod
+    def get_instance(cls, serial, logger):
+        """
+        Return the worker of the device
+
+        :type serial: str
+        :param serial: serial number of the device
+        """
+        with cls.__instances_lock:
+            if serial not in cls.__instances:
+                cls.__instances[serial] = cls(serial, logger)
+            return cls.__instances[serial]
+
+    @classmethod
+    def stop_all(cls):
+        """
+        Stop the workers of all the devices
+        """
+        with cls.__instances_lock:
+            for worker in cls.__instances.values():
+                worker.stop()
+            cls.__instances.clear()
+
+    def is_alive(self):
+        return self._process is not None and self._process.poll() is None
+
+    def start(self):
+        """
+        Start the worker and wait for testlib to be imported, environment (PYTHONPATH) is inherited
+        """
+        self.stop()
+        script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "TestlibWorker.py")
+        if not os.path.isfile(script):
+            script += "c"
+        with open(os.devnull, "w") as devnull:
+            self._process = subprocess.Popen(["python", script], stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                             stderr=devnull, close_fds=True)
+        event = self._read_event(self.START_TIMEOUT)
+        if event is None or event.get("event") != "ready":
+            raise TestlibWorkerError("testlib worker for %s did not start" % self._serial)
+        self._logger.info("Testlib worker for %s ready, testlib imported in %.3f s"
+                          % (self._serial, event["preload_time"]))
+        for error in event["preload_errors"]:
+            self._logger.debug("Testlib worker could not import %s" % error)
+
+    def stop(self):
+        """
+        Stop the worker, a running test script is not stopped
+        """
+        if self._process is not None:
+            try:
+                self._process.stdin.close()
+                self._process.stdout.close()
+                if self._process.poll() is None:
+                    self._process.kill()
+                self._process.wait()
+            except (OSError, IOError):
+                pass
+            self._process = None
+            self._buffer = ""
+            self._exit_status.clear()
+
+    def run(self, script, args):
+        """
+        Fork the worker to run a test script with the current environment
+
+        :type script: str
+        :param script: path of the test script
+
+        :type args: list
+        :param args: arguments of the test script
+
+        :rtype: TestlibWorkerProcess
+        :return: the running test script, its stdout and stderr are read through fifos
+        """
+        self._request_id += 1
+        self._exit_status.clear()
+        fifo_dir = tempfile.mkdtemp(prefix="testlib_worker_")
+        fds = []
+        try:
+            request = {"id": self._request_id, "script": script, "argv": args, "env": dict(os.environ),
+                       "cwd": os.getcwd()}
+            for stream in ("stdout", "stderr"):
+                request[stream] = os.path.join(fifo_dir, stream)
+                os.mkfifo(request[stream])
+                # the fifo must be opened for reading before the test script opens it for writing
+                fds.append(os.open(request[stream], os.O_RDONLY | os.O_NONBLOCK))
+
+            self._process.stdin.write(json.dumps(request) + "\n")
+            self._process.stdin.flush()
+            event = self._wait_event(self._request_id, self.RUN_TIMEOUT)
+            if event is None or event["event"] != "started":
+                raise TestlibWorkerError("testlib worker for %s could not run %s" % (self._serial, script))
+
+            for fd in fds:
+                fcntl.fcntl(fd, fcntl.F_SETFL, fcntl.fcntl(fd, fcntl.F_GETFL) & ~os.O_NONBLOCK)
+            stdout, stderr = [os.fdopen(fd, "rb") for fd in fds]
+            return TestlibWorkerProcess(self, self._request_id, event["pid"], stdout, stderr)
+        except BaseException:
+            for fd in fds:
+                os.close(fd)
+            raise
+        finally:
+            shutil.rmtree(fifo_dir, ignore_errors=True)
+
+    def get_exit_status(self, request_id, timeout):
+        """
+        Return the exit status of a test script, None if it is still running after timeout
+        """
+        if request_id not in self._exit_status:
+            try:
+                self._wait_event(request_id, timeout)
+            except TestlibWorkerError as e:
+                # the test script ran but its status is lost with the worker
+                self._logger.warning(str(e))
+                self.stop()
+                return 1
+        return self._exit_status.get(request_id)
+
+    def _wait_event(self, request_id, timeout):
+        """
+        Return the next event of a request, None if nothing is received before timeout
+        """
+        end_time = None if timeout is None else time.time() + timeout
+        while True:
+            event = self._read_event(None if end_time is None else max(0, end_time - time.time()))
+            if event is None:
+                return None
+            if event["event"] == "exit":
+                self._exit_status[event["id"]] = event["status"]
+            if event["id"] == request_id:
+                return event
+
+    def _read_event(self, timeout):
+        """
+        Return the next event sent by the worker, None if nothing is received before timeout
+        """
+        fd = self._process.stdout.fileno()
+        end_time = None if timeout is None else time.time() + timeout
+        while "\n" not in self._buffer:
+            if end_time is not None and not select.select([fd], [], [], max(0, end_time - time.time()))[0]:
+                return None
+            data = os.read(fd, 4096)
+            if not data:
+                raise TestlibWorkerError("testlib worker for %s exited" % self._serial)
+            self._buffer += data
+        line, self._buffer = self._buffer.split("\n", 1)
+        return json.loads(line)
+
+
+atexit.register(TestlibWorker.stop_all)
 
 
 class Testlib_UseCase(UseCaseBase):
@@ -44,12 +316,26 @@ class Testlib_UseCase(UseCaseBase):
     Testlib usecase implementation
     """
 
+    # Markers checked by _parse_file_for_resolution
+    OUTPUT_VERDICT_MARKERS = ["[FAILED]", "raise BlockingError(", "raise TimeoutError("]
+    ERROR_VERDICT_MARKERS = ["raise FailedError("]
+
+    # Max amount of data (in bytes) kept from each output stream of the testlib process
+    MAX_CAPTURE_SIZE = 1024 * 1024
+
+    # Max delay (in sec) between two checks of the testlib process end and timeout
+    POLL_DELAY = 1.0
+
+    # Max delay (in sec) to wait for the end of the output once the testlib process has ended
+    EXIT_DRAIN_DELAY = 1.0
+
     def __init__(self, tc_name, global_config):
         """
         Constructor
         """
         UseCaseBase.__init__(self, tc_name, global_config)
         self.except_log_files = ["placeholder.txt", "testlib_default.log"]
+        self.startup_time = None
 
     def initialize(self):
         """
@@ -59,6 +345,8 @@ class Testlib_UseCase(UseCaseBase):
         result, output = Global.SUCCESS, ""
         os.environ['uiautomator_jars_path'] = os.path.normpath(os.path.join(Paths.TEST_SCRIPTS, "Lib",
                                                                             "PythonUiautomator"))
+        # Run the test scripts in a long-lived worker of the device instead of a new python process
+        self._use_testlib_worker = self._device.get_config("useTestlibWorker", "False", "str_to_bool")
         return result, output
 
     def __get_script_path(self, script_path):
@@ -113,40 +401,102 @@ class Testlib_UseCase(UseCaseBase):
         # net_ap_ssid.replace(" ", "___")) in order to prevent the name from being split and incorrectly introduced
         # in the command script args at this stage we reconstruct the command with script args so that ___ is
         # replaced back with white space
-        subp = subprocess.Popen(command_list, stdout=subprocess.PIPE, stderr=subprocess.PIPE, bufsize=1)
-        self.output = ""
-        self.error = ""
-
-        def get_output(subp):
-            with subp.stdout as o, subp.stderr as e:
-                for line in iter(o.readline, b''):
-                    self.output += line
-                    print line,
-                for line in iter(e.readline, b''):
-                    self.error += line
-                    print line,
-            subp.wait()
-
-        def handler(signum, frame):
-            raise TimeoutError("timeout reached")
-
-        signal.signal(signal.SIGALRM, handler)
-        signal.alarm(timeout)
+        subp = None
+        start_time = time.time()
+        if self._use_testlib_worker:
+            subp = self._run_in_worker(serial, test_path, command_list[2:])
+        if subp is not None:
+            process_origin = "forked by the testlib worker"
+        else:
+            process_origin = "spawned"
+            start_time = time.time()
+            subp = subprocess.Popen(command_list, stdout=subprocess.PIPE, stderr=subprocess.PIPE, bufsize=1)
+        self.output, self.error = self._capture_output(subp, timeout, start_time, process_origin)
+        return self.output, self.error
 
-        try:
-            get_output(subp)
-        except TimeoutError:
-            self.output += "raise TimeoutError('Test timed out before {0} seconds')".format(timeout)
+    def _capture_output(self, subp, timeout, start_time, process_origin):
+        """
+        Read stdout and stderr of the testlib process concurrently until it ends or times out.
+        The startup time of the test is the delay until its first output, in both process modes
+        it includes the python start-up (if any) and the imports of the test script.
+
+        :type timeout: int
+        :param timeout: max duration (in sec) of the test, 0 for no timeout
+
+        :type start_time: float
+        :param start_time: time of the request of the testlib process
+
+        :type process_origin: str
+        :param process_origin: how the testlib process was started, for the logs
+
+        :rtype: tuple
+        :return: the captured stdout and stderr
+        """
+        self.startup_time = None
+        output = TestlibStream(self.OUTPUT_VERDICT_MARKERS, self.MAX_CAPTURE_SIZE, self._logger)
+        error = TestlibStream(self.ERROR_VERDICT_MARKERS, self.MAX_CAPTURE_SIZE, self._logger)
+        streams = {subp.stdout.fileno(): output, subp.stderr.fileno(): error}
+        deadline = time.time() + timeout if timeout else None
+        last_activity = None
+        timed_out = False
+
+        while streams:
+            now = time.time()
+            if deadline is not None and now >= deadline:
+                timed_out = True
+                break
+            if last_activity is None and subp.poll() is not None:
+                last_activity = now
+            if last_activity is not None and now - last_activity > self.EXIT_DRAIN_DELAY:
+                # the process ended but a child still holds its output
+                break
+
+            wait = self.POLL_DELAY if deadline is None else min(self.POLL_DELAY, deadline - now)
+            for fd in select.select(list(streams), [], [], wait)[0]:
+                data = os.read(fd, 65536)
+                if data:
+                    if self.startup_time is None:
+                        self.startup_time = time.time() - start_time
+                        self._logger.info("Testlib process %s, first output after %.3f s"
+                                          % (process_origin, self.startup_time))
+                    streams[fd].feed(data)
+                    if last_activity is not None:
+                        last_activity = time.time()
+                else:
+                    streams.pop(fd).close()
+
+        output.close()
+        error.close()
+        subp.stdout.close()
+        subp.stderr.close()
+
+        if timed_out:
+            output.append("raise TimeoutError('Test timed out before {0} seconds')".format(timeout))
             self._logger.debug("Test timed out before {0} seconds".format(timeout))
             try:
                 os.kill(subp.pid, signal.SIGKILL)
-                os.waitpid(-1, os.WNOHANG)
                 self._logger.debug("Killed testlib process due to timeout")
             except OSError:
                 self._logger.debug("Testlib process already killed")
+        subp.wait()
+        return output.getvalue(), error.getvalue()
 
-        signal.alarm(0)
-        return self.output, self.error
+    def _run_in_worker(self, serial, test_path, args):
+        """
+        Run the test script in the testlib worker of the device
+
+        :rtype: TestlibWorkerProcess
+        :return: the running test script, None if it has to be run in a new process
+        """
+        worker = TestlibWorker.get_instance(serial, self._logger)
+        try:
+            if not worker.is_alive():
+                worker.start()
+            return worker.run(test_path, args)
+        except (TestlibWorkerError, OSError, IOError, ValueError) as e:
+            self._logger.warning("Testlib worker failure, running the test in a new process: %s" % e)
+            worker.stop()
+            return None
 
     def clean_testlib_logs(self):
         folder = os.path.normpath(self.testlib_path + "/testlib/logs/")
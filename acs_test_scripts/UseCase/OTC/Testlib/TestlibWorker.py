@@ -0,0 +1,184 @@
+#!/usr/bin/env python
+"""
+Copyright (C) 2018 Intel Corporation
+?
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+?
+http://www.apache.org/licenses/LICENSE-2.0
+?
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions
+and limitations under the License.
+?
+
+SPDX-License-Identifier: Apache-2.0
+
+Long-lived testlib worker (fork server).
+
+The worker imports the common testlib modules once, then reads run requests
+(one JSON object per line) on its stdin. Each request is executed in a child
+forked from the pristine worker, so every test script starts from a clean
+module namespace with testlib already imported.
+
+Events are written as JSON lines on the original stdout of the worker:
+    {"event": "ready", "preload_time": ..., "preload_errors": [...]}
+    {"event": "started", "id": ..., "pid": ...}
+    {"event": "exit", "id": ..., "pid": ..., "status": ...}
+
+The child redirects its stdout/stderr to the fifos given in the request,
+"started" is only sent once both fifos are opened for writing.
+"""
+import os
+import sys
+import json
+import time
+import runpy
+import traceback
+
+# Modules imported once by the worker, shared by all the forked test scripts
+PRELOAD_MODULES = ["testlib.base.base_utils",
+                   "testlib.base.base_step",
+                   "testlib.utils.logger",
+                   "testlib.utils.connections.adb",
+                   "testlib.utils.connections.local",
+                   "testlib.utils.statics.android.statics",
+                   "testlib.utils.ui.uiandroid",
+                   "testlib.scripts.android.adb.adb_steps",
+                   "testlib.scripts.android.adb.adb_utils",
+                   "testlib.scripts.android.ui.ui_steps",
+                   "testlib.scripts.android.ui.ui_utils",
+                   "testlib.scripts.android.fastboot.fastboot_steps",
+                   "testlib.scripts.android.fastboot.fastboot_utils",
+                   "testlib.scripts.connections.local.local_steps",
+                   "testlib.scripts.connections.local.local_utils",
+                   "testlib.scripts.relay.relay_steps",
+                   "testlib.scripts.wireless.wifi.wifi_steps",
+                   "testlib.scripts.wireless.bluetooth.bluetooth_steps"]
+
+
+def send_event(fd, **event):
+    """
+    Write one event line on the control file descriptor
+    """
+    data = json.dumps(event) + "\n"
+    while data:
+        data = data[os.write(fd, data):]
+
+
+def to_str(value):
+    """
+    Convert the unicode strings decoded from json to native strings
+    """
+    if isinstance(value, unicode):
+        return value.encode("utf-8")
+    if isinstance(value, list):
+        return [to_str(item) for item in value]
+    if isinstance(value, dict):
+        return dict((to_str(key), to_str(item)) for key, item in value.iteritems())
+    return value
+
+
+def preload():
+    """
+    Import the testlib modules shared by the test scripts
+
+    :rtype: list
+    :return: the modules which could not be imported
+    """
+    errors = []
+    for module in PRELOAD_MODULES:
+        try:
+            __import__(module)
+        except Exception as e:
+            errors.append("{0}: {1}".format(module, e))
+    return errors
+
+
+def run_script(request, ctrl_fd):
+    """
+    Execute the test script of the request in the forked child, never returns
+    """
+    os.environ.clear()
+    os.environ.update(request["env"])
+    os.chdir(request["cwd"])
+
+    out_fd = os.open(request["stdout"], os.O_WRONLY)
+    err_fd = os.open(request["stderr"], os.O_WRONLY)
+    null_fd = os.open(os.devnull, os.O_RDONLY)
+    send_event(ctrl_fd, event="started", id=request["id"], pid=os.getpid())
+    os.close(ctrl_fd)
+
+    os.dup2(null_fd, 0)
+    os.dup2(out_fd, 1)
+    os.dup2(err_fd, 2)
+    for fd in (null_fd, out_fd, err_fd):
+        os.close(fd)
+    sys.stdin = os.fdopen(0, "r")
+
+    script = request["script"]
+    sys.argv = [script] + request["argv"]
+    sys.path[0] = os.path.dirname(os.path.abspath(script))
+    for path in reversed(request["env"].get("PYTHONPATH", "").split(os.pathsep)):
+        if path and path not in sys.path:
+            sys.path.insert(1, path)
+
+    status = 0
+    try:
+        runpy.run_path(script, run_name="__main__")
+    except SystemExit as e:
+        status = e.code
+    except BaseException:
+        # print the traceback from the script frame, as the interpreter would do
+        etype, value, tb = sys.exc_info()
+        while tb is not None and tb.tb_frame.f_code.co_filename != script:
+            tb = tb.tb_next
+        traceback.print_exception(etype, value, tb)
+        status = 1
+    # let the interpreter join the script threads and run the exit handlers
+    sys.exit(status)
+
+
+def main():
+    # keep the original stdout for the events, stray prints go to stderr
+    ctrl_fd = os.dup(1)
+    os.dup2(2, 1)
+
+    start = time.time()
+    errors = preload()
+    send_event(ctrl_fd, event="ready", preload_time=time.time() - start, preload_errors=errors)
+
+    while True:
+        line = sys.stdin.readline()
+        if not line:
+            break
+        request = to_str(json.loads(line))
+
+        sys.stdout.flush()
+        sys.stderr.flush()
+        pid = os.fork()
+        if pid == 0:
+            # the child never returns in the worker loop
+            try:
+                run_script(request, ctrl_fd)
+            except SystemExit:
+                # end of the script: the interpreter joins its threads and runs the exit handlers
+                raise
+            except BaseException:
+                # request could not be set up
+                traceback.print_exc()
+            os._exit(1)
+
+        _, status = os.waitpid(pid, 0)
+        if os.WIFSIGNALED(status):
+            status = -os.WTERMSIG(status)
+        else:
+            status = os.WEXITSTATUS(status)
+        send_event(ctrl_fd, event="exit", id=request["id"], pid=pid, status=status)
+
+
+if __name__ == "__main__":
+    main()
@@ -540,28 +540,26 @@ class MultiMediaSetting:
                                 stderr=subprocess.STDOUT, shell=True)
 
     def clearLogs(self):
-        self.executeCommandWithPopen("adb logcat -c")
+        g_common_obj.get_test_device().get_logcat_monitor().clear()
 
     def check_logs(self, check_str, check_time=5):
         self.check_log_flag = 0
-        while(self.check_log_flag == 0 and check_time >= 0):
-            self.fdp = self.executeCommandWithPopen("adb logcat -d | grep \"%s\"" % check_str)
-            t_str = self.fdp.stdout.read()
-            logger.debug("t_str=%s" % t_str)
-            if check_str in t_str:
-                self.check_log_flag = 1
-                return True
-            time.sleep(5)
-            check_time -= 5
+        t_str = g_common_obj.get_test_device().get_logcat_monitor().wait_for(check_str, check_time)
+        logger.debug("t_str=%s" % t_str)
+        if t_str is not None:
+            self.check_log_flag = 1
+            return True
         return False
 
     def checkLogs_start(self, check_str):
-        if thread.start_new_thread(self.check_logs, (check_str,)):
-            return True
-        else:
-            return False
+        # lines are indexed by the logcat monitor until checkLogs_end
+        self.check_log_flag = 0
+        g_common_obj.get_test_device().get_logcat_monitor().watch(check_str)
+        return True
 
     def checkLogs_end(self, check_str):
+        if g_common_obj.get_test_device().get_logcat_monitor().find(check_str):
+            self.check_log_flag = 1
         logger.debug("self.check_log_flag=%s" % self.check_log_flag)
         if self.check_log_flag != 1:
             self.check_log_flag = -1
@@ -853,11 +851,12 @@ class MultiMediaHandle:
         return str(activity_list)
 
     def check_current_logcat_msg(self, msg, clear_log=False):
+        logcat = g_common_obj.get_test_device().get_logcat_monitor()
         if clear_log:
-            execute_adb_command("logcat -c")
-        time.sleep(1)
-        msg_output = execute_adb_command("logcat -d |grep '%s'" % msg)
-        if len(msg_output) > 0:
+            logcat.clear()
+        # give 1 second to the device to log the message
+        msg_output = logcat.wait_for(msg, 1)
+        if msg_output is not None:
             logger.debug("Get %s in logcat" % msg)
             return True
         else:
@@ -1170,7 +1169,7 @@ class MultiMediaBasicTestCase:
         logger.debug(self.tag + "get source file :{0}".format(case_name))
         self.cfg_case = self.config.read(self.cfg_file, case_name)
         g_common_obj.adb_cmd_common("root")
-        g_common_obj.adb_cmd_common("logcat -c")
+        g_common_obj.get_test_device().get_logcat_monitor().clear()
         g_common_obj.adb_cmd_capture_msg(" rm -rf /sdcard/DCIM/Camera/*")
         g_common_obj.adb_cmd_capture_msg(self.cfg_case.get("remove_video"))
 
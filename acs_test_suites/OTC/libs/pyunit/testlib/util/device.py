@@ -23,6 +23,8 @@ from uiautomator import Device
 from testlib.util.log import Logger
 from testlib.util.process import shell_command
 from testlib.util.process import shell_command_nomsg, shell_command_ext
+from testlib.util.screen_capture import ScreenCapture
+from testlib.util.logcat import LogcatMonitor
 
 
 LOG = Logger.getlogger(__name__)
@@ -58,6 +60,8 @@ class TestDevice(object):
         if self.serial:
             self.adb_prefix += '-s %s ' % self.serial
         self.uia_device = None
+        self.screen_capture = None
+        self.logcat_monitors = {}
 
     def get_device(self):
         """
@@ -307,6 +311,28 @@ class TestDevice(object):
         d = self.get_device()
         d.screenshot(scname)
 
+    def get_screen_capture(self):
+        """
+        Raw screen capture of the device, without PNG file.
+
+        Use capture(box) to get the box of the screen as RGB image.
+        """
+        if self.screen_capture is None:
+            self.screen_capture = ScreenCapture(self.adb_prefix)
+        return self.screen_capture
+
+    def get_logcat_monitor(self, buffer=None):
+        """
+        Logcat stream of the device, to search or wait log lines
+        without dumping the whole logcat buffer.
+
+        parameter buffer is the logcat buffer to stream, default ones if None
+
+        """
+        if buffer not in self.logcat_monitors:
+            self.logcat_monitors[buffer] = LogcatMonitor(self.adb_prefix, buffer)
+        return self.logcat_monitors[buffer]
+
     def restart_server(self):
         """
         restart_server
@@ -17,8 +17,19 @@ and limitations under the License.
 SPDX-License-Identifier: Apache-2.0
 '''
 import time
+import Queue
 import threading
 
+from testlib.util.common import g_common_obj
+from testlib.util.logcat import logged_after
+
+# event log entries of the activity manager, written when an application
+# crashes or does not respond, before the system shows its dialog
+CRASH_EVENT = " am_crash: "
+ANR_EVENT = " am_anr: "
+# time (in ms) given to the system to show the dialog of an event
+DIALOG_TIMEOUT = 5000
+
 
 class ExceptionHandle(threading.Thread):
     """
@@ -27,33 +38,80 @@ class ExceptionHandle(threading.Thread):
     def stop_exp_handle().
     The spec is to start a thread which searches the right text or widget
     , find it and do the right operation in order not to block the auto test.
+
+    The thread waits the am_crash / am_anr entries of the event log streamed
+    from the device, the UI is only queried to close the dialog of an event.
     """
 
-    def __init__(self, deviceObj):
+    def __init__(self, deviceObj, logcat_monitor=None):
         threading.Thread.__init__(self)
+        self.daemon = True
         self.thread_stop = False
         self.d = deviceObj
+        if logcat_monitor is None:
+            logcat_monitor = g_common_obj.get_test_device().get_logcat_monitor("events")
+        self.logcat = logcat_monitor
         self.stopped_exception = False
         self.no_responding_exception = False
+        # received events [(host time, "crash" or "anr", event log line)]
+        self.events = []
+        self._pending = Queue.Queue()
+        # timestamp of the last event logged before the thread started
+        self._start_time = None
+
+    def _on_crash(self, line):
+        self._on_event("crash", line)
+
+    def _on_anr(self, line):
+        self._on_event("anr", line)
+
+    def _on_event(self, kind, line):
+        if not logged_after(line, self._start_time):
+            # old entry of the event log, streamed when the logcat stream starts
+            return
+        self.events.append((time.time(), kind, line))
+        self._pending.put(kind)
+
+    def get_report(self):
+        """
+        Return the number of crashes and anr, and the received events
+        """
+        return {"crash": len([e for e in self.events if e[1] == "crash"]),
+                "anr": len([e for e in self.events if e[1] == "anr"]),
+                "events": list(self.events)}
 
     def check_exception(self):
         self.stop_exception()
         self.no_respond_exception()
 
-    def stop_exception(self):
-        if self.d(textContains="has stopped"):
+    def stop_exception(self, timeout=0):
+        if self.d(textContains="has stopped").wait.exists(timeout=timeout):
             self.d(text="OK").click()
             self.stopped_exception = True
 
-    def no_respond_exception(self):
-        if self.d(textContains="isn't responding."):
+    def no_respond_exception(self, timeout=0):
+        if self.d(textContains="isn't responding.").wait.exists(timeout=timeout):
             self.d(text="OK").click()
             self.no_responding_exception = True
 
     def run(self):
-        while self.thread_stop is False:
-            self.check_exception()
-            time.sleep(2)
+        self._start_time = self.logcat.last_log_time()
+        self.logcat.watch(CRASH_EVENT, self._on_crash)
+        self.logcat.watch(ANR_EVENT, self._on_anr)
+        try:
+            while self.thread_stop is False:
+                try:
+                    # timeout lets stop() end the thread
+                    kind = self._pending.get(True, 1)
+                except Queue.Empty:
+                    continue
+                if kind == "crash":
+                    self.stop_exception(DIALOG_TIMEOUT)
+                else:
+                    self.no_respond_exception(DIALOG_TIMEOUT)
+        finally:
+            self.logcat.unwatch(CRASH_EVENT, self._on_crash)
+            self.logcat.unwatch(ANR_EVENT, self._on_anr)
 
     def stop(self):
         self.thread_stop = True
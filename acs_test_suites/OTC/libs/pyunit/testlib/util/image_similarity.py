@@ -0,0 +1,176 @@
+'''
+Copyright (C) 2018 Intel Corporation
+?
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+?
+http://www.apache.org/licenses/LICENSE-2.0
+?
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions
+and limitations under the License.
+?
+
+SPDX-License-Identifier: Apache-2.0
+
+NumPy frame similarity.
+
+Two scores are computed on frames resized to REGULAR_SIZE:
+    - the tile histogram score of OTCImage.calc_similar: mean, on 16 tiles,
+      of the per bin similarity of their RGB histograms
+    - the SSIM (Wang et al.) of the luminance, on SSIM_WINDOW square windows
+
+Tiles and windows are views on the frame arrays, a frame can be compared
+to several previous frames at once (see FrameWindow).
+'''
+import collections
+import numpy as np
+
+REGULAR_SIZE = (256, 256)
+TILE_SIZE = (64, 64)
+SSIM_WINDOW = 7
+SSIM_C1 = (0.01 * 255) ** 2
+SSIM_C2 = (0.03 * 255) ** 2
+
+
+class Frame(object):
+    """
+    Frame converted once for all its comparisons
+    """
+
+    def __init__(self, img, size=REGULAR_SIZE):
+        regular = img.resize(size)
+        self.rgb = np.asarray(regular.convert('RGB'))
+        self.gray = np.asarray(regular.convert('L'), dtype=np.float64)
+        self._histograms = None
+
+    @property
+    def histograms(self):
+        """
+        RGB histograms of the tiles, shape (tiles, 768)
+        """
+        if self._histograms is None:
+            self._histograms = tile_histograms(self.rgb)
+        return self._histograms
+
+
+def tile_histograms(rgb, tile_size=TILE_SIZE):
+    """
+    Compute the RGB histograms (as PIL Image.histogram) of the tiles of a frame
+
+    rgb: uint8 array of shape (height, width, 3)
+    Return an array of shape (tiles, 768)
+    """
+    h, w, _ = rgb.shape
+    pw, ph = tile_size
+    assert w % pw == h % ph == 0
+    rows, cols = h / ph, w / pw
+    # view (row, y in tile, col, x in tile, band), no tile is copied
+    tiles = rgb.reshape(rows, ph, cols, pw, 3)
+    # bin of each value: (tile * 3 + band) * 256 + value
+    offsets = ((np.arange(rows).reshape(rows, 1, 1, 1, 1) * cols +
+                np.arange(cols).reshape(1, 1, cols, 1, 1)) * 768 +
+               np.arange(0, 768, 256).reshape(1, 1, 1, 1, 3)).astype(np.int32)
+    bins = tiles + offsets
+    return np.bincount(bins.ravel(), minlength=rows * cols * 768).reshape(rows * cols, 768)
+
+
+def hist_similar(lh, rh):
+    """
+    Histogram score of tile histograms, the last axis being the bins
+
+    lh, rh: histograms of shape (..., tiles, 768), broadcast together
+    Return the scores, averaged on the tiles
+    """
+    lh = np.asarray(lh, dtype=np.float64)
+    rh = np.asarray(rh, dtype=np.float64)
+    top = np.maximum(lh, rh)
+    # bins empty on both sides are equal
+    bin_similar = 1 - np.abs(lh - rh) / np.where(top == 0, 1, top)
+    return bin_similar.mean(axis=-1).mean(axis=-1)
+
+
+def calc_similar(li, ri):
+    """
+    Histogram score of two RGB images of the same size, as OTCImage.calc_similar
+    """
+    return float(hist_similar(tile_histograms(np.asarray(li)), tile_histograms(np.asarray(ri))))
+
+
+def _box_sums(values, size, axis):
+    """
+    Sums of size consecutive values along an axis, from a cumulative sum
+    """
+    cumsum = values.cumsum(axis=axis)
+    first = [slice(None)] * values.ndim
+    first[axis] = slice(size - 1, None)
+    sums = cumsum[tuple(first)].copy()
+    dst, src = list(first), list(first)
+    dst[axis] = slice(1, None)
+    src[axis] = slice(None, -size)
+    sums[tuple(dst)] -= cumsum[tuple(src)]
+    return sums
+
+
+def _box_filter(values, size):
+    """
+    Mean on the size x size windows fully inside the frames, on the 2 last axes
+    """
+    return _box_sums(_box_sums(values, size, values.ndim - 1), size, values.ndim - 2) / float(size * size)
+
+
+def ssim(lg, rg, window=SSIM_WINDOW):
+    """
+    Mean SSIM of luminance frames
+
+    lg, rg: float arrays of shape (..., height, width), broadcast together
+    Return the mean SSIM on all the windows
+    """
+    # statistics of each side are computed on its own frames, not on the broadcast ones
+    mu_l = _box_filter(lg, window)
+    mu_r = _box_filter(rg, window)
+    # unbiased estimators, as the reference implementation
+    cov_norm = window * window / (window * window - 1.0)
+    var_l = cov_norm * (_box_filter(lg * lg, window) - mu_l * mu_l)
+    var_r = cov_norm * (_box_filter(rg * rg, window) - mu_r * mu_r)
+    cov = cov_norm * (_box_filter(lg * rg, window) - mu_l * mu_r)
+    ssim_map = ((2 * mu_l * mu_r + SSIM_C1) * (2 * cov + SSIM_C2) /
+                ((mu_l * mu_l + mu_r * mu_r + SSIM_C1) * (var_l + var_r + SSIM_C2)))
+    return ssim_map.mean(axis=-1).mean(axis=-1)
+
+
+def compare(frame, previous):
+    """
+    Compare a frame to previous frames in one batched call
+
+    Return [(histogram score, ssim)] in the order of previous
+    """
+    if not previous:
+        return []
+    hists = hist_similar(frame.histograms, np.stack([p.histograms for p in previous]))
+    ssims = ssim(frame.gray, np.stack([p.gray for p in previous]))
+    return zip(hists.tolist(), ssims.tolist())
+
+
+class FrameWindow(object):
+    """
+    Rolling window of the last frames of a playback
+    """
+
+    def __init__(self, length=5, size=REGULAR_SIZE):
+        self.size = size
+        self.frames = collections.deque(maxlen=length)
+
+    def push(self, img):
+        """
+        Compare a new frame to the frames of the window, then add it to the window
+
+        Return [(histogram score, ssim)], from the oldest frame to the latest one
+        """
+        frame = Frame(img, self.size)
+        scores = compare(frame, list(self.frames))
+        self.frames.append(frame)
+        return scores
@@ -0,0 +1,242 @@
+'''
+Copyright (C) 2018 Intel Corporation
+?
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+?
+http://www.apache.org/licenses/LICENSE-2.0
+?
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions
+and limitations under the License.
+?
+
+SPDX-License-Identifier: Apache-2.0
+
+Logcat cursor.
+
+One "adb logcat" process per device streams the log lines to the host,
+each line is read once and numbered. A mark is the number of the next
+line to read: callers search or wait the lines from a mark, instead of
+dumping the whole logcat buffer for each probe.
+
+Lines logged before a clear may still be read from the stream after it:
+searches since the last clear also skip the lines logged before it,
+by their timestamp.
+'''
+import re
+import shlex
+import subprocess
+import threading
+import time
+import collections
+
+from testlib.util.log import Logger
+from testlib.util.process import shell_command
+
+LOG = Logger.getlogger(__name__)
+
+# Max number of lines kept in memory (per device and per watched pattern)
+MAX_LINES = 200000
+# logcat -v threadtime timestamp, used to restart the stream where it stopped
+TIMESTAMP = re.compile(r"^(\d\d-\d\d \d\d:\d\d:\d\d\.\d\d\d) ")
+
+
+def logged_after(line, log_time):
+    """
+    Return False if the line was logged at or before log_time (a logcat timestamp)
+    """
+    match = TIMESTAMP.match(line)
+    return log_time is None or match is None or match.group(1) > log_time
+
+
+class LogcatMonitor(object):
+    """
+    Logcat stream of a device, with a cursor on its lines
+    """
+
+    def __init__(self, adb_prefix="adb ", buffer=None):
+        self.adb_prefix = adb_prefix
+        self.cmd = shlex.split(adb_prefix) + ["logcat", "-v", "threadtime"]
+        if buffer is not None:
+            # i.e. "events" for the system events (am_crash, am_anr ...)
+            self.cmd += ["-b", buffer]
+        self._buffer_option = " -b %s" % buffer if buffer is not None else ""
+        self._cond = threading.Condition()
+        # next line number
+        self._seq = 0
+        # mark of the last clear, lines before it are ignored by default
+        self._clear_mark = 0
+        # timestamp of the last line logged before the last clear
+        self._clear_time = None
+        self._lines = collections.deque(maxlen=MAX_LINES)
+        # watched patterns, {pattern: deque([(line number, line)])}
+        self._matches = {}
+        # {pattern: [callback(line)]}
+        self._callbacks = {}
+        self._last_time = None
+        self._proc = None
+        self._reader = None
+        self._stopped = False
+
+    def start(self):
+        """
+        Start the logcat stream, if not started yet
+        """
+        with self._cond:
+            if self._reader is not None and self._reader.is_alive():
+                return
+            self._stopped = False
+            self._reader = threading.Thread(target=self._read)
+            self._reader.daemon = True
+            self._reader.start()
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            proc = self._proc
+        if proc is not None:
+            try:
+                proc.kill()
+            except OSError:
+                pass
+
+    def _read(self):
+        while not self._stopped:
+            cmd = list(self.cmd)
+            if self._last_time is not None:
+                # stream restarted (i.e. device reboot): skip the lines already read
+                cmd += ["-T", self._last_time]
+            try:
+                self._proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+            except OSError as e:
+                LOG.debug("Cannot start logcat: %s" % e)
+                time.sleep(1)
+                continue
+            for line in iter(self._proc.stdout.readline, ""):
+                self._add_line(line.rstrip("\r\n"))
+            self._proc.wait()
+            if not self._stopped:
+                time.sleep(1)
+
+    def _add_line(self, line):
+        match = TIMESTAMP.match(line)
+        if match:
+            self._last_time = match.group(1)
+        with self._cond:
+            seq = self._seq
+            self._seq += 1
+            self._lines.append((seq, line))
+            callbacks = []
+            for pattern, matches in self._matches.iteritems():
+                if pattern in line:
+                    matches.append((seq, line))
+                    callbacks.extend(self._callbacks.get(pattern, []))
+            self._cond.notify_all()
+        for callback in callbacks:
+            try:
+                callback(line)
+            except Exception as e:
+                LOG.debug("Logcat callback failed: %s" % e)
+
+    def mark(self):
+        """
+        Return the mark of the next line
+        """
+        self.start()
+        with self._cond:
+            return self._seq
+
+    def last_log_time(self):
+        """
+        Return the timestamp of the last line logged on the device, None if the buffer is empty
+        """
+        log_time = None
+        lines = shell_command(self.adb_prefix + "logcat -v threadtime -d -t 1" + self._buffer_option)[1]
+        for line in lines:
+            match = TIMESTAMP.match(line)
+            if match:
+                log_time = match.group(1)
+        return log_time
+
+    def clear(self):
+        """
+        Clear the logcat buffer of the device, following searches ignore the previous lines
+        """
+        self.start()
+        clear_time = self.last_log_time()
+        shell_command(self.adb_prefix + "logcat -c")
+        with self._cond:
+            self._clear_mark = self._seq
+            self._clear_time = clear_time
+
+    def watch(self, pattern, callback=None):
+        """
+        Index the lines containing pattern, call callback(line) for each new one
+        """
+        self.start()
+        with self._cond:
+            if pattern not in self._matches:
+                self._matches[pattern] = collections.deque(
+                    ((seq, line) for seq, line in self._lines if pattern in line), MAX_LINES)
+            if callback is not None:
+                self._callbacks.setdefault(pattern, []).append(callback)
+
+    def unwatch(self, pattern, callback=None):
+        with self._cond:
+            if callback is None:
+                self._matches.pop(pattern, None)
+                self._callbacks.pop(pattern, None)
+            elif callback in self._callbacks.get(pattern, []):
+                self._callbacks[pattern].remove(callback)
+
+    def _find(self, pattern, since, log_time=None):
+        if pattern in self._matches:
+            lines = self._matches[pattern]
+        else:
+            lines = self._lines
+        found = []
+        # newest lines first, up to the mark
+        for seq, line in reversed(lines):
+            if seq < since:
+                break
+            if pattern in line and logged_after(line, log_time):
+                found.append(line)
+        found.reverse()
+        return found
+
+    def find(self, pattern, since=None):
+        """
+        Return the lines containing pattern, from the mark since (the last clear by default)
+        """
+        self.start()
+        with self._cond:
+            if since is None:
+                return self._find(pattern, self._clear_mark, self._clear_time)
+            return self._find(pattern, since)
+
+    def wait_for(self, pattern, timeout, since=None):
+        """
+        Wait a line containing pattern, from the mark since (the last clear by default)
+
+        Return the first matching line, None on timeout
+        """
+        self.start()
+        deadline = time.time() + timeout
+        with self._cond:
+            log_time = None
+            if since is None:
+                since, log_time = self._clear_mark, self._clear_time
+            while True:
+                lines = self._find(pattern, since, log_time)
+                if lines:
+                    return lines[0]
+                # only the new lines are searched after a wait
+                since = self._seq
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
@@ -22,7 +22,13 @@ import os
 import time
 from PIL import Image
 from testlib.util.common import g_common_obj
+from testlib.util.screen_capture import ScreenCaptureError
 from testlib.multimedia.base import getTmpDir
+try:
+    from testlib.util import image_similarity
+except ImportError:
+    # numpy not installed, use the pure python histogram score
+    image_similarity = None
 
 
 class OTCImage():
@@ -48,6 +54,8 @@ class OTCImage():
         return sum(1 - (0 if l1 == r else float(abs(l1 - r)) / max(l1, r)) for l1, r in zip(lh, rh)) / len(lh)
 
     def __calc_similar(self, li, ri):
+        if image_similarity is not None:
+            return image_similarity.calc_similar(li, ri)
         return sum(self.__hist_similar(l.histogram(),
                    r.histogram()) for l, r in zip(self.__split_image(li), self.__split_image(ri))) / 16.0
 
@@ -70,6 +78,19 @@ class OTCImage():
         li, ri = self.__make_regalur_image(im1), self.__make_regalur_image(im2)
         return ("%." + str(median) + "f") % self.__calc_similar(li, ri)
 
+    # windowed ssim of the luminance between picA and picB, needs numpy
+    def calc_ssim(self, im1, im2, median=4):
+        if im1 is None or im2 is None:
+            return 0
+        li, ri = image_similarity.Frame(im1), image_similarity.Frame(im2)
+        return ("%." + str(median) + "f") % image_similarity.ssim(li.gray, ri.gray)
+
+    # similar and ssim between a picture and the previous pictures of a window, needs numpy
+    # window: image_similarity.FrameWindow, the picture is added to it
+    def calc_similar_window(self, im, window, median=4):
+        fmt = "%." + str(median) + "f"
+        return [(fmt % hist, fmt % ssim) for hist, ssim in window.push(im)]
+
     # git ssim DATA between picA and picB
     def make_doc_data(self, lf, rf):
         li, ri = self.__make_regalur_image(Image.open(lf)), self.__make_regalur_image(Image.open(rf))
@@ -97,22 +118,34 @@ class OTCImage():
 
     def getWidgetImage(self, device, widget, imageName='widgetImage.png', save=False):
         imageName = str(time.time()) + "_" + imageName
-        path = self.saveImage(device)
-        img = Image.open(path)
         box = widget.bounds
         box = (box.get('left'), box.get('top'), box.get('right'), box.get('bottom'))
-        img = img.crop(box)
+        img = self.captureScreen(box)
+        if img is None:
+            path = self.saveImage(device)
+            img = Image.open(path)
+            img = img.crop(box)
+            os.system("rm -rf " + path)
         if save:
             img.save(imageName)
-        os.system("rm -rf " + path)
         return img
 
+    # capture the box of the screen from the raw framebuffer, None if not supported
+    def captureScreen(self, box=None):
+        try:
+            return g_common_obj.get_test_device().get_screen_capture().capture(box)
+        except (ScreenCaptureError, OSError) as e:
+            print "raw screen capture failed, use screenshot: %s" % e
+            return None
+
     def getPicByCoor(self, device, x, y, w, h, imageName="savescreen.png", save=False):
-        path = self.saveImage(device)
-        print path
-        img = Image.open(path)
         box = (x, y, x + w, y + h)
-        img = img.crop(box)
+        img = self.captureScreen(box)
+        if img is None:
+            path = self.saveImage(device)
+            print path
+            img = Image.open(path)
+            img = img.crop(box)
         if save:
             path = img.save(imageName)
             print "screenshot, path is [%s]" % path
@@ -23,7 +23,14 @@ import subprocess
 import ctypes
 import signal
 import re
-import tempfile
+import threading
+import Queue
+
+# Size of the data read at once on the process outputs
+READ_SIZE = 65536
+# Time given to the output readers to finish once the process exited.
+# Daemons started by the command (i.e. adb server) may keep its outputs open.
+DRAIN_TIMEOUT = 0.5
 
 
 def killall(ppid_str):
@@ -77,32 +84,129 @@ def killall(ppid_str):
     return None
 
 
-def shell_command_nomsg(cmd, timeout=90):
-    """Execute shell command without message"""
-    cmd_open = subprocess.Popen(cmd, shell=True)
-    if not cmd_open:
-        return -1
-    t_timeout = timeout
-    tick = 3
-    ret = None
-    while True:
-        time.sleep(tick)
-        ret = cmd_open.poll()
-        if ret is not None:
-            break
-
-        if t_timeout > 0:
-            t_timeout -= tick
-
-        if t_timeout <= 0:
-            # timeout, kill command
+def _read_output(stream, name, events):
+    """
+    Read a process output until its end, sending each chunk read as an event
+    """
+    fd = stream.fileno()
+    try:
+        while True:
             try:
-                cmd_open.kill()
-                cmd_open.wait()
+                data = os.read(fd, READ_SIZE)
             except OSError:
-                pass
-            ret = -1
-            break
+                break
+            if not data:
+                break
+            events.put((name, data))
+    finally:
+        stream.close()
+        events.put((name, None))
+
+
+def _wait_process(process, events):
+    """
+    Wait the process exit, sending its exit code as an event
+    """
+    events.put(("exit", process.wait()))
+
+
+def _kill_process(process):
+    """
+    Kill the process and all the processes of its group
+    """
+    if platform.system() == "Windows":
+        killall(process.pid)
+        return
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except OSError:
+        # group already dead, kill the children which left it
+        killall(process.pid)
+
+
+def _execute(cmd, timeout=None, callbk=None, capture=True):
+    """
+    Method description:
+        execute a shell command, waiting its exit until the timeout.
+        The outputs are read while the command runs, so that it never
+        blocks on a full pipe, and the stdout chunks are given to callbk
+        as soon as they are read.
+        On timeout, the process group of the command is killed.
+
+    Return [exit_code, stdout, stderr], exit_code is None on timeout
+    """
+    popen_args = {"shell": True}
+    if capture:
+        popen_args["stdout"] = subprocess.PIPE
+        popen_args["stderr"] = subprocess.PIPE
+    if platform.system() != "Windows":
+        # own process group, to kill the command and its children at once
+        popen_args["preexec_fn"] = os.setsid
+    cmd_open = subprocess.Popen(cmd, **popen_args)
+
+    events = Queue.Queue()
+    pending = set(["exit"])
+    outputs = {"stdout": [], "stderr": []}
+    threads = [threading.Thread(target=_wait_process, args=(cmd_open, events))]
+    if capture:
+        for name in ("stdout", "stderr"):
+            threads.append(threading.Thread(target=_read_output,
+                                            args=(getattr(cmd_open, name), name, events)))
+            pending.add(name)
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+
+    exit_code = None
+    deadline = None if timeout is None else time.time() + timeout
+    # set when the command exited (or was killed), to read its last outputs
+    drain_deadline = None
+    try:
+        while pending:
+            if drain_deadline is None:
+                wait_time = None if deadline is None else deadline - time.time()
+            else:
+                wait_time = drain_deadline - time.time()
+            try:
+                if wait_time is None:
+                    # a get without timeout could not be interrupted by Ctrl-C
+                    name, data = events.get(True, 3600 * 24 * 365)
+                elif wait_time <= 0:
+                    raise Queue.Empty()
+                else:
+                    name, data = events.get(True, wait_time)
+            except Queue.Empty:
+                if "exit" in pending:
+                    # timeout, kill command
+                    _kill_process(cmd_open)
+                    pending.discard("exit")
+                    drain_deadline = time.time() + DRAIN_TIMEOUT
+                    continue
+                # outputs kept open by a daemon started by the command
+                break
+
+            if name == "exit":
+                if "exit" in pending:
+                    exit_code = data
+                pending.discard(name)
+                drain_deadline = time.time() + DRAIN_TIMEOUT
+            elif data is None:
+                pending.discard(name)
+            else:
+                outputs[name].append(data)
+                if name == "stdout" and callbk and callable(callbk):
+                    callbk(data)
+    except BaseException:
+        _kill_process(cmd_open)
+        raise
+    return [exit_code, "".join(outputs["stdout"]), "".join(outputs["stderr"])]
+
+
+def shell_command_nomsg(cmd, timeout=90):
+    """Execute shell command without message"""
+    ret = _execute(cmd, timeout, capture=False)[0]
+    if ret is None:
+        ret = -1
     return ret
 
 
@@ -111,28 +215,13 @@ def shell_command(cmd_str, timeout_second=90):
     Method description:
         execute shell command, and return result in sync mode
     """
-    tmp_process = subprocess.Popen(cmd_str,
-                                   shell=True,
-                                   stdout=subprocess.PIPE,
-                                   stderr=subprocess.PIPE)
-    time_cnt_float = 0
-    exit_code_int = None
+    exit_code_int, stdout_log, _ = _execute(cmd_str, timeout_second)
     result_array = []
-    while time_cnt_float < timeout_second:
-        exit_code_int = tmp_process.poll()
-        if exit_code_int is not None:
-            break
-        time_cnt_float += 0.2
-        time.sleep(0.2)
-
     if exit_code_int is None:
-        killall(tmp_process.pid)
         exit_code_int = -1
-        result_array = []
     elif not cmd_str.endswith('&'):
-        while True:
-            tmp_line = tmp_process.stdout.readline()
-            if not tmp_line or tmp_line.find('daemon started') >= 0:
+        for tmp_line in stdout_log.splitlines(True):
+            if tmp_line.find('daemon started') >= 0:
                 break
             result_array.append(tmp_line)
     return [exit_code_int, result_array]
@@ -145,47 +234,11 @@ def shell_command_ext(cmd="",
                       callbk=None):
     """shell executor, return [exitcode, stdout/stderr]
        timeout: None means unlimited timeout
+       stdout_file/stderr_file: kept for compatibility, outputs are
+       captured in memory
+       callbk: called with each stdout chunk, as soon as it is read
     """
-    if stdout_file is None:
-        stdout_file = tempfile.mktemp(prefix="shell_stdout_")
-
-    if stderr_file is None:
-        stderr_file = tempfile.mktemp(prefix="shell_stderr_")
-
-    exit_code = None
-    wbuffile1 = file(stdout_file, "w")
-    wbuffile2 = file(stderr_file, "w")
-    rbuffile1 = file(stdout_file, "r")
-    rbuffile2 = file(stderr_file, "r")
-    cmd_open = subprocess.Popen(args=cmd,
-                                shell=True,
-                                stdout=wbuffile1,
-                                stderr=wbuffile2)
-    rbuffile1.seek(0)
-    rbuffile2.seek(0)
-    while True:
-        exit_code = cmd_open.poll()
-        if exit_code is not None:
-            break
-        if callbk and callable(callbk):
-            callbk(rbuffile1.read())
-        if timeout is not None:
-            timeout -= 0.2
-            if timeout <= 0:
-                exit_code = "timeout"
-                killall(cmd_open.pid)
-                time.sleep(2)
-                break
-        time.sleep(0.2)
-
-    rbuffile1.seek(0)
-    rbuffile2.seek(0)
-    stdout_log = rbuffile1.read()
-    stderr_log = rbuffile2.read()
-    wbuffile1.close()
-    wbuffile2.close()
-    rbuffile1.close()
-    rbuffile2.close()
-    os.remove(stdout_file)
-    os.remove(stderr_file)
+    exit_code, stdout_log, stderr_log = _execute(cmd, timeout, callbk)
+    if exit_code is None:
+        exit_code = "timeout"
     return [exit_code, stdout_log, stderr_log]
@@ -0,0 +1,170 @@
+'''
+Copyright (C) 2018 Intel Corporation
+?
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+?
+http://www.apache.org/licenses/LICENSE-2.0
+?
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions
+and limitations under the License.
+?
+
+SPDX-License-Identifier: Apache-2.0
+
+Raw screen capture.
+
+The screen is read with "adb exec-out screencap" (no PNG encoding on the
+device, no file on the host) into a buffer reused by all the captures.
+Only the requested box is decoded from the buffer.
+'''
+import io
+import shlex
+import struct
+import subprocess
+import threading
+import time
+import collections
+from PIL import Image
+
+from testlib.util.log import Logger
+
+LOG = Logger.getlogger(__name__)
+
+# screencap header: width, height, pixel format (and data space since Android P)
+HEADER_FORMAT = "<III"
+HEADER_SIZES = (12, 16)
+BYTES_PER_PIXEL = 4
+# screencap pixel formats, and the order of their bytes
+PIXEL_FORMATS = {1: "RGBA", 2: "RGBX", 5: "BGRA"}
+
+
+class ScreenCaptureError(Exception):
+    pass
+
+
+class ScreenCapture(object):
+    """
+    Capture the screen of a device through adb, as PIL RGB images
+    """
+
+    def __init__(self, adb_prefix="adb "):
+        self.cmd = shlex.split(adb_prefix) + ["exec-out", "screencap"]
+        self._buffer = bytearray()
+        self._lock = threading.Lock()
+        # statistics of the captures
+        self.frames = 0
+        self.capture_time = 0.0
+        self.bytes_read = 0
+        self.bytes_copied = 0
+        # background sampling
+        self._ring = None
+        self._sampler = None
+        self._stop = threading.Event()
+
+    def _read_screen(self):
+        """
+        Read the raw screen in the buffer, return the size read
+        """
+        proc = subprocess.Popen(self.cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        stream = io.FileIO(proc.stdout.fileno(), closefd=False)
+        size = 0
+        try:
+            while True:
+                if size == len(self._buffer):
+                    # first capture, or bigger screen: grow the buffer
+                    self._buffer.extend(bytearray(max(len(self._buffer), 1024 * 1024)))
+                read = stream.readinto(memoryview(self._buffer)[size:])
+                if not read:
+                    break
+                size += read
+        finally:
+            proc.stdout.close()
+            err = proc.stderr.read()
+            proc.wait()
+        if proc.returncode != 0:
+            raise ScreenCaptureError("screencap failed (%s): %s" % (proc.returncode, err.strip()))
+        return size
+
+    def capture(self, box=None):
+        """
+        Capture the screen, and decode the box (left, upper, right, lower) only
+
+        Return a PIL RGB image
+        """
+        with self._lock:
+            start = time.time()
+            size = self._read_screen()
+            if size < HEADER_SIZES[0]:
+                raise ScreenCaptureError("screencap output too short: %d bytes" % size)
+            width, height, pixel_format = struct.unpack_from(HEADER_FORMAT, self._buffer)
+            header_size = size - width * height * BYTES_PER_PIXEL
+            if header_size not in HEADER_SIZES or pixel_format not in PIXEL_FORMATS:
+                raise ScreenCaptureError("unsupported screencap output: %dx%d, format %d, %d bytes"
+                                         % (width, height, pixel_format, size))
+
+            # image sharing the buffer memory, crop and convert copy the box only
+            screen = Image.frombuffer("RGBA", (width, height),
+                                      buffer(self._buffer, header_size, size - header_size),
+                                      "raw", "RGBA", 0, 1)
+            if box is not None:
+                screen = screen.crop(box)
+            if PIXEL_FORMATS[pixel_format] == "BGRA":
+                blue, green, red, _ = screen.split()
+                img = Image.merge("RGB", (red, green, blue))
+            else:
+                img = screen.convert("RGB")
+
+            self.frames += 1
+            self.capture_time += time.time() - start
+            self.bytes_read += size
+            self.bytes_copied += img.size[0] * img.size[1] * 3
+            return img
+
+    def get_stats(self):
+        """
+        Return the frames per second and the bytes read / copied per frame
+        """
+        frames = max(self.frames, 1)
+        return {"frames": self.frames,
+                "fps": self.frames / self.capture_time if self.capture_time else 0.0,
+                "bytes_read_per_frame": self.bytes_read / frames,
+                "bytes_copied_per_frame": self.bytes_copied / frames}
+
+    def _sample(self, box, interval):
+        while not self._stop.is_set():
+            try:
+                self._ring.append((time.time(), self.capture(box)))
+            except (ScreenCaptureError, OSError) as e:
+                LOG.debug("Screen sampling failed: %s" % e)
+                self._stop.wait(1)
+            if interval:
+                self._stop.wait(interval)
+
+    def start_sampling(self, box=None, length=8, interval=0):
+        """
+        Capture the screen continuously on a background thread,
+        keeping the last length frames (see get_frames)
+        """
+        self.stop_sampling()
+        self._ring = collections.deque(maxlen=length)
+        self._stop.clear()
+        self._sampler = threading.Thread(target=self._sample, args=(box, interval))
+        self._sampler.daemon = True
+        self._sampler.start()
+
+    def stop_sampling(self):
+        if self._sampler is not None:
+            self._stop.set()
+            self._sampler.join()
+            self._sampler = None
+
+    def get_frames(self):
+        """
+        Return the sampled frames [(capture time, image)], oldest first
+        """
+        return list(self._ring) if self._ring is not None else []
@@ -285,23 +285,32 @@ def import_module(module_path):
                       fromlist=["*"])
 
 
+# Classes resolved by getconfig, by (class path, device name)
+_getconfig_classes = {}
+
+
 def getconfig(class_path, attribute, serial=None):
     from testlib.utils.statics.android.statics import get_dessert, get_device_type
     # from testlib.base.abstract import abstract_utils
-    class_name = class_path.split(".")[-1]
-    module_path = class_path.split(".")[:-1]
-    module_path = ".".join(module_path)
+    device_name = None
     if serial:
         dessert = get_dessert(serial)
         device_type = get_device_type(serial)
         device_name = device_type + "_" + dessert
 
-        module_name = module_path.split(".")[-1]
-        module_path = ".".join(module_path.split(".")[:-1])
-        module_path = ".".join([module_path, device_name])
-        module_path = ".".join([module_path, module_name])
-
-    target_module = import_module(module_path)
-
-    class_obj = getattr(target_module, class_name)
+    class_obj = _getconfig_classes.get((class_path, device_name))
+    if class_obj is None:
+        class_name = class_path.split(".")[-1]
+        module_path = class_path.split(".")[:-1]
+        module_path = ".".join(module_path)
+        if device_name:
+            module_name = module_path.split(".")[-1]
+            module_path = ".".join(module_path.split(".")[:-1])
+            module_path = ".".join([module_path, device_name])
+            module_path = ".".join([module_path, module_name])
+
+        target_module = import_module(module_path)
+
+        class_obj = getattr(target_module, class_name)
+        _getconfig_classes[(class_path, device_name)] = class_obj
     return getattr(class_obj, attribute)
@@ -24,7 +24,7 @@ from testlib.scripts.android import android_utils
 import re
 import time
 from dateutil.parser import parse
-import os
+from xml.etree import cElementTree as ElementTree
 
 
 class Sqlite:
@@ -554,15 +554,160 @@ def get_dut_date(serial=None, gmt_date=True):
     return date_dut
 
 
+class UiSnapshot(object):
+
+    """ description:
+            UI hierarchy of the screen, captured with a single
+            "uiautomator dump" streamed from the device (no file on the
+            device or on the host), indexed by text, resource-id, class
+            and content-desc to answer many queries
+
+        usage:
+            snapshot = adb_utils.UiSnapshot.capture(serial=serial)
+            snapshot.has_text("OK")
+            snapshot.has_view({"resource-id": "android:id/button1"})
+
+        tags:
+            adb, android, ui, dump
+    """
+
+    # node attributes indexed by value
+    INDEXED_ATTRIBUTES = ("text", "resource-id", "class", "content-desc")
+
+    # uiautomator selector names accepted for dump attributes
+    ATTRIBUTE_ALIASES = {"resourceId": "resource-id",
+                         "className": "class",
+                         "description": "content-desc"}
+
+    def __init__(self, xml_dump):
+        self.nodes = [node.attrib for node in ElementTree.fromstring(xml_dump).iter("node")]
+        self.index = dict((attribute, {}) for attribute in self.INDEXED_ATTRIBUTES)
+        for node in self.nodes:
+            for attribute in self.INDEXED_ATTRIBUTES:
+                value = node.get(attribute)
+                if value:
+                    self.index[attribute].setdefault(value, []).append(node)
+
+    @staticmethod
+    def capture(serial=None, timeout=20):
+        """ description:
+                returns the UiSnapshot of the current screen
+                "uiautomator dump" is streamed with exec-out, the dump
+                is written on the device then read in a single shell
+                command if exec-out is not supported
+        """
+        if serial:
+            adb_connection = connection_adb(serial=serial)
+        else:
+            adb_connection = connection_adb()
+
+        p = adb_connection.run_cmd_linux(adb_connection.cmd_prefix + ["exec-out", "uiautomator", "dump", "/dev/tty"],
+                                         timeout=timeout, ignore_error=True, liveprint=False)
+        xml_dump = UiSnapshot._extract_dump(p.stdout.read())
+        if xml_dump is None:
+            remote_file = "/sdcard/window_dump.xml"
+            p = adb_connection.run_cmd("uiautomator dump {0} > /dev/null && cat {0}; rm -f {0}".format(remote_file),
+                                       dont_split=True, timeout=timeout, ignore_error=True, liveprint=False)
+            xml_dump = UiSnapshot._extract_dump(p.stdout.read())
+        if xml_dump is None:
+            raise Exception("Could not get UI hierarchy dump")
+        return UiSnapshot(xml_dump)
+
+    @staticmethod
+    def _extract_dump(output):
+        """returns the hierarchy xml from the dump command output, None if not found"""
+        start = output.find("<?xml")
+        end = output.rfind("</hierarchy>")
+        if start < 0 or end < 0:
+            return None
+        return output[start:end + len("</hierarchy>")]
+
+    def has_text(self, text_to_find):
+        """returns True if a node text or content-desc contains <text_to_find>"""
+        for attribute in ("text", "content-desc"):
+            if text_to_find in self.index[attribute]:
+                return True
+            for value in self.index[attribute]:
+                if text_to_find in value:
+                    return True
+        return False
+
+    def find_views(self, view_to_find):
+        """returns the nodes matching all attributes of <view_to_find> (e.g. {"resource-id": "id"})"""
+        view_to_find = dict((self.ATTRIBUTE_ALIASES.get(attribute, attribute), value)
+                            for attribute, value in view_to_find.items())
+        nodes = self.nodes
+        for attribute, value in view_to_find.items():
+            if attribute in self.index:
+                nodes = self.index[attribute].get(value, [])
+                break
+        return [node for node in nodes if all(node.get(attribute) == value
+                                              for attribute, value in view_to_find.items())]
+
+    def has_view(self, view_to_find):
+        """returns True if a node matches all attributes of <view_to_find>"""
+        return len(self.find_views(view_to_find)) > 0
+
+
+def wait_for_ui(check, serial=None, wait_time=100, exists=True, min_delay=0.1, max_delay=1):
+
+    """ description:
+            takes UI snapshots until <check>(snapshot) is <exists> or
+            <wait_time> seconds are elapsed (at least one snapshot is
+            taken, a single one if <wait_time> is None), the delay
+            between snapshots starts at <min_delay> and doubles up to
+            <max_delay>
+            returns True if the expected state was seen
+            a failed or unparsable snapshot is not a match, the last
+            error is raised if no snapshot could be taken
+
+        usage:
+            adb_utils.wait_for_ui(lambda snapshot: snapshot.has_text("OK"), serial=serial)
+
+        tags:
+            adb, android, ui, wait
+    """
+
+    deadline = time.time() + (wait_time or 0)
+    delay = min_delay
+    captured = False
+    while True:
+        try:
+            snapshot = UiSnapshot.capture(serial=serial)
+        except Exception:
+            # dump failed or truncated (i.e. UI changing): try again
+            snapshot = None
+            if time.time() >= deadline and not captured:
+                raise
+        if snapshot is not None:
+            captured = True
+            if check(snapshot) == exists:
+                return True
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            return False
+        time.sleep(min(delay, remaining))
+        delay = min(delay * 2, max_delay)
+
+
 def is_text_displayed(text_to_find, serial=None, wait_time=100, exists=True):
-    remote_file = "/sdcard/window_dump.xml"
+
+    """ description:
+            Return True if <text_to_find> is (exists=True) or is not
+            (exists=False) displayed on screen within <wait_time> seconds
+            (a single check if <wait_time> is None)
+
+        usage:
+            adb_utils.is_text_displayed(text_to_find="text")
+
+        tags:
+            adb, android, text, displayed
+    """
 
     if serial:
         adb_connection = connection_adb(serial=serial)
-        local_file = "./window_dump_{0}.xml".format(serial)
     else:
         adb_connection = connection_adb()
-        local_file = "./window_dump.xml"
 
     tries = 0
     pid = adb_connection.get_pid("uiautomator")
@@ -574,48 +719,28 @@ def is_text_displayed(text_to_find, serial=None, wait_time=100, exists=True):
             pid = adb_connection.get_pid("uiautomator")
             tries += 1
 
-    current_time = 0
-    while current_time < wait_time:
-        adb_connection.run_cmd(command="uiautomator dump")
-
-        adb_connection.get_file(remote=remote_file, local=local_file)
-
-        adb_connection.run_cmd(command="rm {0}".format(remote_file))
-
-        with open(local_file, "r") as f:
-            read_data = f.read()
-            if text_to_find in read_data:
-                os.remove(local_file)
-                if exists:
-                    return True
-        os.remove(local_file)
-        current_time += 1
-
-    if exists:
-        return False
-    return True
+    return wait_for_ui(lambda snapshot: snapshot.has_text(text_to_find), serial=serial, wait_time=wait_time,
+                       exists=exists)
 
 
 def is_view_displayed(view_to_find, serial=None, wait_time=100, exists=True):
 
     """ description:
-            Return True if <view_to_find> is visible on screen.
+            Return True if <view_to_find> is (exists=True) or is not
+            (exists=False) visible on screen within <wait_time> seconds
+            (a single check if <wait_time> is None)
 
         usage:
-            adb_utils.is_view_displayed(view_to_find = {"Text": "text"})
+            adb_utils.is_view_displayed(view_to_find = {"text": "text"})
 
         tags:
             adb, android, view, displayed
     """
 
-    remote_file = "/sdcard/window_dump.xml"
-
     if serial:
         adb_connection = connection_adb(serial=serial)
-        local_file = "./window_dump_{0}.xml".format(serial)
     else:
         adb_connection = connection_adb()
-        local_file = "./window_dump_{0}.xml"
 
     tries = 0
     pid = adb_connection.get_pid("uiautomator")
@@ -627,28 +752,8 @@ def is_view_displayed(view_to_find, serial=None, wait_time=100, exists=True):
             pid = adb_connection.get_pid("uiautomator")
             tries += 1
 
-    current_time = 0
-
-    while current_time < wait_time:
-        adb_connection.run_cmd(command="uiautomator dump")
-        adb_connection.get_file(remote=remote_file, local=local_file)
-
-        adb_connection.run_cmd(command="rm {0}".format(remote_file))
-        view = '{0}="{1}"'.format(view_to_find.keys()[0],
-                                  view_to_find[view_to_find.keys()[0]])
-
-        with open(local_file, "r") as f:
-            read_data = f.read()
-            if view in read_data:
-                os.remove(local_file)
-                if exists:
-                    return True
-
-        os.remove(local_file)
-        current_time += 1
-    if exists:
-        return False
-    return True
+    return wait_for_ui(lambda snapshot: snapshot.has_view(view_to_find), serial=serial, wait_time=wait_time,
+                       exists=exists)
 
 
 def get_product_name(serial=None):
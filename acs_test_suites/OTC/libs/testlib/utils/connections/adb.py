@@ -21,10 +21,16 @@ SPDX-License-Identifier: Apache-2.0
 import subprocess
 import time
 import os
+import re
+import select
+from cStringIO import StringIO
 import local
 import connection
 from testlib.base import base_utils
-import signal
+
+
+# Line of getprop output: [key]: [value]
+GETPROP_LINE_REGEX = re.compile(r"^\[([^\]]*)\]: \[(.*)\]", re.MULTILINE)
 
 
 class AdbError(Exception):
@@ -32,6 +38,74 @@ class AdbError(Exception):
     pass
 
 
+class CapturedProcess(object):
+    """
+    Finished process of a sync command
+    Gives the Popen interface (stdout, stderr, returncode, poll, communicate)
+    over the output captured in memory
+    """
+
+    def __init__(self, process, stdout, stderr):
+        self.pid = process.pid
+        self.returncode = process.returncode
+        self.stdout = StringIO(stdout)
+        self.stderr = StringIO(stderr)
+
+    def poll(self):
+        return self.returncode
+
+    def wait(self):
+        return self.returncode
+
+    def communicate(self, input=None):
+        """returns the output not read yet"""
+        return self.stdout.read(), self.stderr.read()
+
+
+def communicate(process, timeout=None, max_wait=0.5):
+    """
+    Read the whole stdout/stderr of a process, as Popen.communicate,
+    but waits up to timeout seconds (no signal involved, can be used from any thread)
+    If the process ends and leaves its pipes to a child (e.g. adb server),
+    the output available at that time is returned.
+
+    process  -- Popen object created with stdout/stderr pipes
+    timeout  -- max time to wait for the process end in seconds, None to wait forever
+    max_wait -- max time to block on pipes before checking the process end
+
+    returns (stdout, stderr)
+    raises base_utils.TimeoutError after killing the process if timeout is reached
+    """
+    deadline = None if timeout is None else time.time() + timeout
+    streams = [stream for stream in (process.stdout, process.stderr) if stream is not None]
+    output = dict((stream, []) for stream in streams)
+    while streams:
+        wait = max_wait
+        if deadline is not None:
+            wait = min(wait, deadline - time.time())
+            if wait <= 0:
+                if process.poll() is None:
+                    process.kill()
+                process.wait()
+                raise base_utils.TimeoutError("Timeout {0} second(s) reached".format(timeout))
+        ready, _, _ = select.select(streams, [], [], wait)
+        if not ready and process.poll() is not None:
+            # process is over, pipes are kept open by one of its children
+            ready, _, _ = select.select(streams, [], [], 0)
+            for stream in ready:
+                output[stream].append(os.read(stream.fileno(), 65536))
+            break
+        for stream in ready:
+            data = os.read(stream.fileno(), 65536)
+            if data:
+                output[stream].append(data)
+            else:
+                streams.remove(stream)
+    process.wait()
+    return tuple("".join(output[stream]) if stream in output else ""
+                 for stream in (process.stdout, process.stderr))
+
+
 class Adb(connection.Connection):
     """
     Singleton object to facilitate adb connection with the device
@@ -81,35 +155,35 @@ class Adb(connection.Connection):
 
     def run_cmd_linux(self, command, mode="sync", soutfile=None, timeout=10, env={}, liveprint=True,
                       ignore_error=False):
-        """run linux bash command using Popen"""
+        """
+        run linux bash command using Popen
+        sync mode returns a CapturedProcess once the command is over, async mode returns the Popen object
+        """
         if self.verbose:
             print "Executing {0}".format(" ".join(command))
-        __env = os.environ
-        __env.update(env)
+        # os.environ is left untouched, commands may run from several threads
+        __env = dict(os.environ, **env) if env else None
         p = None
         __err = 'Timeout {0} second(s) reached while executing "{1}"'.format(timeout, " ".join(command))
         if soutfile is None:
             p = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=__env)
         else:
-            p = subprocess.Popen(command, stdout=open(soutfile, "wr"), stderr=subprocess.PIPE, env=__env)
+            with open(soutfile, "w") as sout:
+                p = subprocess.Popen(command, stdout=sout, stderr=subprocess.PIPE, env=__env)
         if mode.lower() == "sync":
-            def handler(signum, frame):
+            try:
+                # as signal.alarm, no timeout if 0
+                stdout, stderr = communicate(p, timeout=timeout or None)
+            except base_utils.TimeoutError:
                 raise base_utils.TimeoutError(__err)
-
-            signal.signal(signal.SIGALRM, handler)
-            signal.alarm(timeout)
-            while True:
-                if self.verbose and soutfile is None and liveprint:
-                    print "STDOUT", p.stdout.read()
-                    print "STDERR", p.stderr.read()
-                if p.poll() is not None:
-                    if not ignore_error:
-                        __error = p.stderr.read().strip()
-                        if __error != '' and "Warning" not in __error:
-                            signal.alarm(0)
-                            raise AssertionError("Error encountered:\n{0}".format(__error))
-                    signal.alarm(0)
-                    return p
+            if self.verbose and soutfile is None and liveprint:
+                print "STDOUT", stdout
+                print "STDERR", stderr
+            if not ignore_error:
+                __error = stderr.strip()
+                if __error != '' and "Warning" not in __error:
+                    raise AssertionError("Error encountered:\n{0}".format(__error))
+            return CapturedProcess(p, stdout, stderr)
 
         elif mode.lower() == "async":
             # Add below lines to fail in case run_cmd returns with failure
@@ -127,6 +201,48 @@ class Adb(connection.Connection):
             raise AdbError("Mode '{0}' not supported. \
                             Use only 'sync' or 'async'.".format(mode))
 
+    def run_cmd_lines(self, command, timeout=None, dont_split=False):
+        """
+        run adb shell command and yield its stdout lines as they come, for long running commands
+        the command is killed at timeout (TimeoutError is raised) or when the iteration is stopped
+        """
+        cmd = []
+        cmd.extend(self.cmd_prefix)
+        cmd.append('shell')
+        if dont_split:
+            cmd.append(command)
+        else:
+            cmd.extend(command.split())
+        if self.verbose:
+            print "Executing {0}".format(" ".join(cmd))
+        deadline = None if timeout is None else time.time() + timeout
+        p = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=open(os.devnull, "w"))
+        try:
+            pending = ""
+            while True:
+                wait = None
+                if deadline is not None:
+                    wait = deadline - time.time()
+                    if wait <= 0:
+                        raise base_utils.TimeoutError('Timeout {0} second(s) reached while executing "{1}"'
+                                                      .format(timeout, " ".join(cmd)))
+                ready, _, _ = select.select([p.stdout], [], [], wait)
+                if not ready:
+                    continue
+                data = os.read(p.stdout.fileno(), 65536)
+                if not data:
+                    break
+                lines = (pending + data).split("\n")
+                pending = lines.pop()
+                for line in lines:
+                    yield line
+            if pending:
+                yield pending
+        finally:
+            if p.poll() is None:
+                p.kill()
+            p.wait()
+
     def open_connection(self):
         """connect to device if not already connected"""
         if not self.check_connected():
@@ -349,19 +465,10 @@ cat /dev/urandom > /dev/null & cat /dev/urandom > /dev/null"
         By default gets the output from adb shell command
         Can grep for strings or cut for delimiters
         """
-        # tmp file name should be uniq to allow getting output from
-        # multiple devices at the same time
-
-        tmp_file_name = "tmp_{0}_{1}_{2}".format("5037" if self.port is None else str(self.port), self.serial.split(
-            ":")[0], str(int(round(time.time() * 1000000))))
-        self.run_cmd(cmd, soutfile=tmp_file_name, timeout=timeout, dont_split=dont_split, ignore_error=ignore_error)
-        with open(tmp_file_name, 'r') as f:
-            string = f.read()
-            string = base_utils.parse_string(string, grep_for=grep_for, multiple_grep=multiple_grep,
-                                             left_separator=left_separator, right_separator=right_separator,
-                                             strip=strip)
-        os.remove(tmp_file_name)
-        return string
+        p = self.run_cmd(cmd, timeout=timeout, dont_split=dont_split, ignore_error=ignore_error)
+        return base_utils.parse_string(p.stdout.read(), grep_for=grep_for, multiple_grep=multiple_grep,
+                                       left_separator=left_separator, right_separator=right_separator,
+                                       strip=strip)
 
     def parse_logcat(self, grep_for=None, left_separator=None, right_separator=None, strip=False):
         """parses logcat output"""
@@ -435,6 +542,10 @@ cat /dev/urandom > /dev/null & cat /dev/urandom > /dev/null"
         cmd = "getprop {0}".format(prop)
         return self.parse_cmd_output(cmd, strip=True).strip()
 
+    def get_props(self):
+        """get all props from the device with a single getprop, as a dict"""
+        return dict(GETPROP_LINE_REGEX.findall(self.parse_cmd_output("getprop")))
+
     def set_prop(self, prop, value):
         """set prop on the device"""
         self.run_cmd("setprop {0} {1}".format(prop, value))
@@ -342,6 +342,8 @@ class Device(object):
 
     def __init__(self, **kwargs):
         self.kwargs = kwargs
+        # Device identity props, read from the device with a single getprop
+        self._props = None
         if "platform" in kwargs and kwargs["platform"] is not None:
             platform = self.__SW_PLATFORMS[kwargs["platform"]]
             target = self.__PLATFORMS[platform]
@@ -362,12 +364,21 @@ class Device(object):
 
         self.test = False
 
+    def _get_prop(self, prop):
+        """get an identity prop of the device, all props are read once with a single getprop"""
+        props = self._props
+        if props is None:
+            props = connection_adb(serial=self.kwargs["serial"]).get_props()
+            # nothing is kept if the device did not answer
+            if props:
+                self._props = props
+        return props.get(prop, "")
+
     def _initialize_target(self):
         try:
             boot_state = local_utils.get_device_boot_state(serial=self.kwargs["serial"])
             if boot_state == "android":
-                adb_connection = connection_adb(serial=self.kwargs["serial"])
-                platform = adb_connection.get_prop(prop="ro.product.device")
+                platform = self._get_prop(prop="ro.product.device")
             elif boot_state == "fastboot":
                 if fastboot_utils.var_exists(var="product-string", serial=self.kwargs["serial"]):
                     product_string = fastboot_utils.get_var(var="product-string", serial=self.kwargs["serial"])
@@ -387,9 +398,8 @@ class Device(object):
 
     def _initialize_build_type(self):
         try:
-            adb_connection = connection_adb(serial=self.kwargs["serial"])
-            build_type = adb_connection.get_prop(prop="ro.build.type")
-            keys = adb_connection.get_prop(prop="ro.build.fingerprint")
+            build_type = self._get_prop(prop="ro.build.type")
+            keys = self._get_prop(prop="ro.build.fingerprint")
             if "release-keys" in keys:
                 if build_type == "user":
                     self._build_type = UserSigned(**self.kwargs)
@@ -413,17 +423,16 @@ class Device(object):
 
     def _initialize_dessert(self):
         try:
-            adb_connection = connection_adb(serial=self.kwargs["serial"])
-            api_level = adb_connection.get_prop(prop="ro.build.version.sdk")
+            api_level = self._get_prop(prop="ro.build.version.sdk")
             if int(api_level) < 23 and int(api_level) > 20:
                 dessert = self.__DESSERTS["L"]
-            elif int(api_level) == 23 and adb_connection.get_prop(prop="ro.build.version.release") != "N":
+            elif int(api_level) == 23 and self._get_prop(prop="ro.build.version.release") != "N":
                 dessert = self.__DESSERTS["M"]
             elif int(api_level) == 24:
                 dessert = self.__DESSERTS["N"]
             elif int(api_level) == 25:
                 dessert = self.__DESSERTS["N"]
-            elif adb_connection.get_prop(prop="ro.build.version.release") == "N":
+            elif self._get_prop(prop="ro.build.version.release") == "N":
                 dessert = self.__DESSERTS["N"]
             elif int(api_level) == 26 or int(api_level) == 27:
                 dessert = self.__DESSERTS["O"]